@@ -0,0 +1,112 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+# ---- Import-time benchmark ----
+# Imports each module in a fresh interpreter (so nothing is cached in sys.modules) and
+# reports the median wall time, the slowest imports from `python -X importtime`, which
+# heavy dependencies got loaded and whether the import left files behind. Importing the
+# monitor should not load the browser, SMTP, HTTP client or SQLite machinery, or touch disk.
+#
+#   python -m benchmarks.bench_import
+#   python -m benchmarks.bench_import sellouts.parsing --runs 20 --budget-ms 150
+
+DEFAULT_MODULES = ["sellouts.parsing", "sellouts.monitor", "sellouts.cluster"]
+# Should only be imported once they are used
+HEAVY_MODULES = ["pyppeteer", "pyppeteer_stealth", "bs4", "smtplib", "httpx", "sqlite3", "dotenv",
+                 "concurrent.futures.process", "email.mime.text"]
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+print(json.dumps({{"seconds": elapsed, "loaded": [name for name in {heavy!r} if name in sys.modules]}}))
+"""
+
+
+def run_probe(module, workdir, env, importtime=False):
+    command = [sys.executable] + (["-X", "importtime"] if importtime else []) + [
+        "-c", PROBE.format(module=module, heavy=HEAVY_MODULES)]
+    completed = subprocess.run(command, cwd=workdir, env=env, capture_output=True, text=True, timeout=120)
+    if completed.returncode != 0:
+        raise RuntimeError(f"importing {module} failed:\n{completed.stderr.strip()[-2000:]}")
+    return json.loads(completed.stdout.strip().splitlines()[-1]), completed.stderr
+
+
+def slowest_imports(importtime_output, module, count):
+    # Lines look like "import time: self | cumulative | <indent>name", nested two spaces per
+    # level, and a module's imports are listed before the module itself. Returns the
+    # module's cumulative time and its slowest direct imports.
+    children = []
+    for line in importtime_output.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        if depth == 1:
+            children.append((int(cumulative_us), name.strip()))
+        elif depth == 0:
+            if name.strip() == module:
+                return int(cumulative_us), sorted(children, reverse=True)[:count]
+            children = []
+    return 0, []
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold import time of the sellouts modules")
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--top", type=int, default=8, help="slowest imports to list per module")
+    parser.add_argument("--budget-ms", type=float, help="exit non-zero if any median import is slower than this")
+    args = parser.parse_args()
+
+    # Run from an empty directory without credentials: the import must not need a .env,
+    # the email settings or a writable working directory
+    env = {key: value for key, value in os.environ.items()
+           if key not in ("EMAIL_ADDRESS", "EMAIL_PASSWORD", "RECIPIENT_EMAIL")}
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [os.getcwd(), env.get("PYTHONPATH")]))
+    failed = False
+    for module in args.modules:
+        workdir = tempfile.mkdtemp(prefix="sellouts-import-")
+        try:
+            timings = []
+            loaded = []
+            for _ in range(args.runs):
+                probe, _ = run_probe(module, workdir, env)
+                timings.append(probe["seconds"])
+                loaded = probe["loaded"]
+            _, importtime_output = run_probe(module, workdir, env, importtime=True)
+        except RuntimeError as e:
+            print(e)
+            failed = True
+            continue
+        leftovers = os.listdir(workdir)
+        median_ms = statistics.median(timings) * 1000
+        print(f"\n{module}: median {median_ms:.1f} ms, min {min(timings) * 1000:.1f} ms over {args.runs} runs")
+        print(f"  heavy modules loaded: {', '.join(loaded) or 'none'}")
+        if leftovers:
+            print(f"  files created by the import: {', '.join(leftovers)}")
+            failed = True
+        total, children = slowest_imports(importtime_output, module, args.top)
+        print(f"  -X importtime total {total / 1000:.1f} ms; slowest direct imports:")
+        for cumulative_us, name in children:
+            print(f"  {cumulative_us / 1000:7.1f} ms  {name}")
+        if args.budget_ms is not None and median_ms > args.budget_ms:
+            print(f"  over budget ({args.budget_ms:.0f} ms)")
+            failed = True
+        for name in leftovers:
+            path = os.path.join(workdir, name)
+            if os.path.isfile(path):
+                os.remove(path)
+        if not os.listdir(workdir):
+            os.rmdir(workdir)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import resource
+import sys
+import time
+import tracemalloc
+from sellouts.metrics import percentile
+from sellouts.monitor import evaluate_layers, extract_availability_data
+from benchmarks.make_corpus import write_corpus
+
+# ---- Parse/detect benchmark ----
+# Runs the extraction + Layer 1/Layer 2 evaluation path over saved page snapshots for
+# each engine and reports throughput, per-page latency, peak memory and correctness
+# against labels.json. Exits non-zero if any engine disagrees with the labels.
+
+ENGINES = {
+    "bs4": lambda html: evaluate_layers(*extract_availability_data(html, "bs4")),
+    "fast": lambda html: evaluate_layers(*extract_availability_data(html, "fast")),
+}
+
+def load_corpus(directory):
+    with open(os.path.join(directory, "labels.json")) as f:
+        labels = json.load(f)
+    pages = {}
+    for filename in sorted(labels):
+        with open(os.path.join(directory, filename), encoding="utf-8") as f:
+            pages[filename] = f.read()
+    return pages, labels
+
+def check_labels(result, label):
+    errors = []
+    if result["found"] != label["found"]:
+        errors.append(f"found={result['found']} expected {label['found']}")
+    jsonld = bool(result["layers"].get("Layer 2: JSON-LD"))
+    if "jsonld_instock" in label and jsonld != label["jsonld_instock"]:
+        errors.append(f"jsonld_instock={jsonld} expected {label['jsonld_instock']}")
+    return errors
+
+def bench_engine(detect, pages, labels, repeat):
+    # Warm-up pass doubles as the correctness check
+    failures = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        for filename, html in pages.items():
+            errors = check_labels(detect(html), labels[filename])
+            if errors:
+                failures[filename] = errors
+
+        samples = []
+        started = time.perf_counter()
+        for _ in range(repeat):
+            for html in pages.values():
+                page_started = time.perf_counter()
+                detect(html)
+                samples.append(time.perf_counter() - page_started)
+        elapsed = time.perf_counter() - started
+
+        tracemalloc.start()
+        peak = 0
+        for html in pages.values():
+            tracemalloc.reset_peak()
+            detect(html)
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+    samples.sort()
+    return {
+        "pages_per_sec": len(samples) / elapsed,
+        "p50_ms": percentile(samples, 0.5) * 1000,
+        "p95_ms": percentile(samples, 0.95) * 1000,
+        "p99_ms": percentile(samples, 0.99) * 1000,
+        "max_ms": samples[-1] * 1000,
+        "peak_alloc_mb": peak / (1024 * 1024),
+        "failures": failures,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark check_ticket_availability engines over saved pages")
+    parser.add_argument("corpus", nargs="?", default="benchmarks/corpus",
+                        help="directory of .html snapshots with labels.json (generated if missing)")
+    parser.add_argument("--engines", default=",".join(ENGINES), help="comma-separated engines to run")
+    parser.add_argument("--repeat", type=int, default=5, help="timed passes over the corpus per engine")
+    parser.add_argument("--json", dest="json_out", help="also write results to this file")
+    args = parser.parse_args()
+
+    if not os.path.exists(os.path.join(args.corpus, "labels.json")):
+        write_corpus(args.corpus)
+    pages, labels = load_corpus(args.corpus)
+    total_kb = sum(len(html) for html in pages.values()) / 1024
+    print(f"Corpus: {len(pages)} pages, {total_kb:.0f} KB, {args.repeat} passes\n")
+
+    results = {}
+    print(f"{'engine':<8}{'pages/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}{'peak MB':>10}  correct")
+    for engine in args.engines.split(","):
+        result = bench_engine(ENGINES[engine], pages, labels, args.repeat)
+        results[engine] = result
+        correct = f"{len(pages) - len(result['failures'])}/{len(pages)}"
+        print(f"{engine:<8}{result['pages_per_sec']:>10.1f}{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}"
+              f"{result['p99_ms']:>10.2f}{result['max_ms']:>10.2f}{result['peak_alloc_mb']:>10.1f}  {correct}")
+        for filename, errors in result["failures"].items():
+            print(f"  MISMATCH {filename}: {'; '.join(errors)}")
+    print(f"\nProcess max RSS: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB")
+
+    if args.json_out:
+        with open(args.json_out, "w") as f:
+            json.dump(results, f, indent=2)
+    return 1 if any(result["failures"] for result in results.values()) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,157 @@
+import argparse
+import email
+import json
+import os
+import random
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from aiosmtpd.controller import Controller
+
+from benchmarks.notify_sink import SinkState, start_sink
+from benchmarks.standin_server import StandInState, start_server
+from sellouts.metrics import percentile
+
+# ---- End-to-end load test ----
+# Starts the stand-in server and a local SMTP sink, runs `python -m sellouts.monitor`
+# against N stand-in events, flips events to available during the run and reports the
+# time from each flip to the alert email arriving, plus checks/sec. With --http-alerts the
+# webhook, Telegram and Slack channels are sent to a local sink and reported as well.
+
+class AlertSink:
+    # aiosmtpd handler recording when an alert for each event URL arrives
+    def __init__(self):
+        self.received = {}  # event url -> first arrival time
+        self._lock = threading.Lock()
+
+    async def handle_DATA(self, server, session, envelope):
+        body = email.message_from_bytes(envelope.content).get_payload(decode=True).decode(errors="replace")
+        now = time.time()
+        with self._lock:
+            for line in body.splitlines():
+                if "/event/" in line and line.strip().startswith("http"):
+                    self.received.setdefault(line.strip(), now)
+        return "250 OK"
+
+
+def free_port():
+    # aiosmtpd's Controller can't bind port 0 itself
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def count_checks(log_file):
+    checks = 0
+    if os.path.exists(log_file):
+        with open(log_file) as f:
+            for line in f:
+                try:
+                    checks += json.loads(line).get("type") == "check"
+                except ValueError:
+                    pass
+    return checks
+
+
+def report_latency(name, received, flip_times):
+    latencies = sorted(received[url] - flipped for url, flipped in flip_times.items() if url in received)
+    print(f"{name}: {len(latencies)}/{len(flip_times)} flips alerted", end="")
+    if latencies:
+        print(f"; flip-to-alert min {latencies[0]:.1f}s  p50 {percentile(latencies, 0.5):.1f}s  "
+              f"p95 {percentile(latencies, 0.95):.1f}s  max {latencies[-1]:.1f}s", end="")
+    print()
+    return len(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure flip-to-alert latency and checks/sec against the stand-in")
+    parser.add_argument("--events", type=int, default=10)
+    parser.add_argument("--pool", type=int, default=3, help="PAGE_POOL_SIZE for the monitor")
+    parser.add_argument("--duration", type=float, default=120, help="seconds to run after warm-up")
+    parser.add_argument("--warmup", type=float, default=20)
+    parser.add_argument("--flips", type=int, default=5, help="events flipped to available during the run")
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--asset-latency", type=float, default=0.0)
+    parser.add_argument("--timeout-rate", type=float, default=0.0)
+    parser.add_argument("--padding-kb", type=int, default=200)
+    parser.add_argument("--http-alerts", action="store_true",
+                        help="also send alerts to the webhook, Telegram and Slack channels on a local sink")
+    parser.add_argument("--env", action="append", default=[], help="extra KEY=VALUE for the monitor, e.g. EXTRACTION_MODE=network")
+    args = parser.parse_args()
+
+    event_ids = [f"EV{i:04d}" for i in range(args.events)]
+    state = StandInState(event_ids, args.latency, args.asset_latency, args.timeout_rate, padding_kb=args.padding_kb)
+    server = start_server(state)
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    sink = AlertSink()
+    smtp_port = free_port()
+    smtp = Controller(sink, hostname="127.0.0.1", port=smtp_port)
+    smtp.start()
+
+    workdir = tempfile.mkdtemp(prefix="sellouts-e2e-")
+    events_file = os.path.join(workdir, "events.txt")
+    with open(events_file, "w") as f:
+        f.write("\n".join(f"{base_url}/event/{event_id}" for event_id in event_ids) + "\n")
+    log_file = os.path.join(workdir, "sellouts_log.jsonl")
+    env = dict(os.environ,
+               EVENTS_FILE=events_file, PAGE_POOL_SIZE=str(args.pool), HEADLESS="1", LOG_FILE=log_file,
+               EMAIL_ADDRESS="monitor@example.com", EMAIL_PASSWORD="unused", RECIPIENT_EMAIL="alerts@example.com",
+               SMTP_HOST="127.0.0.1", SMTP_PORT=str(smtp_port), SMTP_SSL="0",
+               ALERT_COOLDOWN="0", PYTHONPATH=os.getcwd())
+    notify_sink = None
+    if args.http_alerts:
+        sink_state = SinkState()
+        notify_sink = start_sink(sink_state)
+        sink_url = f"http://127.0.0.1:{notify_sink.server_port}"
+        env.update(NOTIFY_CHANNELS="email,webhook,telegram,slack", WEBHOOK_URL=f"{sink_url}/webhook",
+                   TELEGRAM_API=sink_url, TELEGRAM_BOT_TOKEN="test", TELEGRAM_CHAT_ID="1",
+                   SLACK_WEBHOOK_URL=f"{sink_url}/slack")
+    env.update(item.split("=", 1) for item in args.env)
+    print(f"Monitoring {args.events} stand-in events with {args.pool} pages (workdir {workdir})")
+    monitor = subprocess.Popen([sys.executable, "-m", "sellouts.monitor"], cwd=workdir, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.STDOUT)
+    try:
+        time.sleep(args.warmup)
+        checks_before = count_checks(log_file)
+        requests_before = dict(state.requests)
+        started = time.time()
+        flip_ids = random.sample(event_ids, min(args.flips, len(event_ids)))
+        flip_times = {}
+        for idx, event_id in enumerate(flip_ids):
+            # Spread flips over the first 70% of the run so each has time to be detected
+            time.sleep(max(0, started + (idx + 1) * args.duration * 0.7 / (len(flip_ids) + 1) - time.time()))
+            state.flip(event_id, True)
+            flip_times[f"{base_url}/event/{event_id}"] = state.flipped_at[event_id]
+        time.sleep(max(0, started + args.duration - time.time()))
+        elapsed = time.time() - started
+        checks = count_checks(log_file) - checks_before
+        requests = {key: value - requests_before.get(key, 0) for key, value in state.requests.items()}
+    finally:
+        monitor.send_signal(signal.SIGINT)
+        try:
+            monitor.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            monitor.kill()
+        smtp.stop()
+        server.shutdown()
+        if notify_sink:
+            notify_sink.shutdown()
+
+    print(f"\nRun: {elapsed:.0f}s, {checks} checks ({checks / elapsed:.2f} checks/s)")
+    print("Server requests/s: " + ", ".join(f"{key} {value / elapsed:.1f}" for key, value in sorted(requests.items())))
+    alerted = report_latency("email", sink.received, flip_times)
+    if notify_sink:
+        arrivals = sink_state.first_arrivals()
+        for name, path in (("webhook", "/webhook"), ("telegram", "/bottest/sendMessage"), ("slack", "/slack")):
+            received = {url: arrived for (arrived_path, url), arrived in arrivals.items() if arrived_path == path}
+            alerted = min(alerted, report_latency(name, received, flip_times))
+    return 0 if alerted == len(flip_times) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,60 @@
+import argparse
+import json
+import os
+
+from benchmarks.pages import make_offer, render_event_page
+
+# ---- Benchmark corpus ----
+# Writes synthetic event page snapshots plus labels.json with the expected outcome of each:
+# "found" is the monitor's decision (Layer 1) and "jsonld_instock" the Layer 2 verdict.
+
+CASES = {
+    "sold_out_small": dict(available=False, padding_kb=50),
+    "sold_out_large": dict(available=False, padding_kb=1500),
+    "available_small": dict(available=True, padding_kb=50),
+    "available_large": dict(available=True, padding_kb=1500),
+    "available_multi_span": dict(available=True, status_spans=3),
+    "sold_out_jsonld_list": dict(available=False, jsonld="list"),
+    "available_jsonld_list": dict(available=True, jsonld="list"),
+    "sold_out_malformed_jsonld": dict(available=False, jsonld="malformed"),
+    "available_malformed_jsonld": dict(available=True, jsonld="malformed"),
+    "available_missing_jsonld": dict(available=True, jsonld="missing"),
+    "no_status_span": dict(available=True, status_spans=0),
+    "sold_out_entity_in_span": dict(available=False, status_text="0 No results &amp; no resale"),
+    "available_mixed_offers": dict(available=True, offers=[make_offer("SoldOut", 95.5, "Standing"),
+                                                           make_offer("InStock", 145.0, "Seated")]),
+}
+
+def expected_outcome(options):
+    available = options.get("available", False)
+    spans = options.get("status_spans", 1)
+    jsonld = options.get("jsonld", "valid")
+    status_text = options.get("status_text")
+    if status_text is not None:
+        found = spans > 0 and not status_text.lower().startswith("0 no results")
+    else:
+        found = spans > 0 and available
+    if jsonld in ("malformed", "missing"):
+        instock = False
+    elif "offers" in options:
+        instock = any(offer["availability"].endswith("InStock") for offer in options["offers"])
+    else:
+        instock = available
+    return {"found": found, "jsonld_instock": instock}
+
+def write_corpus(directory):
+    os.makedirs(directory, exist_ok=True)
+    labels = {}
+    for seed, (name, options) in enumerate(CASES.items()):
+        filename = f"{name}.html"
+        with open(os.path.join(directory, filename), "w", encoding="utf-8") as f:
+            f.write(render_event_page(seed=seed, **options))
+        labels[filename] = expected_outcome(options)
+    with open(os.path.join(directory, "labels.json"), "w") as f:
+        json.dump(labels, f, indent=2)
+    print(f"Wrote {len(labels)} snapshots to {directory}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate the synthetic page corpus used by bench_parse")
+    parser.add_argument("directory", nargs="?", default="benchmarks/corpus")
+    write_corpus(parser.parse_args().directory)
@@ -0,0 +1,116 @@
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# ---- Notification sink ----
+# Local stand-in for the alert webhooks: accepts JSON POSTs on any path (generic webhook,
+# /bot<token>/sendMessage for Telegram, a Slack incoming-webhook path, ...) and records when
+# each arrived. Latency and failures can be injected to exercise the notifier's timeouts
+# and retries.
+#
+#   python -m benchmarks.notify_sink --port 8760 --latency 0.2 --failure-rate 0.3
+#   WEBHOOK_URL=http://127.0.0.1:8760/hook TELEGRAM_API=http://127.0.0.1:8760 SLACK_WEBHOOK_URL=http://127.0.0.1:8760/slack
+
+
+class SinkState:
+    def __init__(self, latency=0.0, failure_rate=0.0, hang_rate=0.0, hang_seconds=60):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.hang_rate = hang_rate
+        self.hang_seconds = hang_seconds
+        self.received = []  # (time, path, payload)
+        self.failed = 0
+        self._lock = threading.Lock()
+
+    def record(self, path, payload):
+        with self._lock:
+            self.received.append((time.time(), path, payload))
+
+    def first_arrivals(self, text_of=lambda payload: json.dumps(payload)):
+        # {(path, event url): first arrival} for payloads mentioning a stand-in event URL
+        arrivals = {}
+        with self._lock:
+            for arrived, path, payload in self.received:
+                for word in text_of(payload).replace("\\n", " ").replace('"', " ").split():
+                    if "/event/" in word and word.startswith("http"):
+                        arrivals.setdefault((path, word), arrived)
+        return arrivals
+
+
+def make_handler(state):
+    class SinkHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status, body):
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            if state.hang_rate and random.random() < state.hang_rate:
+                time.sleep(state.hang_seconds)
+                return
+            time.sleep(state.latency)
+            if state.failure_rate and random.random() < state.failure_rate:
+                state.failed += 1
+                self._send(503, b'{"ok": false}')
+                return
+            try:
+                payload = json.loads(body or b"null")
+            except ValueError:
+                self._send(400, b'{"ok": false, "description": "invalid JSON"}')
+                return
+            state.record(self.path, payload)
+            self._send(200, b'{"ok": true}')
+
+        def do_GET(self):
+            with state._lock:
+                body = json.dumps({"received": len(state.received), "failed": state.failed}).encode()
+            self._send(200, body)
+
+    return SinkHandler
+
+
+def start_sink(state, host="127.0.0.1", port=0):
+    # Runs in a background thread; returns the server (server.server_port has the bound port)
+    server = ThreadingHTTPServer((host, port), make_handler(state))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="notify-sink", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local webhook/Telegram/Slack stand-in for alert testing")
+    parser.add_argument("--port", type=int, default=8760)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds before each response")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    parser.add_argument("--hang-rate", type=float, default=0.0, help="fraction of requests that never answer")
+    args = parser.parse_args()
+
+    state = SinkState(args.latency, args.failure_rate, args.hang_rate)
+    server = start_sink(state, port=args.port)
+    print(f"Notification sink listening on http://127.0.0.1:{server.server_port}")
+    try:
+        seen = 0
+        while True:
+            time.sleep(0.5)
+            with state._lock:
+                new = state.received[seen:]
+                seen = len(state.received)
+            for arrived, path, payload in new:
+                print(f"{time.strftime('%H:%M:%S', time.localtime(arrived))} {path} {json.dumps(payload)[:200]}")
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
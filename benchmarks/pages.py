@@ -0,0 +1,83 @@
+import json
+import random
+
+# ---- Synthetic event pages ----
+# Builds pages shaped like a Ticketmaster event page: a large head full of scripts and
+# styles, a MusicEvent JSON-LD block, a body padded with seat-map/listing markup, and the
+# role="status" VisuallyHidden span(s) the monitor reads.
+
+def music_event_jsonld(name, offers, start_date="2025-07-05T15:00:00"):
+    return {
+        "@context": "http://schema.org",
+        "@type": "MusicEvent",
+        "name": name,
+        "startDate": start_date,
+        "location": {
+            "@type": "Place",
+            "name": "Villa Park",
+            "address": {"@type": "PostalAddress", "streetAddress": "Trinity Road", "addressLocality": "Birmingham"},
+        },
+        "offers": offers,
+    }
+
+def make_offer(availability, price, description, url="https://www.ticketmaster.co.uk/event/360062289EF011A5"):
+    return {
+        "@type": "Offer",
+        "availability": f"http://schema.org/{availability}",
+        "url": url,
+        "price": price,
+        "priceCurrency": "GBP",
+        "description": description,
+    }
+
+def padding_markup(size_kb, rng):
+    # Listing rows, inline SVG and data attributes similar to the real page body
+    rows = []
+    size = 0
+    idx = 0
+    while size < size_kb * 1024:
+        row = (f'<div class="sc-{rng.randrange(10**6):x} listing-row" data-testid="row-{idx}" data-seat="{idx}">'
+               f'<a href="/seat/{idx}" aria-label="Seat {idx}"><img src="/img/{idx % 50}.png" alt="">'
+               f'<span class="Text__price">&pound;{rng.randrange(40, 400)}.00</span></a>'
+               f'<svg viewBox="0 0 10 10"><path d="M0 0L{idx % 10} 10Z"/></svg></div>\n')
+        rows.append(row)
+        size += len(row)
+        idx += 1
+    return "".join(rows)
+
+def render_event_page(available=False, jsonld="valid", status_spans=1, padding_kb=200, seed=0,
+                      name="Back to the Beginning", status_text=None, offers=None,
+                      asset_base="https://static.tmol.co/app", asset_count=30, extra_body=""):
+    # jsonld: "valid", "list" (array of entries), "malformed" (truncated JSON) or "missing"
+    rng = random.Random(seed)
+    if offers is None:
+        availability = "InStock" if available else "SoldOut"
+        offers = [make_offer(availability, 95.5, "Standing"), make_offer(availability, 145.0, "Seated")]
+    data = music_event_jsonld(name, offers)
+    if jsonld == "list":
+        data = [{"@context": "http://schema.org", "@type": "Organization", "name": "Ticketmaster"}, data]
+    blob = json.dumps(data, indent=2)
+    if jsonld == "malformed":
+        blob = blob[: len(blob) // 2]
+    jsonld_block = "" if jsonld == "missing" else f'<script type="application/ld+json">{blob}</script>'
+    if status_text is None:
+        status_text = f"{rng.randrange(1, 40)} results" if available else "0 No results"
+    spans = "".join(
+        f'<span role="status" class="sc-{rng.randrange(10**6):x}-0 VisuallyHidden-sc-8buqks-0 kPxMbS">{status_text}</span>'
+        for _ in range(status_spans)
+    )
+    head_scripts = "".join(
+        f'<script src="{asset_base}/{i}.js" defer></script>'
+        f'<link rel="stylesheet" href="{asset_base}/{i}.css">'
+        for i in range(asset_count)
+    )
+    inline_state = json.dumps({"app": {"flags": {f"flag{i}": bool(i % 2) for i in range(200)}}})
+    return (
+        "<!DOCTYPE html><html lang=\"en-GB\"><head><meta charset=\"utf-8\">"
+        f"<title>{name} Tickets</title>{head_scripts}{jsonld_block}"
+        f"<script>window.__INITIAL_STATE__ = {inline_state};</script>"
+        "<style>.VisuallyHidden{position:absolute;clip:rect(0 0 0 0)}</style></head>"
+        f"<body><div id=\"root\"><header><nav><a href=\"/\">Home</a></nav></header>"
+        f"<main>{spans}<section class=\"listings\">{padding_markup(padding_kb, rng)}</section></main>"
+        f"<footer><p>&copy; Ticketmaster</p></footer></div>{extra_body}</body></html>"
+    )
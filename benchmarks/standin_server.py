@@ -0,0 +1,253 @@
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from benchmarks.pages import render_event_page
+
+# ---- Ticketmaster stand-in ----
+# Serves synthetic event pages at /event/<id> together with their assets and an ISMDS-style
+# facets endpoint, so the monitor can be load-tested without touching Ticketmaster.
+# Availability is flipped per event through /_control/flip or a timed script, and page
+# latency, slow assets and hung requests (timeouts) can be injected.
+#
+#   GET  /event/<id>                        event page (VisuallyHidden span + MusicEvent JSON-LD),
+#                                           with an ETag; If-None-Match gets a 304
+#   GET  /api/ismds/event/<id>/facets       availability JSON, fetched by the page itself
+#   GET  /assets/<n>.js|css, /img/<n>.png   page assets (delayed by --asset-latency)
+#   GET  /discovery/v2/events.json          Discovery API stand-in listing the events (offsale while
+#                                           sold out), paged by size/page, with an ETag; requests over
+#                                           --discovery-rate per second get a 429
+#   POST /_control/flip?event=<id>&available=1
+#   GET  /_control/state                    availability, flip times and request counts
+
+TINY_PNG = bytes.fromhex(
+    "89504e470d0a1a0a0000000d4948445200000001000000010806000000"
+    "1f15c4890000000d49444154789c6360000002000154a24f5d0000000049454e44ae426082"
+)
+
+
+class StandInState:
+    def __init__(self, event_ids, latency=0.0, asset_latency=0.0, timeout_rate=0.0, hang_seconds=60,
+                 padding_kb=200, asset_count=10, discovery_rate=0):
+        self.available = {event_id: False for event_id in event_ids}
+        self.flipped_at = {}  # event id -> wall-clock time of the last flip
+        self.latency = latency
+        self.asset_latency = asset_latency
+        self.timeout_rate = timeout_rate
+        self.hang_seconds = hang_seconds
+        self.padding_kb = padding_kb
+        self.asset_count = asset_count
+        self.discovery_rate = discovery_rate
+        self._discovery_window = (0, 0)  # (second, requests in it)
+        self.requests = Counter()
+        self.started = time.time()
+        self._pages = {}
+        self._lock = threading.Lock()
+
+    def flip(self, event_id, available=True):
+        with self._lock:
+            self.available[event_id] = available
+            self.flipped_at[event_id] = time.time()
+        print(f"[standin] {event_id} -> {'available' if available else 'sold out'}")
+
+    def page(self, event_id):
+        available = self.available[event_id]
+        key = (event_id, available)
+        if key not in self._pages:
+            fetch_facets = (f"<script>fetch('/api/ismds/event/{event_id}/facets?by=offers')"
+                            ".then(r => r.json()).catch(() => null);</script>")
+            self._pages[key] = render_event_page(
+                available=available, padding_kb=self.padding_kb,
+                name=f"Stand-in Event {event_id}", asset_base="/assets", asset_count=self.asset_count,
+                extra_body=fetch_facets,
+            ).encode()
+        return self._pages[key]
+
+    def facets(self, event_id):
+        available = self.available[event_id]
+        return {
+            "facets": [{"count": 12 if available else 0, "available": available, "offers": ["STANDARD"]}],
+            "_embedded": {"offer": [{"offerId": "STANDARD", "name": "Standing", "listPrice": 95.5, "currency": "GBP"}]},
+        }
+
+    def discovery_allowed(self):
+        if not self.discovery_rate:
+            return True
+        with self._lock:
+            second, count = self._discovery_window
+            now = int(time.time())
+            count = count + 1 if now == second else 1
+            self._discovery_window = (now, count)
+            return count <= self.discovery_rate
+
+    def discovery_page(self, base_url, page, size):
+        event_ids = sorted(self.available)
+        chunk = event_ids[page * size:(page + 1) * size]
+        events = [{
+            "name": f"Stand-in Event {event_id}",
+            "id": event_id,
+            "url": f"{base_url}/event/{event_id}",
+            "dates": {"start": {"localDate": "2099-07-05", "dateTime": "2099-07-05T18:00:00Z"},
+                      "status": {"code": "onsale" if self.available[event_id] else "offsale"}},
+            "sales": {"public": {"startDateTime": "2020-01-01T09:00:00Z"}},
+            "_embedded": {"venues": [{"name": "Stand-in Arena"}]},
+        } for event_id in chunk]
+        return {
+            "_embedded": {"events": events},
+            "page": {"size": size, "totalElements": len(event_ids), "number": page,
+                     "totalPages": (len(event_ids) + size - 1) // size},
+        }
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "uptime": time.time() - self.started,
+                "available": dict(self.available),
+                "flipped_at": dict(self.flipped_at),
+                "requests": dict(self.requests),
+            }
+
+
+def make_handler(state):
+    class StandInHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status, body, content_type, headers=None):
+            self.send_response(status)
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Cache-Control", "no-store" if content_type.startswith(("text/html", "application/json"))
+                             else "max-age=3600")
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            parsed = urlparse(self.path)
+            parts = parsed.path.strip("/").split("/")
+            if parts[0] == "event" and len(parts) == 2 and parts[1] in state.available:
+                state.requests["page"] += 1
+                if state.timeout_rate and random.random() < state.timeout_rate:
+                    state.requests["page_hung"] += 1
+                    time.sleep(state.hang_seconds)
+                    return
+                time.sleep(state.latency)
+                body = state.page(parts[1])
+                etag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+                if self.headers.get("If-None-Match") == etag:
+                    state.requests["page_not_modified"] += 1
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+                self._send(200, body, "text/html; charset=utf-8", {"ETag": etag})
+            elif parsed.path.startswith("/api/ismds/event/") and len(parts) >= 5 and parts[3] in state.available:
+                state.requests["api"] += 1
+                time.sleep(state.latency)
+                self._send(200, json.dumps(state.facets(parts[3])).encode(), "application/json")
+            elif parsed.path == "/discovery/v2/events.json":
+                state.requests["discovery"] += 1
+                if not state.discovery_allowed():
+                    state.requests["discovery_rate_limited"] += 1
+                    self._send(429, b'{"fault": "rate limit"}', "application/json", {"Retry-After": "1"})
+                    return
+                query = parse_qs(parsed.query)
+                page = int(query.get("page", ["0"])[0])
+                size = int(query.get("size", ["20"])[0])
+                base_url = f"http://{self.headers.get('Host')}"
+                body = json.dumps(state.discovery_page(base_url, page, size)).encode()
+                etag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+                if self.headers.get("If-None-Match") == etag:
+                    state.requests["discovery_not_modified"] += 1
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+                self._send(200, body, "application/json", {"ETag": etag})
+            elif parts[0] == "assets":
+                state.requests["asset"] += 1
+                time.sleep(state.asset_latency)
+                content_type = "text/css" if parsed.path.endswith(".css") else "application/javascript"
+                self._send(200, b"/* stand-in asset */\n" * 200, content_type)
+            elif parts[0] == "img":
+                state.requests["image"] += 1
+                self._send(200, TINY_PNG, "image/png")
+            elif parsed.path == "/_control/state":
+                self._send(200, json.dumps(state.snapshot()).encode(), "application/json")
+            else:
+                self._send(404, b"not found", "text/plain")
+
+        def do_POST(self):
+            parsed = urlparse(self.path)
+            query = parse_qs(parsed.query)
+            event_id = query.get("event", [""])[0]
+            if parsed.path == "/_control/flip" and event_id in state.available:
+                state.flip(event_id, query.get("available", ["1"])[0] == "1")
+                self._send(200, b"ok", "text/plain")
+            else:
+                self._send(404, b"not found", "text/plain")
+
+    return StandInHandler
+
+
+def start_server(state, host="127.0.0.1", port=0):
+    # Runs in a background thread; returns the server (server.server_port has the bound port)
+    server = ThreadingHTTPServer((host, port), make_handler(state))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="standin-server", daemon=True).start()
+    return server
+
+
+def run_flip_script(state, path):
+    # Lines of "SECONDS EVENT_ID available|soldout", relative to when the script starts
+    steps = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                seconds, event_id, status = line.split()
+                steps.append((float(seconds), event_id, status == "available"))
+    started = time.time()
+    for seconds, event_id, available in sorted(steps):
+        time.sleep(max(0, started + seconds - time.time()))
+        state.flip(event_id, available)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Ticketmaster stand-in for load testing the monitor")
+    parser.add_argument("--port", type=int, default=8700)
+    parser.add_argument("--events", type=int, default=10, help="number of events (ids EV0000, EV0001, ...)")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to page and API responses")
+    parser.add_argument("--asset-latency", type=float, default=0.0, help="seconds added to script/css assets")
+    parser.add_argument("--timeout-rate", type=float, default=0.0, help="fraction of page requests that hang")
+    parser.add_argument("--padding-kb", type=int, default=200, help="approximate page size")
+    parser.add_argument("--discovery-rate", type=int, default=0,
+                        help="Discovery API requests per second before answering 429 (0 = no limit)")
+    parser.add_argument("--script", help="availability flip script to run")
+    args = parser.parse_args()
+
+    state = StandInState([f"EV{i:04d}" for i in range(args.events)], args.latency, args.asset_latency,
+                         args.timeout_rate, padding_kb=args.padding_kb, discovery_rate=args.discovery_rate)
+    server = start_server(state, port=args.port)
+    print(f"Stand-in serving {args.events} events at http://127.0.0.1:{server.server_port}/event/EV0000")
+    try:
+        if args.script:
+            run_flip_script(state, args.script)
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import time
+
+# ---- Alert State ----
+# Tracks each event's last availability and offers so an alert goes out only when
+# something changes (none -> available, a new offer, a price change), not on every
+# positive check. Changes are held for the digest window and sent at most once per
+# cooldown, so a long restock produces one email instead of hundreds.
+
+def offer_key(offer):
+    return (offer.get("url"), offer.get("description"))
+
+def describe_offer(offer):
+    name = offer.get("description") or offer.get("url") or "offer"
+    return f"{name} at {offer.get('price') or 'N/A'} {offer.get('currency') or ''}".strip()
+
+
+class AlertTracker:
+    def __init__(self, cooldown=60, digest_window=0):
+        self.cooldown = cooldown
+        self.digest_window = digest_window
+        self._state = {}  # event url -> state dict
+
+    def _event_state(self, event_url):
+        if event_url not in self._state:
+            self._state[event_url] = {
+                "seen": False,      # at least one check recorded
+                "found": False,
+                "offers": {},       # offer key -> (price, currency)
+                "pending": [],      # changes not yet alerted
+                "pending_since": None,
+                "last_alert": None,
+            }
+        return self._state[event_url]
+
+    def forget(self, event_url):
+        # The event is no longer monitored
+        self._state.pop(event_url, None)
+
+    def observe(self, event_url, found, offers, now=None):
+        # Record a check result; returns the changes it introduced
+        if now is None:
+            now = time.monotonic()
+        state = self._event_state(event_url)
+        changes = []
+        if found and not state["found"]:
+            changes.append("Tickets now available")
+        elif state["found"] and not found:
+            print(f"Tickets no longer available for {event_url}.")
+        current = {}
+        for offer in offers or []:
+            key = offer_key(offer)
+            price = (offer.get("price"), offer.get("currency"))
+            current[key] = price
+            if not found or not state["seen"]:
+                continue
+            if key not in state["offers"]:
+                changes.append(f"New offer: {describe_offer(offer)}")
+            elif state["offers"][key] != price:
+                old_price, old_currency = state["offers"][key]
+                changes.append(f"Price change for {offer.get('description') or offer.get('url') or 'offer'}: "
+                               f"{old_price or 'N/A'} {old_currency or ''} -> {describe_offer(offer)}")
+        state["seen"] = True
+        state["found"] = found
+        state["offers"] = current
+        if changes:
+            if not state["pending"]:
+                state["pending_since"] = now
+            state["pending"].extend(changes)
+        return changes
+
+    def take_due(self, event_url, now=None):
+        # Returns the pending changes if the digest window and cooldown have both passed, else None
+        if now is None:
+            now = time.monotonic()
+        state = self._event_state(event_url)
+        if not state["pending"]:
+            return None
+        if now - state["pending_since"] < self.digest_window:
+            return None
+        if state["last_alert"] is not None and now - state["last_alert"] < self.cooldown:
+            return None
+        changes = state["pending"]
+        state["pending"] = []
+        state["pending_since"] = None
+        state["last_alert"] = now
+        return changes
@@ -0,0 +1,116 @@
+import asyncio
+from urllib.parse import urlparse
+
+# ---- Request Filtering ----
+# Aborts requests that can't affect the Layer 1/Layer 2 checks (images, fonts, media,
+# analytics and ad scripts) so reloads transfer less and networkidle2 fires sooner.
+# Blocked requests never transfer, so their size is a per-type estimate.
+
+DEFAULT_BLOCK_TYPES = "image,media,font"
+DEFAULT_BLOCK_DOMAINS = ",".join([
+    "google-analytics.com",
+    "googletagmanager.com",
+    "doubleclick.net",
+    "googlesyndication.com",
+    "googleadservices.com",
+    "facebook.net",
+    "facebook.com",
+    "hotjar.com",
+    "newrelic.com",
+    "nr-data.net",
+    "optimizely.com",
+    "quantserve.com",
+    "scorecardresearch.com",
+    "criteo.com",
+    "adnxs.com",
+    "bing.com",
+    "tiktok.com",
+    "pinterest.com",
+    "snapchat.com",
+    "twitter.com",
+    "demdex.net",
+    "omtrdc.net",
+])
+
+# Rough transfer sizes of blocked requests
+ESTIMATED_BYTES = {
+    "image": 30 * 1024,
+    "media": 250 * 1024,
+    "font": 40 * 1024,
+    "script": 40 * 1024,
+    "stylesheet": 20 * 1024,
+}
+DEFAULT_ESTIMATE = 5 * 1024
+
+def parse_list(value):
+    return [item.strip().lower() for item in (value or "").split(",") if item.strip()]
+
+def domain_matches(host, domains):
+    return any(host == domain or host.endswith("." + domain) for domain in domains)
+
+class ResourceFilter:
+    def __init__(self, block_types, block_domains, allow_domains):
+        self.block_types = set(parse_list(block_types))
+        self.block_domains = parse_list(block_domains)
+        self.allow_domains = parse_list(allow_domains)
+        self._stats = {}  # page -> counters since the last take_stats()
+
+    def decide(self, url, resource_type, is_navigation=False):
+        # Returns the reason to block, or None to let the request through
+        if is_navigation or url.startswith("data:"):
+            return None
+        host = (urlparse(url).hostname or "").lower()
+        if domain_matches(host, self.allow_domains):
+            return None
+        if domain_matches(host, self.block_domains):
+            return "domain"
+        if resource_type in self.block_types:
+            return resource_type
+        return None
+
+    async def attach(self, page):
+        # Interception turns the HTTP cache off; it stays off, since requests served from the
+        # cache would skip the request event (and the stats) and pyppeteer never forgets them
+        await page.setRequestInterception(True)
+        self._stats[page] = self._new_stats()
+        page.on('request', lambda request: asyncio.ensure_future(self._on_request(page, request)))
+        # Recycled and replaced pages would otherwise keep their counters forever
+        page.on('close', lambda: self._stats.pop(page, None))
+
+    def _new_stats(self):
+        return {"blocked": 0, "allowed": 0, "bytes_saved_estimate": 0, "by_reason": {}}
+
+    async def _on_request(self, page, request):
+        stats = self._stats.get(page) or self._new_stats()  # counted nowhere once the page has closed
+        try:
+            reason = self.decide(request.url, request.resourceType, request.isNavigationRequest())
+        except Exception as e:
+            # An intercepted request has to be answered, or the page waits on it forever
+            print("Request filter error:", e)
+            reason = None
+        try:
+            if reason is None:
+                stats["allowed"] += 1
+                await request.continue_()
+                return
+            stats["blocked"] += 1
+            stats["by_reason"][reason] = stats["by_reason"].get(reason, 0) + 1
+            stats["bytes_saved_estimate"] += ESTIMATED_BYTES.get(request.resourceType, DEFAULT_ESTIMATE)
+            await request.abort()
+        except Exception as e:
+            # The request may already be handled if the page navigated away
+            print("Request filter error:", e)
+
+    def take_stats(self, page):
+        # Counters for the requests made since the previous call, then reset
+        stats = self._stats.get(page) or self._new_stats()
+        if page in self._stats:  # not once the page has closed
+            self._stats[page] = self._new_stats()
+        return stats
+
+def describe_stats(stats):
+    reasons = ", ".join(f"{reason}: {count}" for reason, count in sorted(stats["by_reason"].items()))
+    summary = f"blocked {stats['blocked']} of {stats['blocked'] + stats['allowed']} requests"
+    if reasons:
+        summary += f" ({reasons})"
+    return summary + f", ~{stats['bytes_saved_estimate'] / 1024:.0f} KB saved (est.)"
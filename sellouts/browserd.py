@@ -0,0 +1,109 @@
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+from urllib.request import urlopen
+from sellouts import monitor
+
+# ---- Browser Host ----
+# Keeps one Chromium running with its DevTools endpoint open, independently of the monitor.
+# With BROWSER_ENDPOINT set, the monitor attaches to it instead of launching its own, so a
+# restart of the monitor (deploy, config change) keeps the tabs, cookies and HTTP cache and
+# skips the cold launch. Chromium is relaunched here if it exits or is closed, e.g. by the
+# monitor's supervisor after it stopped answering.
+#
+#   python -m sellouts.browserd --port 9222
+#   BROWSER_ENDPOINT=http://127.0.0.1:9222 python -m sellouts.monitor
+
+def read_endpoint(url, timeout=2):
+    # The ws:// endpoint from Chromium's /json/version, or None while it isn't answering
+    try:
+        with urlopen(url.rstrip("/") + "/json/version", timeout=timeout) as response:
+            return json.loads(response.read().decode())["webSocketDebuggerUrl"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+def chrome_command(port, profile_dir, headless):
+    # Same flags as monitor.launch_browser, which gets pyppeteer's defaults from launch()
+    from pyppeteer.chromium_downloader import check_chromium, chromium_executable, download_chromium
+    from pyppeteer.launcher import DEFAULT_ARGS
+    executable = monitor.get_chrome_path()
+    if executable is None:
+        if not check_chromium():
+            download_chromium()
+        executable = str(chromium_executable())
+    command = [executable, f"--remote-debugging-port={port}", "--remote-debugging-address=127.0.0.1",
+               f"--user-data-dir={profile_dir}"]
+    command += [arg for arg in DEFAULT_ARGS if arg != "--enable-automation"] + monitor.CHROME_ARGS
+    if headless:
+        command += ["--headless", "--hide-scrollbars", "--mute-audio"]
+    return command + ["about:blank"]
+
+def wait_ready(url, process, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline and process.poll() is None:
+        endpoint = read_endpoint(url)
+        if endpoint:
+            return endpoint
+        time.sleep(0.2)
+    return None
+
+def stop_process(process, timeout=10):
+    if process.poll() is not None:
+        return
+    process.terminate()
+    try:
+        process.wait(timeout)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+def run(command, url):
+    stopping = []
+
+    def handle_signal(signum, frame):
+        print(f"\nReceived signal {signum}. Stopping the browser...")
+        stopping.append(signum)
+
+    signal.signal(signal.SIGINT, handle_signal)
+    if hasattr(signal, 'SIGTERM'):
+        signal.signal(signal.SIGTERM, handle_signal)
+
+    backoff = 1
+    while not stopping:
+        started = time.monotonic()
+        process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        endpoint = wait_ready(url, process)
+        if endpoint:
+            print(f"Browser ready at {url} ({endpoint}).")
+        else:
+            print(f"Browser did not open its DevTools endpoint at {url}.")
+        while process.poll() is None and not stopping:
+            time.sleep(0.5)
+        stop_process(process)
+        if stopping:
+            break
+        # Back off if Chromium keeps dying straight away
+        backoff = 1 if time.monotonic() - started > 60 else min(backoff * 2, 30)
+        print(f"Browser exited with code {process.returncode}; relaunching in {backoff}s.")
+        time.sleep(backoff)
+
+def main():
+    parser = argparse.ArgumentParser(description="Keep a Chromium running for the monitor to attach to")
+    parser.add_argument("--port", type=int, default=9222, help="DevTools port (BROWSER_ENDPOINT=http://127.0.0.1:PORT)")
+    parser.add_argument("--profile", default=monitor.user_data_dir, help="Chromium profile directory")
+    args = parser.parse_args()
+    monitor.configure(check_email=False)
+
+    url = f"http://127.0.0.1:{args.port}"
+    if read_endpoint(url):
+        print(f"Something is already listening on {url}.")
+        return 1
+    os.makedirs(args.profile, exist_ok=True)
+    run(chrome_command(args.port, args.profile, monitor.HEADLESS), url)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
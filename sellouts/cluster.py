@@ -0,0 +1,399 @@
+import argparse
+import asyncio
+import json
+import os
+import signal
+import socket
+import time
+from sellouts import monitor
+from sellouts.alerts import AlertTracker
+from sellouts.logwriter import close_log_writers, log_record
+from sellouts.metrics import metrics, monitor_loop_lag, start_metrics_server
+
+# ---- Cluster Mode ----
+# Spreads events over worker processes on one or more hosts. The coordinator owns the event
+# list and hands each worker a share proportional to its capacity over a JSON-lines TCP
+# connection. When a worker dies its events move to the others. Every check result comes
+# back to the coordinator, so alerts and the results log stay in one place. Each worker has
+# its own browser, page pool and event loop, so checking and parsing scale across cores.
+#
+#   python -m sellouts.cluster coordinator --listen 0.0.0.0:8750
+#   python -m sellouts.cluster worker --coordinator coordinator-host:8750 --name box1-a --capacity 3
+
+HEARTBEAT_INTERVAL = 5
+HEARTBEAT_TIMEOUT = 20
+
+def parse_address(value):
+    host, _, port = value.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+async def send_message(writer, message):
+    writer.write(json.dumps(message).encode() + b"\n")
+    await writer.drain()
+
+def install_signal_handlers(shutdown_event):
+    def handle_signal(signum, frame):
+        print(f"\nReceived signal {signum}. Initiating shutdown...")
+        shutdown_event.set()
+
+    signal.signal(signal.SIGINT, handle_signal)
+    if hasattr(signal, 'SIGTERM'):
+        signal.signal(signal.SIGTERM, handle_signal)
+
+def balance(event_urls, capacities, assignments):
+    # Returns {url: worker}, spreading event_urls over the workers in proportion to their
+    # capacity and keeping as many of the current assignments ({url: worker}) as possible
+    if not capacities:
+        return {}
+    total = sum(capacities.values())
+    quotas = {worker: len(event_urls) * capacity // total for worker, capacity in capacities.items()}
+    leftover = len(event_urls) - sum(quotas.values())
+    by_remainder = sorted(capacities, key=lambda worker: (-(len(event_urls) * capacities[worker] % total), worker))
+    for worker in by_remainder[:leftover]:
+        quotas[worker] += 1
+    result = {}
+    load = {worker: 0 for worker in sorted(capacities)}
+    moving = []
+    for url in event_urls:
+        worker = assignments.get(url)
+        if worker in load and load[worker] < quotas[worker]:
+            result[url] = worker
+            load[worker] += 1
+        else:
+            moving.append(url)
+    for url in moving:
+        worker = max(load, key=lambda name: quotas[name] - load[name])
+        result[url] = worker
+        load[worker] += 1
+    return result
+
+# ---- Coordinator ----
+class Coordinator:
+    def __init__(self, events, log_file):
+        self.events = {event.url: event for event in events}
+        self.discovered = set()  # urls added by the feeder, kept when the config's event list changes
+        self.configured = set(self.events)  # urls from CONFIG_FILE, EVENTS_FILE or TICKET_URL
+        self.workers = {}  # name -> {"writer", "capacity", "last_seen", "events"}
+        self.assignments = {}  # event url -> worker name
+        self.alert_tracker = AlertTracker(monitor.ALERT_COOLDOWN, monitor.ALERT_DIGEST_WINDOW)
+        self.log_file = log_file
+        self._lock = asyncio.Lock()
+
+    async def handle_worker(self, reader, writer):
+        name = None
+        try:
+            hello = json.loads(await asyncio.wait_for(reader.readline(), timeout=HEARTBEAT_TIMEOUT))
+            if hello.get("type") != "hello":
+                return
+            name = hello["worker"]
+            if name in self.workers:
+                # A restarted worker reconnecting under the same name replaces the old connection
+                self.workers[name]["writer"].close()
+            self.workers[name] = {"writer": writer, "capacity": max(1, int(hello.get("capacity", 1))),
+                                  "last_seen": time.monotonic(), "events": None}
+            print(f"Worker {name} joined (capacity {self.workers[name]['capacity']}).")
+            await self.rebalance()
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                worker = self.workers.get(name)
+                if worker is None or worker["writer"] is not writer:
+                    break
+                worker["last_seen"] = time.monotonic()
+                message = json.loads(line)
+                if message.get("type") == "result":
+                    await self.on_result(name, message)
+        except (OSError, ValueError, KeyError, asyncio.TimeoutError) as e:
+            print(f"Worker {name or 'connection'} error:", e)
+        finally:
+            writer.close()
+            if name and self.workers.get(name, {}).get("writer") is writer:
+                del self.workers[name]
+                print(f"Worker {name} left; moving its events.")
+                await self.rebalance()
+
+    async def rebalance(self):
+        async with self._lock:
+            capacities = {name: worker["capacity"] for name, worker in self.workers.items()}
+            self.assignments = balance(list(self.events), capacities, self.assignments)
+            metrics.set("sellouts_cluster_workers", len(self.workers))
+            for name, worker in list(self.workers.items()):
+                specs = sorted(self.events[url].spec for url, owner in self.assignments.items() if owner == name)
+                if specs == worker["events"]:
+                    continue
+                worker["events"] = specs
+                try:
+                    await send_message(worker["writer"], {"type": "assign", "events": specs})
+                except OSError:
+                    pass  # its reader sees the broken connection and removes it
+            counts = ", ".join(f"{name}: {len(worker['events'] or [])}" for name, worker in sorted(self.workers.items()))
+            print(f"Assignments: {counts or 'no workers'}")
+            log_record(self.log_file, {"type": "assignments", "workers": {
+                name: worker["events"] for name, worker in self.workers.items()}})
+
+    async def on_result(self, worker, message):
+        url = message.get("event")
+        outcome = message.get("outcome")
+        metrics.inc("sellouts_cluster_results_total", worker=worker, outcome=outcome)
+        log_record(self.log_file, {"type": "result", "worker": worker, "event": url, "outcome": outcome,
+                                   "found": message.get("found"), "tier": message.get("tier"),
+                                   "decided_by": message.get("decided_by"),
+                                   "layer_results": message.get("layer_results"), "offers": message.get("offers"),
+                                   "timings": message.get("timings")})
+        if outcome == "ok":
+            # Stage and per-layer costs, as the single-process monitor records them
+            for stage, seconds in (message.get("timings") or {}).items():
+                metrics.observe("sellouts_stage_seconds", seconds, stage=stage)
+            if not message.get("unchanged"):
+                monitor.record_layer_metrics(message)
+        if outcome == "ok" and monitor.history_store:
+            monitor.history_store.record_check(url, message, message.get("timings"), bool(message.get("unchanged")))
+        if outcome == "ok" and url in self.events:
+            await monitor.handle_alerts(self.alert_tracker, url, message, self.log_file)
+
+    async def add_events(self, urls):
+        # Called by the discovery feeder; new events are spread over the workers
+        self.discovered.update(urls)
+        for event in monitor.discovered_events(urls):
+            self.events.setdefault(event.url, event)
+        print(f"Coordinating {len(self.events)} event(s).")
+        await self.rebalance()
+
+    async def drop_events(self, urls):
+        # Called by the discovery feeder for events that started or are no longer sold out
+        for url in urls:
+            self.discovered.discard(url)
+            if url not in self.configured and self.events.pop(url, None):
+                self.alert_tracker.forget(url)
+        print(f"Coordinating {len(self.events)} event(s).")
+        await self.rebalance()
+
+    async def apply_config(self, changed, events):
+        # CONFIG_FILE changed: new events are assigned, removed ones taken back from their workers,
+        # and changed options reach the workers as changed specs
+        monitor.apply_live_settings(changed, [], None, self.alert_tracker)
+        configured = {event.url: event for event in events}
+        self.configured = set(configured)
+        self.events = {url: event for url, event in self.events.items() if url in configured or url in self.discovered}
+        self.events.update(configured)
+        print(f"Coordinating {len(self.events)} event(s).")
+        await self.rebalance()
+
+    async def reap(self, shutdown_event):
+        # Drops workers that stopped sending heartbeats; their handler then rebalances
+        while not shutdown_event.is_set():
+            try:
+                await asyncio.wait_for(shutdown_event.wait(), timeout=HEARTBEAT_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            now = time.monotonic()
+            for name, worker in list(self.workers.items()):
+                if now - worker["last_seen"] > HEARTBEAT_TIMEOUT:
+                    print(f"Worker {name} missed its heartbeats.")
+                    worker["writer"].close()
+
+async def run_coordinator(listen):
+    shutdown_event = asyncio.Event()
+    install_signal_handlers(shutdown_event)
+    server = None
+    metrics_server = None
+    coordinator = None
+    feeder = None
+    discovering = None
+    watching = None
+    try:
+        monitor.start_notifier()
+        monitor.start_history_store()
+        events = monitor.get_events()
+        feeder = monitor.start_discovery()
+        if not events and not feeder and not monitor.CONFIG_FILE:
+            raise ValueError(f"No event URLs found in {monitor.EVENTS_FILE}")
+        coordinator = Coordinator(events, monitor.LOG_FILE)
+        host, port = parse_address(listen)
+        server = await asyncio.start_server(coordinator.handle_worker, host, port)
+        print(f"Coordinator for {len(events)} event(s) listening on {host}:{port}.")
+        if monitor.METRICS_PORT:
+            metrics_server = await start_metrics_server(monitor.METRICS_HOST, monitor.METRICS_PORT)
+        if feeder:
+            discovering = asyncio.ensure_future(feeder.run(coordinator.add_events, shutdown_event,
+                                                           monitor.DISCOVERY_INTERVAL, coordinator.drop_events))
+        if monitor.CONFIG_FILE:
+            watching = asyncio.ensure_future(monitor.watch_config(shutdown_event, coordinator.apply_config))
+        await coordinator.reap(shutdown_event)
+    except Exception as e:
+        print("Fatal error in coordinator:", e)
+        import traceback
+        traceback.print_exc()
+    finally:
+        if server:
+            server.close()
+        if coordinator:
+            for worker in coordinator.workers.values():
+                worker["writer"].close()
+        if metrics_server:
+            metrics_server.close()
+        if discovering:
+            discovering.cancel()
+        if watching:
+            watching.cancel()
+        if feeder:
+            await feeder.close()
+        await monitor.close_notifier()
+        monitor.close_history_store()
+        close_log_writers()
+
+# ---- Worker ----
+class Worker:
+    def __init__(self, name, capacity, pool, scheduler, log_file):
+        self.name = name
+        self.capacity = capacity
+        self.pool = pool
+        self.scheduler = scheduler
+        self.log_file = log_file
+        self.tasks = {}  # event url -> check_event_loop task
+        self.events = {}  # event url -> MonitoredEvent
+        self.outbox = asyncio.Queue(maxsize=1000)
+
+    def apply(self, specs, shutdown_event):
+        events = {}
+        for spec in specs:
+            event = monitor.parse_event_line(spec)
+            events[event.url] = event
+        for url in list(self.tasks):
+            if url not in events:
+                self.tasks.pop(url).cancel()
+                self.events.pop(url)
+                self.scheduler.forget(url)
+                print(f"Stopped checking {url}.")
+        for url, event in events.items():
+            if url in self.events and self.events[url].spec != event.spec:
+                monitor.update_event(self.events[url], event)
+            if url not in self.tasks:
+                print(f"Started checking {url}.")
+                self.events[url] = event
+                self.tasks[url] = asyncio.ensure_future(monitor.check_event_loop(
+                    event, self.pool, shutdown_event, self.scheduler, None, self.log_file, True, self.report))
+
+    def report(self, event, outcome, result):
+        message = {"type": "result", "event": event.url, "outcome": outcome, "check_count": event.check_count}
+        if result is not None:
+            message.update(found=result["found"], offers=result["offers"], details=result["details"],
+                           tier=result.get("tier", "browser"), layers=result.get("layers"),
+                           decided_by=result.get("decided_by"), skipped=result.get("skipped", []),
+                           layer_results=result.get("layer_results", []), timings=result.get("timings", {}),
+                           unchanged=result.get("unchanged", False))
+        try:
+            self.outbox.put_nowait(message)
+        except asyncio.QueueFull:
+            pass  # coordinator unreachable for a while; old results aren't worth keeping
+
+    async def apply_config(self, changed, events):
+        # Intervals, timeouts and selectors; the event list comes from the coordinator
+        monitor.apply_live_settings(changed, self.events.values(), self.scheduler)
+
+    async def _send_loop(self, writer):
+        try:
+            while True:
+                try:
+                    message = await asyncio.wait_for(self.outbox.get(), timeout=HEARTBEAT_INTERVAL)
+                except asyncio.TimeoutError:
+                    message = {"type": "heartbeat"}
+                await send_message(writer, message)
+        except OSError:
+            writer.close()
+
+    async def serve(self, address, shutdown_event):
+        # Keeps a connection to the coordinator, reconnecting with backoff. Assigned events keep
+        # being checked while disconnected; the coordinator reassigns them on reconnect.
+        delay = 1
+        while not shutdown_event.is_set():
+            try:
+                reader, writer = await asyncio.open_connection(*address)
+            except OSError as e:
+                print(f"Coordinator {address[0]}:{address[1]} unreachable ({e}); retrying in {delay}s.")
+                try:
+                    await asyncio.wait_for(shutdown_event.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                delay = min(delay * 2, 30)
+                continue
+            delay = 1
+            sender = None
+            try:
+                await send_message(writer, {"type": "hello", "worker": self.name, "capacity": self.capacity})
+                sender = asyncio.ensure_future(self._send_loop(writer))
+                while True:
+                    line = await reader.readline()
+                    if not line:
+                        break
+                    message = json.loads(line)
+                    if message.get("type") == "assign":
+                        self.apply(message["events"], shutdown_event)
+            except (OSError, ValueError) as e:
+                print("Coordinator connection error:", e)
+            finally:
+                if sender:
+                    sender.cancel()
+                writer.close()
+            print("Lost connection to the coordinator; reconnecting.")
+
+async def run_worker(address, name, capacity, profile_dir, log_file):
+    shutdown_event = asyncio.Event()
+    install_signal_handlers(shutdown_event)
+    pool = None
+    supervisor = None
+    worker = None
+    tasks = []
+    try:
+        monitor.start_http_fetcher(capacity)
+        await monitor.start_parse_executor()
+        pool, supervisor = await monitor.start_pool(capacity, [profile_dir, profile_dir + "_standby"], log_file)
+        worker = Worker(name, capacity, pool, monitor.create_scheduler(), log_file)
+        tasks = [asyncio.ensure_future(worker.serve(address, shutdown_event)),
+                 asyncio.ensure_future(supervisor.run(shutdown_event)),
+                 asyncio.ensure_future(monitor_loop_lag(monitor.LOOP_LAG_INTERVAL, shutdown_event))]
+        if monitor.CONFIG_FILE:
+            tasks.append(asyncio.ensure_future(monitor.watch_config(shutdown_event, worker.apply_config)))
+        print(f"Worker {name} started with {capacity} page(s).")
+        await shutdown_event.wait()
+    except Exception as e:
+        print("Fatal error in worker:", e)
+        import traceback
+        traceback.print_exc()
+    finally:
+        for task in tasks + (list(worker.tasks.values()) if worker else []):
+            task.cancel()
+        if supervisor:
+            await supervisor.close()
+        if pool:
+            await monitor.shutdown(pool.browser)
+        if monitor.http_fetcher:
+            await monitor.http_fetcher.close()
+        monitor.close_parse_executor()
+        close_log_writers()
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the monitor as a cluster coordinator or worker")
+    roles = parser.add_subparsers(dest="role", required=True)
+    coordinator = roles.add_parser("coordinator", help="own the event list (EVENTS_FILE) and send alerts")
+    coordinator.add_argument("--listen", default=os.getenv("CLUSTER_LISTEN", "127.0.0.1:8750"))
+    worker = roles.add_parser("worker", help="check the events the coordinator assigns")
+    worker.add_argument("--coordinator", default=os.getenv("CLUSTER_COORDINATOR", "127.0.0.1:8750"))
+    worker.add_argument("--name", default=f"{socket.gethostname()}-{os.getpid()}",
+                        help="stable name; also picks the browser profile (user_data_<name>)")
+    worker.add_argument("--capacity", type=int, help="browser pages (default PAGE_POOL_SIZE)")
+    worker.add_argument("--log-file", help="default sellouts_log_<name>.jsonl")
+    args = parser.parse_args()
+    # Workers never send mail, so only the coordinator needs the email settings
+    monitor.configure(check_email=args.role == "coordinator")
+
+    if args.role == "coordinator":
+        asyncio.run(run_coordinator(args.listen))
+    else:
+        profile_dir = os.path.join(os.getcwd(), f"user_data_{args.name}")
+        log_file = args.log_file or f"sellouts_log_{args.name}.jsonl"
+        asyncio.run(run_worker(parse_address(args.coordinator), args.name, max(1, args.capacity or monitor.PAGE_POOL_SIZE), profile_dir, log_file))
+
+if __name__ == "__main__":
+    main()
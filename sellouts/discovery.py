@@ -0,0 +1,286 @@
+import argparse
+import asyncio
+import os
+import re
+import sys
+import time
+from datetime import datetime, timezone
+from sellouts.httpfetch import httpx
+from sellouts.metrics import metrics
+
+# ---- Event Discovery ----
+# Finds sold-out events through the Ticketmaster Discovery API and feeds them to the
+# monitor (port of deprecated/ticket_api.py). Result pages are fetched concurrently on a
+# pooled client, spaced to stay under the API's rate limit, and cached per page: a page is
+# not requested again until its TTL runs out, and then only with its ETag, so a refresh
+# mostly costs 304s. Each refresh only reports events it hasn't reported before, and
+# expires the ones that have started or are no longer listed as sold out, which frees
+# their places under max_events.
+#
+#   python -m sellouts.discovery --output events.txt
+
+DISCOVERY_URL = "https://app.ticketmaster.com/discovery/v2/events.json"
+# Statuses that could mean sold out
+UNAVAILABLE_STATUSES = {"offsale", "soldout", "canceled", "postponed", "rescheduled"}
+# The API refuses to page past the 1000th result (size * page < 1000)
+MAX_DEEP_RESULTS = 1000
+MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+
+def parse_time(value):
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+
+def event_start(event):
+    return parse_time(event.get("dates", {}).get("start", {}).get("dateTime"))
+
+def select_event(event, url_contains="ticketmaster", now=None):
+    # Returns the event's URL when it looks sold out and is worth monitoring, else None
+    now = now or datetime.now(timezone.utc)
+    status = event.get("dates", {}).get("status", {}).get("code")
+    if status is None or status.lower() not in UNAVAILABLE_STATUSES:
+        return None
+    url = event.get("url")
+    # Skip if not sold on ticketmaster
+    if not url or url_contains not in url:
+        return None
+    # Skip if public sale hasn't started yet
+    sales_start = parse_time(event.get("sales", {}).get("public", {}).get("startDateTime"))
+    if sales_start and sales_start > now:
+        return None
+    # The request asks for events from the start of the day, so drop the ones already over
+    start = event_start(event)
+    if start and start < now:
+        return None
+    return url
+
+class RateLimiter:
+    # Spaces request starts `1 / rate` seconds apart and holds every request back while the
+    # API says the quota is spent
+    def __init__(self, rate):
+        self.interval = 1 / rate if rate > 0 else 0
+        self.next_slot = 0
+        self.blocked_until = 0
+
+    def block(self, seconds):
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+    async def wait(self):
+        while True:
+            now = time.monotonic()
+            if self.blocked_until > now:
+                await asyncio.sleep(self.blocked_until - now)
+                continue
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+            if slot > now:
+                await asyncio.sleep(slot - now)
+            if self.blocked_until <= time.monotonic():
+                return
+
+class DiscoveryFeeder:
+    def __init__(self, api_key, base_url=DISCOVERY_URL, country_code="GB", classification="music", pages=10,
+                 size=100, ttl=600, rate=4, max_connections=4, timeout=15, retries=3, url_contains="ticketmaster",
+                 max_events=200):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.country_code = country_code
+        self.classification = classification
+        self.pages = pages
+        self.size = size
+        self.ttl = ttl
+        self.retries = retries
+        self.url_contains = url_contains
+        self.max_events = max_events
+        self.limiter = RateLimiter(rate)
+        self.client = httpx.AsyncClient(
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            headers={"Accept": "application/json"},
+        )
+        self.cache = {}  # page number -> {"start", "etag", "expires", "events", "total_pages"}
+        self.reported = {}  # event URL handed to the monitor -> its start time (or None)
+
+    def params(self, number, start):
+        params = {
+            "countryCode": self.country_code,
+            "classificationName": self.classification,
+            # Midnight rather than now, so the request (and its ETag) stays the same all day
+            "startDateTime": start,
+            "sort": "date,asc",
+            "size": self.size,
+            "page": number,
+        }
+        if self.api_key:
+            params["apikey"] = self.api_key
+        return params
+
+    def expiry(self, response):
+        match = MAX_AGE_RE.search(response.headers.get("cache-control", ""))
+        ttl = int(match.group(1)) if match else self.ttl
+        return time.monotonic() + max(ttl, self.ttl)
+
+    def note_quota(self, response):
+        # Discovery API answers carry the remaining quota and when it resets (epoch ms)
+        if response.headers.get("rate-limit-available") == "0":
+            try:
+                reset = int(response.headers.get("rate-limit-reset", "0")) / 1000
+            except ValueError:
+                reset = 0
+            wait = max(60, reset - time.time())
+            print(f"Discovery API quota used up; pausing for {wait:.0f}s.")
+            self.limiter.block(wait)
+
+    def retry_after(self, response, attempt):
+        try:
+            return float(response.headers.get("retry-after", ""))
+        except ValueError:
+            return 2 ** attempt
+
+    async def fetch_page(self, number, start):
+        entry = self.cache.get(number)
+        if entry and entry["start"] != start:
+            entry = None
+        if entry and entry["expires"] > time.monotonic():
+            metrics.inc("sellouts_discovery_requests_total", result="cached")
+            return entry
+        headers = {"If-None-Match": entry["etag"]} if entry and entry["etag"] else None
+        for attempt in range(self.retries + 1):
+            await self.limiter.wait()
+            try:
+                response = await self.client.get(self.base_url, params=self.params(number, start), headers=headers)
+            except httpx.HTTPError as e:
+                metrics.inc("sellouts_discovery_requests_total", result="error")
+                print(f"Discovery page {number} failed: {e!r}")
+                await asyncio.sleep(2 ** attempt)
+                continue
+            self.note_quota(response)
+            if response.status_code == 304 and entry:
+                metrics.inc("sellouts_discovery_requests_total", result="not_modified")
+                entry["expires"] = self.expiry(response)
+                return entry
+            if response.status_code == 429 or response.status_code >= 500:
+                metrics.inc("sellouts_discovery_requests_total", result=str(response.status_code))
+                self.limiter.block(self.retry_after(response, attempt))
+                continue
+            if response.status_code != 200:
+                metrics.inc("sellouts_discovery_requests_total", result=str(response.status_code))
+                print(f"Discovery page {number} error: {response.status_code}: {response.text[:200]}")
+                return None
+            metrics.inc("sellouts_discovery_requests_total", result="ok")
+            data = response.json()
+            entry = {
+                "start": start,
+                "etag": response.headers.get("etag"),
+                "expires": self.expiry(response),
+                "events": data.get("_embedded", {}).get("events", []),
+                "total_pages": data.get("page", {}).get("totalPages", 0),
+            }
+            self.cache[number] = entry
+            return entry
+        print(f"Giving up on discovery page {number} after {self.retries + 1} attempts.")
+        return None
+
+    async def refresh(self):
+        # One pass over the result pages; returns (URLs of sold-out events not reported before,
+        # reported URLs that have expired)
+        start = datetime.now(timezone.utc).strftime("%Y-%m-%dT00:00:00Z")
+        first = await self.fetch_page(0, start)
+        if first is None:
+            return [], []
+        total = min(first["total_pages"], self.pages, max(1, MAX_DEEP_RESULTS // self.size))
+        rest = await asyncio.gather(*(self.fetch_page(number, start) for number in range(1, total)))
+        now = datetime.now(timezone.utc)
+        entries = [first] + list(rest)
+        selected = {}
+        for entry in entries:
+            for event in entry["events"] if entry else []:
+                url = select_event(event, self.url_contains, now)
+                if url:
+                    selected.setdefault(url, event_start(event))
+        # Started events are always dropped; unlisted ones only when every page came back,
+        # since a failed page may still hold them
+        expired = [url for url, event_time in self.reported.items()
+                   if (event_time and event_time < now) or (all(entries) and url not in selected)]
+        for url in expired:
+            del self.reported[url]
+        urls = []
+        for url, event_time in selected.items():
+            if self.max_events and len(self.reported) >= self.max_events:
+                break
+            if url not in self.reported:
+                self.reported[url] = event_time
+                urls.append(url)
+        return urls, expired
+
+    async def run(self, on_events, shutdown_event, interval, on_expired=None):
+        # Refreshes every `interval` seconds, awaiting on_expired(urls) with the events to stop
+        # monitoring, then on_events(urls) with the new ones
+        while not shutdown_event.is_set():
+            try:
+                urls, expired = await self.refresh()
+                if expired:
+                    print(f"Dropped {len(expired)} discovered event(s) that started or are no longer sold out.")
+                    metrics.inc("sellouts_expired_events_total", len(expired))
+                    if on_expired:
+                        await on_expired(expired)
+                if urls:
+                    print(f"Discovered {len(urls)} new sold-out event(s).")
+                    metrics.inc("sellouts_discovered_events_total", len(urls))
+                    await on_events(urls)
+            except Exception as e:
+                print("Discovery error:", e)
+            try:
+                await asyncio.wait_for(shutdown_event.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def close(self):
+        await self.client.aclose()
+
+def read_event_urls(path):
+    if not os.path.exists(path):
+        return set()
+    with open(path) as f:
+        return {line.split()[0] for line in f if line.strip() and not line.startswith("#")}
+
+async def discover(args):
+    feeder = DiscoveryFeeder(os.getenv("TM_API_KEY"), args.url, args.country, args.classification, args.pages,
+                             args.size, url_contains=args.url_contains, max_events=0)
+    try:
+        urls, _ = await feeder.refresh()
+    finally:
+        await feeder.close()
+    if not args.output:
+        for url in urls:
+            print(url)
+        return
+    known = read_event_urls(args.output)
+    new = [url for url in urls if url not in known]
+    with open(args.output, "a") as f:
+        for url in new:
+            f.write(f"{url} {args.options}".strip() + "\n")
+    print(f"Added {len(new)} of {len(urls)} sold-out event(s) to {args.output}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Find sold-out events through the Ticketmaster Discovery API")
+    parser.add_argument("--url", default=os.getenv("DISCOVERY_URL", DISCOVERY_URL))
+    parser.add_argument("--country", default="GB")
+    parser.add_argument("--classification", default="music")
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--size", type=int, default=100)
+    parser.add_argument("--url-contains", default="ticketmaster", help="only keep event URLs containing this")
+    parser.add_argument("--output", help="events file to append new URLs to (default: print them)")
+    parser.add_argument("--options", default="", help="event options written after each URL, e.g. max_interval=120")
+    args = parser.parse_args()
+    if httpx is None:
+        print("Discovery needs httpx (pip install httpx).")
+        return 1
+    asyncio.run(discover(args))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
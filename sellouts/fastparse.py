@@ -0,0 +1,146 @@
+from html.parser import HTMLParser
+
+# Streaming extractor for the two things check_ticket_availability actually reads:
+# the role="status" VisuallyHidden spans and the application/ld+json scripts.
+# It skips building a document tree and gives up (returns None) on any markup where
+# BeautifulSoup's tree building could produce different text, so the caller can fall back.
+
+# Elements BeautifulSoup closes immediately; a subset of its list is enough because
+# anything else left open inside a target span is treated as unsure.
+VOID_ELEMENTS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "param", "source", "track", "wbr"}
+
+
+class FastParserUnsure(Exception):
+    pass
+
+
+def is_status_span(tag, attrs, status_class="VisuallyHidden"):
+    if tag != "span" or attrs.get("role") != "status":
+        return False
+    css_class = attrs.get("class")
+    return bool(css_class) and status_class in css_class
+
+
+def is_jsonld_script(tag, attrs):
+    return tag == "script" and attrs.get("type") == "application/ld+json"
+
+
+class AvailabilityExtractor(HTMLParser):
+    def __init__(self, status_class="VisuallyHidden"):
+        # Charrefs are handled explicitly so entity text inside a status span can be flagged
+        super().__init__(convert_charrefs=False)
+        self.status_class = status_class
+        self.status_texts = []
+        self.jsonld_blobs = []
+        self._span_stack = None   # open child tags while inside a status span
+        self._span_strings = None
+        self._script_chunks = None
+        self._pending = []        # text since the last tag, joined like a single text node
+
+    def _flush_text(self):
+        if self._pending:
+            text = "".join(self._pending).strip()
+            self._pending = []
+            if text and self._span_strings is not None:
+                self._span_strings.append(text)
+
+    def _finish_span(self):
+        self._flush_text()
+        self.status_texts.append("".join(self._span_strings))
+        self._span_stack = None
+        self._span_strings = None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if self._span_stack is not None:
+            self._flush_text()
+            if tag in ("script", "style", "template") or is_status_span(tag, attrs, self.status_class):
+                raise FastParserUnsure(f"<{tag}> inside status span")
+            if tag not in VOID_ELEMENTS:
+                self._span_stack.append(tag)
+            return
+        if is_status_span(tag, attrs, self.status_class):
+            self._span_stack = []
+            self._span_strings = []
+        elif is_jsonld_script(tag, attrs):
+            self._script_chunks = []
+
+    def handle_startendtag(self, tag, attrs):
+        attrs = dict(attrs)
+        if self._span_stack is not None:
+            self._flush_text()
+            if is_status_span(tag, attrs, self.status_class):
+                raise FastParserUnsure("self-closed status span inside status span")
+            return
+        if is_status_span(tag, attrs, self.status_class):
+            self.status_texts.append("")
+        elif is_jsonld_script(tag, attrs):
+            self.jsonld_blobs.append(None)
+
+    def handle_endtag(self, tag):
+        if self._script_chunks is not None and tag == "script":
+            blob = "".join(self._script_chunks)
+            self.jsonld_blobs.append(blob or None)
+            self._script_chunks = None
+            return
+        if self._span_stack is None:
+            return
+        self._flush_text()
+        if self._span_stack:
+            if self._span_stack[-1] != tag:
+                raise FastParserUnsure(f"mismatched </{tag}> inside status span")
+            self._span_stack.pop()
+        elif tag == "span":
+            self._finish_span()
+        else:
+            raise FastParserUnsure(f"unexpected </{tag}> inside status span")
+
+    def handle_data(self, data):
+        if self._script_chunks is not None:
+            self._script_chunks.append(data)
+        elif self._span_stack is not None:
+            self._pending.append(data)
+
+    def handle_entityref(self, name):
+        if self._span_stack is not None:
+            raise FastParserUnsure("entity reference inside status span")
+
+    def handle_charref(self, name):
+        if self._span_stack is not None:
+            raise FastParserUnsure("character reference inside status span")
+
+    def handle_comment(self, data):
+        if self._span_stack is not None:
+            raise FastParserUnsure("comment inside status span")
+
+    def handle_decl(self, decl):
+        if self._span_stack is not None:
+            raise FastParserUnsure("declaration inside status span")
+
+    def handle_pi(self, data):
+        if self._span_stack is not None:
+            raise FastParserUnsure("processing instruction inside status span")
+
+    def unknown_decl(self, data):
+        if self._span_stack is not None:
+            raise FastParserUnsure("CDATA section inside status span")
+
+    def close(self):
+        super().close()
+        if self._span_stack is not None or self._script_chunks is not None:
+            raise FastParserUnsure("document ended inside a status span or JSON-LD script")
+
+
+def extract_fast(html_content, status_class="VisuallyHidden"):
+    # Returns (status_texts, jsonld_blobs), or None when BeautifulSoup should be used instead
+    parser = AvailabilityExtractor(status_class)
+    try:
+        parser.feed(html_content)
+        parser.close()
+    except FastParserUnsure as e:
+        print(f"Fast parser unsure ({e}), falling back to BeautifulSoup.")
+        return None
+    except Exception as e:
+        print(f"Fast parser failed ({e}), falling back to BeautifulSoup.")
+        return None
+    return parser.status_texts, parser.jsonld_blobs
@@ -0,0 +1,47 @@
+import hashlib
+import json
+import re
+from sellouts.layers import FRAGMENT_PATTERNS
+
+# ---- Content Fingerprints ----
+# A check only depends on the status spans and the JSON-LD blocks (plus the fragments of
+# any other detection layer in use), so a hash of those fragments tells whether the
+# previous result still holds. For HTML the raw fragments are
+# found with a regex scan, which is much cheaper than parsing the page; anything the scan
+# isn't sure about returns None and the page is parsed as usual.
+
+# Deliberately loose (any case, any quoting): matching extra fragments only costs a re-parse
+STATUS_SPAN_RE = re.compile(r"<span\b[^>]*\brole\s*=\s*[\"']?status\b[^>]*>(.*?)</span\s*>", re.I | re.S)
+JSONLD_SCRIPT_RE = re.compile(r"<script\b[^>]*\btype\s*=\s*[\"']?application/ld\+json\b[^>]*>.*?</script\s*>",
+                              re.I | re.S)
+
+def digest(parts):
+    sha = hashlib.sha1()
+    for part in parts:
+        sha.update(part.encode("utf-8", "surrogatepass"))
+        sha.update(b"\0")
+    return sha.hexdigest()
+
+def html_fingerprint(html, fragments=()):
+    # fragments: extra PageData fragment names (e.g. "banner") to cover besides spans and JSON-LD
+    spans = []
+    for match in STATUS_SPAN_RE.finditer(html):
+        if "<span" in match.group(1).lower():
+            # Nested spans: the lazy match stops at the inner </span> and could miss a change
+            return None
+        spans.append(match.group(0))
+    if not spans:
+        return None
+    scripts = [match.group(0) for match in JSONLD_SCRIPT_RE.finditer(html)]
+    extras = []
+    for name in fragments:
+        if name in FRAGMENT_PATTERNS:
+            extras.append(name)
+            extras.extend(match.group(0) for match in FRAGMENT_PATTERNS[name].finditer(html))
+    return "html:" + digest(spans + ["--"] + scripts + extras)
+
+def extracted_fingerprint(status_texts, jsonld_blobs, extra=None):
+    parts = [json.dumps(status_texts), json.dumps(jsonld_blobs)]
+    if extra:
+        parts.append(json.dumps(extra, sort_keys=True))
+    return "extracted:" + digest(parts)
@@ -0,0 +1,328 @@
+import argparse
+import json
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime
+from sellouts.metrics import percentile
+
+# ---- Availability History ----
+# Every check, the offers it saw and every alert go into a SQLite database (WAL mode), so
+# questions like "how often does this event restock, when, and at what price" are a query
+# instead of a grep. Rows are written by a background thread in batched transactions.
+# Unchanged checks store a row but no offers; the previous offers still apply.
+#
+#   python -m sellouts.history restocks --event 360062289EF011A5 --since 7
+#   python -m sellouts.history prices --bucket day
+#   python -m sellouts.history latency
+#   python -m sellouts.history layers
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS checks (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    event TEXT NOT NULL,
+    tier TEXT,
+    found INTEGER NOT NULL,
+    unchanged INTEGER NOT NULL DEFAULT 0,
+    layers TEXT,
+    timings TEXT
+);
+CREATE INDEX IF NOT EXISTS checks_event_ts ON checks (event, ts);
+CREATE INDEX IF NOT EXISTS checks_ts ON checks (ts);
+CREATE INDEX IF NOT EXISTS checks_found ON checks (found, event, ts);
+CREATE TABLE IF NOT EXISTS offers (
+    check_id INTEGER NOT NULL REFERENCES checks (id),
+    ts REAL NOT NULL,
+    event TEXT NOT NULL,
+    description TEXT,
+    price REAL,
+    currency TEXT,
+    availability TEXT,
+    url TEXT
+);
+CREATE INDEX IF NOT EXISTS offers_event_ts ON offers (event, ts);
+CREATE INDEX IF NOT EXISTS offers_availability ON offers (availability, event, ts);
+CREATE TABLE IF NOT EXISTS alerts (
+    ts REAL NOT NULL,
+    event TEXT NOT NULL,
+    changes TEXT
+);
+CREATE INDEX IF NOT EXISTS alerts_event_ts ON alerts (event, ts);
+"""
+
+def connect(path):
+    conn = sqlite3.connect(path, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+def to_price(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+class HistoryStore:
+    def __init__(self, path, flush_interval=1.0, batch_size=500):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="history-store", daemon=True)
+        self._thread.start()
+
+    def record_check(self, event_url, result, timings=None, unchanged=False, ts=None):
+        # Non-blocking; safe to call from any thread
+        self._queue.put(("check", time.time() if ts is None else ts, event_url, result.get("tier", "browser"), result["found"],
+                         unchanged, result.get("layers"), timings, [] if unchanged else result.get("offers", [])))
+
+    def record_alert(self, event_url, changes, ts=None):
+        self._queue.put(("alert", time.time() if ts is None else ts, event_url, changes))
+
+    def close(self, timeout=10):
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def _write_batch(self, conn, batch):
+        with conn:
+            for item in batch:
+                if item[0] == "alert":
+                    _, ts, event_url, changes = item
+                    conn.execute("INSERT INTO alerts (ts, event, changes) VALUES (?, ?, ?)",
+                                 (ts, event_url, json.dumps(changes)))
+                    continue
+                _, ts, event_url, tier, found, unchanged, layers, timings, offers = item
+                check_id = conn.execute(
+                    "INSERT INTO checks (ts, event, tier, found, unchanged, layers, timings) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (ts, event_url, tier, int(bool(found)), int(unchanged),
+                     json.dumps(layers) if layers is not None else None,
+                     json.dumps(timings) if timings else None)).lastrowid
+                conn.executemany(
+                    "INSERT INTO offers (check_id, ts, event, description, price, currency, availability, url) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    [(check_id, ts, event_url, offer.get("description"), to_price(offer.get("price")),
+                      offer.get("currency"), offer.get("availability"), offer.get("url")) for offer in offers])
+
+    def _run(self):
+        try:
+            conn = connect(self.path)
+        except sqlite3.Error as e:
+            print(f"History store {self.path} unavailable:", e)
+            while self._queue.get() is not None:
+                pass
+            return
+        batch = []
+        deadline = None
+        while True:
+            timeout = self.flush_interval if not batch else max(0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = False
+            if item is None:
+                break
+            if item:
+                if not batch:
+                    deadline = time.monotonic() + self.flush_interval
+                batch.append(item)
+                if len(batch) < self.batch_size and time.monotonic() < deadline:
+                    continue
+            if batch:
+                try:
+                    self._write_batch(conn, batch)
+                except sqlite3.Error as e:
+                    print("Failed to write history:", e)
+                batch = []
+        try:
+            if batch:
+                self._write_batch(conn, batch)
+        except sqlite3.Error as e:
+            print("Failed to write history:", e)
+        conn.close()
+
+# ---- Queries ----
+def parse_since(value):
+    # Days back ("7", "0.5") or an ISO date/time; returns a unix timestamp
+    if value is None:
+        return 0
+    try:
+        return time.time() - float(value) * 86400
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+def event_filter(event):
+    return ("AND event LIKE ?", [f"%{event}%"]) if event else ("", [])
+
+def find_restocks(conn, event=None, since=0):
+    # Sold out -> available transitions: (event, ts of the first check that saw tickets,
+    # ts of the last check before it that didn't)
+    clause, params = event_filter(event)
+    rows = conn.execute(f"""
+        SELECT event, ts, prev_ts FROM (
+            SELECT event, ts, found,
+                   LAG(found) OVER (PARTITION BY event ORDER BY ts) AS prev_found,
+                   LAG(ts) OVER (PARTITION BY event ORDER BY ts) AS prev_ts
+            FROM checks WHERE ts >= ? {clause}
+        ) WHERE found = 1 AND prev_found = 0 ORDER BY ts
+    """, [since] + params).fetchall()
+    return rows
+
+def format_ts(ts):
+    return datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M:%S")
+
+def cheapest_in_stock(conn, event, ts):
+    # Cheapest InStock offer seen by the first check after a restock
+    row = conn.execute("""
+        SELECT MIN(price), currency FROM offers
+        WHERE event = ? AND ts = ? AND availability = 'http://schema.org/InStock'
+    """, (event, ts)).fetchone()
+    return f"{row[0]:.2f} {row[1] or ''}".strip() if row and row[0] is not None else "-"
+
+def report_restocks(conn, event, since):
+    restocks = find_restocks(conn, event, since)
+    if not restocks:
+        print("No restocks recorded.")
+        return
+    per_event = {}
+    per_hour = [0] * 24
+    per_weekday = [0] * 7
+    for url, ts, _ in restocks:
+        per_event[url] = per_event.get(url, 0) + 1
+        moment = datetime.fromtimestamp(ts)
+        per_hour[moment.hour] += 1
+        per_weekday[moment.weekday()] += 1
+    print(f"{len(restocks)} restock(s)\n")
+    for url, count in sorted(per_event.items(), key=lambda item: -item[1]):
+        first, last = conn.execute("SELECT MIN(ts), MAX(ts) FROM checks WHERE event = ? AND ts >= ?",
+                                   (url, since)).fetchone()
+        days = max((last - first) / 86400, 1 / 24)
+        print(f"{count:>5}  {count / days:6.2f}/day  {url}")
+    print("\nBy hour of day: " + "  ".join(f"{hour:02d}h:{count}" for hour, count in enumerate(per_hour) if count))
+    weekdays = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+    print("By weekday:     " + "  ".join(f"{weekdays[day]}:{count}" for day, count in enumerate(per_weekday) if count))
+    print("\nMost recent:")
+    for url, ts, _ in restocks[-20:]:
+        print(f"  {format_ts(ts)}  from {cheapest_in_stock(conn, url, ts):>12}  {url}")
+
+def report_prices(conn, event, since, bucket):
+    clause, params = event_filter(event)
+    fmt = "%Y-%m-%d %H:00" if bucket == "hour" else "%Y-%m-%d"
+    rows = conn.execute(f"""
+        SELECT strftime(?, ts, 'unixepoch', 'localtime') AS period, event, description, currency,
+               MIN(price), MAX(price), SUM(availability = 'http://schema.org/InStock'), COUNT(*)
+        FROM offers WHERE ts >= ? {clause}
+        GROUP BY period, event, description, currency ORDER BY event, description, period
+    """, [fmt, since] + params).fetchall()
+    if not rows:
+        print("No offers recorded.")
+        return
+    current = None
+    for period, url, description, currency, low, high, in_stock, seen in rows:
+        if url != current:
+            print(f"\n{url}")
+            current = url
+        prices = "-" if low is None else (f"{low:.2f}" if low == high else f"{low:.2f}-{high:.2f}")
+        print(f"  {period}  {description or '(no description)':<30} {prices:>16} {currency or '':<4} "
+              f"in stock {in_stock}/{seen}")
+
+def report_latency(conn, event, since):
+    # Detection window: time between the last sold-out check and the first check that saw
+    # tickets (the restock happened somewhere in it). Alert delay: first check -> alert queued.
+    restocks = find_restocks(conn, event, since)
+    if not restocks:
+        print("No restocks recorded.")
+        return
+    windows = []
+    delays = []
+    for url, ts, prev_ts in restocks:
+        windows.append(ts - prev_ts)
+        row = conn.execute("SELECT MIN(ts) FROM alerts WHERE event = ? AND ts >= ? AND ts < ?",
+                           (url, ts, ts + 3600)).fetchone()
+        if row[0] is not None:
+            delays.append(row[0] - ts)
+    clause, params = event_filter(event)
+    intervals = [row[0] for row in conn.execute(f"""
+        SELECT ts - LAG(ts) OVER (PARTITION BY event ORDER BY ts) FROM checks WHERE ts >= ? {clause}
+    """, [since] + params) if row[0] is not None]
+
+    def describe(name, values):
+        values = sorted(values)
+        if not values:
+            print(f"{name:<28} no data")
+            return
+        print(f"{name:<28} n={len(values):<6} p50={percentile(values, 0.5):8.2f}s  "
+              f"p95={percentile(values, 0.95):8.2f}s  max={values[-1]:8.2f}s")
+
+    describe("Detection window", windows)
+    describe("First detection -> alert", delays)
+    describe("Check interval (all)", intervals)
+    missing = len(restocks) - len(delays)
+    if missing:
+        print(f"{missing} restock(s) had no alert within an hour (cooldown, digest or alert failure).")
+
+def report_layers(conn, event, since):
+    # Per detection layer: how often it ran, what it answered and what it cost. Hit rate is the
+    # share of runs with an answer (tickets or none); a layer that rarely answers only adds cost.
+    from sellouts.layers import LAYERS
+    names = {layer.label: layer.name for layer in LAYERS.values()}
+    clause, params = event_filter(event)
+    rows = conn.execute(f"SELECT layers, timings FROM checks WHERE ts >= ? AND unchanged = 0 {clause}",
+                        [since] + params).fetchall()
+    if not rows:
+        print("No checks recorded.")
+        return
+    stats = {}
+    for layers_json, timings_json in rows:
+        layers = json.loads(layers_json) if layers_json else {}
+        timings = json.loads(timings_json) if timings_json else {}
+        for label, verdict in layers.items():
+            entry = stats.setdefault(label, {"runs": 0, "found": 0, "none": 0, "seconds": []})
+            entry["runs"] += 1
+            if verdict is True:
+                entry["found"] += 1
+            elif verdict is False:
+                entry["none"] += 1
+            seconds = timings.get(f"layer_{names.get(label)}")
+            if seconds is not None:
+                entry["seconds"].append(seconds)
+    print(f"{len(rows)} evaluated check(s)\n")
+    print(f"{'Layer':<28} {'runs':>7} {'ran':>5} {'found':>7} {'none':>7} {'hit rate':>8} {'p50 ms':>8} {'p95 ms':>8}")
+    for label, entry in sorted(stats.items()):
+        values = sorted(entry["seconds"])
+        p50 = f"{percentile(values, 0.5) * 1000:8.2f}" if values else f"{'-':>8}"
+        p95 = f"{percentile(values, 0.95) * 1000:8.2f}" if values else f"{'-':>8}"
+        print(f"{label:<28} {entry['runs']:>7} {entry['runs'] / len(rows):>5.0%} {entry['found']:>7} "
+              f"{entry['none']:>7} {(entry['found'] + entry['none']) / entry['runs']:>8.0%} {p50} {p95}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the availability history database")
+    parser.add_argument("report", choices=["restocks", "prices", "latency", "layers"])
+    parser.add_argument("--db", default=os.getenv("HISTORY_DB", "sellouts_history.db"))
+    parser.add_argument("--event", help="only events whose URL contains this")
+    parser.add_argument("--since", help="days back (e.g. 7) or an ISO date")
+    parser.add_argument("--bucket", choices=["hour", "day"], default="hour", help="price history granularity")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"No history database at {args.db}")
+        return 1
+    conn = sqlite3.connect(f"file:{args.db}?mode=ro", uri=True)
+    since = parse_since(args.since)
+    if args.report == "restocks":
+        report_restocks(conn, args.event, since)
+    elif args.report == "prices":
+        report_prices(conn, args.event, since, args.bucket)
+    elif args.report == "layers":
+        report_layers(conn, args.event, since)
+    else:
+        report_latency(conn, args.event, since)
+    conn.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
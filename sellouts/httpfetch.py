@@ -0,0 +1,84 @@
+from urllib.parse import urlparse
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+try:
+    import h2  # noqa: F401 - only needed for HTTP/2 support in httpx
+    HAS_HTTP2 = True
+except ImportError:
+    HAS_HTTP2 = False
+
+# ---- HTTP Fetch Tier ----
+# Fetches event pages with a pooled keep-alive HTTP client instead of a browser render.
+# The server-rendered HTML is run through the same Layer 1/Layer 2 checks; when it is
+# blocked, redirected to a queue, or doesn't carry enough to decide, the check escalates
+# to a pool page. ETag/Last-Modified validators are sent back so an unchanged page costs
+# a 304 with no body.
+
+BLOCK_STATUSES = {401, 403, 429, 503}
+# Bot-protection interstitials served with a 200
+BLOCK_MARKERS = ("Pardon Our Interruption", "_Incapsula_Resource", "px-captcha", "/cdn-cgi/challenge-platform",
+                 "geo.captcha-delivery.com")
+
+class HttpFetcher:
+    def __init__(self, user_agent, timeout=15, http2=True, max_connections=10, conditional=True):
+        self.conditional = conditional
+        self.http2 = http2 and HAS_HTTP2
+        if http2 and not HAS_HTTP2:
+            print("HTTP/2 needs the h2 package (pip install 'httpx[http2]'); using HTTP/1.1.")
+        self.client = httpx.AsyncClient(
+            http2=self.http2,
+            timeout=timeout,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections,
+                                keepalive_expiry=120),
+            headers={
+                "User-Agent": user_agent,
+                "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+                "Accept-Language": "en-GB,en;q=0.9",
+            },
+        )
+        self.validators = {}  # url -> conditional request headers from the last 200
+
+    def forget(self, url):
+        # Next fetch of url is unconditional (the last body couldn't be used on its own)
+        self.validators.pop(url, None)
+
+    async def fetch(self, url):
+        # Returns (html, blocked_reason); blocked_reason is None when the page looks usable.
+        # html is None (and no reason) when the server answered 304 Not Modified.
+        response = await self.client.get(url, headers=self.validators.get(url))
+        if response.status_code == 304:
+            return None, None
+        html = response.text
+        if response.status_code in BLOCK_STATUSES:
+            return html, f"status {response.status_code}"
+        if response.status_code != 200:
+            return html, f"unexpected status {response.status_code}"
+        if response.url.host != urlparse(url).hostname:
+            return html, f"redirected to {response.url.host}"
+        for marker in BLOCK_MARKERS:
+            if marker in html:
+                return html, "bot challenge"
+        validators = {}
+        if response.headers.get("etag"):
+            validators["If-None-Match"] = response.headers["etag"]
+        if response.headers.get("last-modified"):
+            validators["If-Modified-Since"] = response.headers["last-modified"]
+        if validators and self.conditional:
+            self.validators[url] = validators
+        else:
+            self.validators.pop(url, None)
+        return html, None
+
+    def share_cookies(self, cookies):
+        # Reuse the browser's session cookies (from page.cookies()) so requests look like the same visitor
+        for cookie in cookies:
+            self.client.cookies.set(cookie["name"], cookie["value"], domain=cookie.get("domain", ""),
+                                    path=cookie.get("path", "/"))
+
+    async def close(self):
+        await self.client.aclose()
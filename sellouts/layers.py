@@ -0,0 +1,260 @@
+import json
+import re
+import time
+from html import unescape
+
+# ---- Detection Layers ----
+# Each layer reads one kind of evidence from a page and answers True (tickets), False (no
+# tickets) or None (can't tell). Layers declare a relative cost. Deciding layers run cheapest
+# first, and the combine rule stops as soon as the answer is settled. Detail layers (JSON-LD
+# offers) don't vote; they run on every check, or only when tickets were found. Page
+# fragments are extracted on first use, so a check a regex layer settles (with no detail
+# layer to run) never pays for the full parse.
+# Per-layer seconds go into the check's timings as "layer_<name>".
+#
+# Ported from deprecated/sellouts_playwright.py: resultCount, the sold-out banner and the
+# ticket list. Layer 3 is the offer API check in network mode (sellouts/network.py).
+
+DEFAULT_LAYERS = ["visually_hidden", "jsonld"]
+COMBINE_RULES = ("first", "any", "all")
+DETAIL_RULES = ("always", "found")
+
+# Cheap fragments, found with a regex scan instead of a parse (tags stripped from the text)
+RESULT_COUNT_RE = re.compile(r"<span\b[^>]*\bclass\s*=\s*[\"'][^\"']*resultCount[^\"']*[\"'][^>]*>(.*?)</span\s*>", re.S)
+BANNER_RE = re.compile(r"<span\b[^>]*\bdata-testid\s*=\s*[\"']?message-bar-text\b[^>]*>(.*?)</span\s*>", re.I | re.S)
+TICKET_LIST_RE = re.compile(r"<[a-z][^>]*\bdata-testid\s*=\s*[\"']?ticket-list[\"'\s/>]", re.I)
+TAG_RE = re.compile(r"<[^>]+>")
+
+def fragment_text(markup):
+    # Like BeautifulSoup's get_text(strip=True)
+    return unescape("".join(part.strip() for part in TAG_RE.split(markup)))
+
+def find_text(pattern, html):
+    match = pattern.search(html)
+    return fragment_text(match.group(1)) if match else None
+
+FRAGMENT_PATTERNS = {"result_count": RESULT_COUNT_RE, "banner": BANNER_RE, "ticket_list": TICKET_LIST_RE}
+FRAGMENT_EXTRACTORS = {
+    "result_count": lambda html: find_text(RESULT_COUNT_RE, html),
+    "banner": lambda html: find_text(BANNER_RE, html),
+    "ticket_list": lambda html: TICKET_LIST_RE.search(html) is not None,
+}
+
+class PageData:
+    # What the layers read from one page: HTML with the parser engine's extract(html) ->
+    # (status_texts, jsonld_blobs), or fragments already extracted in the page
+    def __init__(self, html=None, extract=None, fragments=None):
+        self.html = html
+        self.extract = extract
+        self.fragments = dict(fragments or {})
+        self.extract_seconds = 0.0
+
+    def get(self, name):
+        if name not in self.fragments:
+            started = time.perf_counter()
+            if name in ("status_texts", "jsonld_blobs"):
+                status_texts, jsonld_blobs = self.extract(self.html) if self.html is not None else ([], [])
+                self.fragments.update(status_texts=status_texts, jsonld_blobs=jsonld_blobs)
+            else:
+                self.fragments[name] = FRAGMENT_EXTRACTORS[name](self.html or "")
+            self.extract_seconds += time.perf_counter() - started
+        return self.fragments[name]
+
+def outcome(found, lines, details=None, offers=None):
+    return {"found": found, "lines": lines, "details": details or [], "offers": offers or []}
+
+class Layer:
+    name = "layer"
+    label = "Layer"  # key in the result's "layers" and prefix of its result lines
+    cost = 1  # relative: 1 = a regex scan, 5 = needs the page parsed
+    decides = True  # False for layers that only add details and offers
+    fragments = ()  # PageData fragments it reads, so content fingerprints can cover them
+
+    def detect(self, data):
+        raise NotImplementedError
+
+class VisuallyHiddenLayer(Layer):
+    name = "visually_hidden"
+    label = "Layer 1: VisuallyHidden"
+    cost = 5
+    fragments = ("status_texts",)
+
+    def detect(self, data):
+        # VisuallyHidden result span (multiple occurrences)
+        status_texts = data.get("status_texts")
+        if not status_texts:
+            return outcome(None, ["[Layer 1: VisuallyHidden] No VisuallyHidden span found"])
+        lines = []
+        vh_found = False
+        for idx, vh_text in enumerate(status_texts):
+            if vh_text.lower().startswith("0 no results"):
+                lines.append(f"[Layer 1: VisuallyHidden] NO TICKETS (span #{idx+1}, text: '{vh_text}')")
+            else:
+                lines.append(f"[Layer 1: VisuallyHidden] TICKETS POSSIBLY AVAILABLE (span #{idx+1}, text: '{vh_text}')")
+                vh_found = True
+        return outcome(vh_found, lines)
+
+class JsonLdLayer(Layer):
+    name = "jsonld"
+    label = "Layer 2: JSON-LD"
+    cost = 6
+    # Only Layer 1 decides (confirmed for Ozzy and Lzzy); JSON-LD supplies the offers and details
+    decides = False
+    fragments = ("jsonld_blobs",)
+
+    def detect(self, data):
+        found_in_json = False
+        jsonld_details = []
+        offers_found = []
+        for blob in data.get("jsonld_blobs"):
+            try:
+                if not blob:
+                    continue
+                parsed = json.loads(blob.strip())
+                entries = parsed if isinstance(parsed, list) else [parsed]
+                for entry in entries:
+                    if entry.get("@type") != "MusicEvent":
+                        continue
+                    # Extract event info
+                    event_name = entry.get("name")
+                    event_date = entry.get("startDate")
+                    venue = entry.get("location", {}).get("name")
+                    address = entry.get("location", {}).get("address", {}).get("streetAddress")
+                    city = entry.get("location", {}).get("address", {}).get("addressLocality")
+                    offers = entry.get("offers")
+                    if not offers:
+                        continue
+                    offers = offers if isinstance(offers, list) else [offers]
+                    for offer in offers:
+                        if not isinstance(offer, dict):
+                            continue
+                        availability = offer.get("availability")
+                        url = offer.get("url")
+                        price = offer.get("price")
+                        currency = offer.get("priceCurrency")
+                        description = offer.get("description")
+                        # Compose details string
+                        details_str = f"Event: {event_name} | Date: {event_date} | Venue: {venue}, {address}, {city} | "
+                        details_str += f"Availability: {availability} | URL: {url} | Price: {price or 'N/A'} {currency or ''} | Description: {description or 'N/A'}"
+                        jsonld_details.append(details_str)
+                        offers_found.append({"url": url, "description": description, "price": price,
+                                             "currency": currency, "availability": availability})
+                        if availability == "http://schema.org/InStock":
+                            found_in_json = True
+            except Exception:
+                continue
+        if found_in_json:
+            lines = ["[Layer 2: JSON-LD] TICKETS POSSIBLY AVAILABLE (InStock offer found)"]
+            lines.extend(f"[Layer 2: JSON-LD] {d}" for d in jsonld_details)
+        else:
+            lines = ["[Layer 2: JSON-LD] NO TICKETS (no matching offers)"]
+        return outcome(found_in_json, lines, jsonld_details, offers_found)
+
+class ResultCountLayer(Layer):
+    name = "result_count"
+    label = "Layer 4: resultCount"
+    fragments = ("result_count",)
+
+    def detect(self, data):
+        # Result count span from the UI indicator
+        text = data.get("result_count")
+        if text is None:
+            return outcome(None, ["[Layer 4: resultCount] span not found"])
+        text = text.lower()
+        if text.startswith("0 no results"):
+            return outcome(False, [f"[Layer 4: resultCount] NO TICKETS (text: '{text}')"])
+        if "result" in text and "no" not in text:
+            return outcome(True, [f"[Layer 4: resultCount] TICKETS POSSIBLY AVAILABLE (text: '{text}')"])
+        return outcome(None, [f"[Layer 4: resultCount] unrecognised text: '{text}'"])
+
+class SoldOutBannerLayer(Layer):
+    name = "sold_out_banner"
+    label = "Layer 5: Sold-out banner"
+    fragments = ("banner",)
+
+    def detect(self, data):
+        # The banner only ever says there are none; without it the page may still be sold out,
+        # so a missing banner is undecided (the Playwright version counted it as a match)
+        text = data.get("banner")
+        if text and "no tickets currently available" in text.lower():
+            return outcome(False, [f"[Layer 5: Sold-out banner] NO TICKETS (text: '{text}')"])
+        return outcome(None, ["[Layer 5: Sold-out banner] no sold-out banner"])
+
+class TicketListLayer(Layer):
+    name = "ticket_list"
+    label = "Layer 6: Ticket list"
+    fragments = ("ticket_list",)
+
+    def detect(self, data):
+        # The ticket-list block is only rendered when there are tickets to pick
+        if data.get("ticket_list"):
+            return outcome(True, ["[Layer 6: Ticket list] TICKETS POSSIBLY AVAILABLE (ticket-list found)"])
+        return outcome(None, ["[Layer 6: Ticket list] ticket-list not found"])
+
+# ---- Registry ----
+LAYERS = {}
+
+def register(layer):
+    # Adds a layer instance under layer.name; the name can then be used in DETECTION_LAYERS
+    LAYERS[layer.name] = layer
+    return layer
+
+for layer_class in (VisuallyHiddenLayer, JsonLdLayer, ResultCountLayer, SoldOutBannerLayer, TicketListLayer):
+    register(layer_class())
+
+def parse_layer_names(value):
+    # "a,b" or ["a", "b"] -> validated list of layer names
+    names = [name.strip() for name in (value.split(",") if isinstance(value, str) else value) if name.strip()]
+    unknown = [name for name in names if name not in LAYERS]
+    if unknown:
+        raise ValueError(f"Unknown detection layer(s) {', '.join(unknown)}; known: {', '.join(LAYERS)}")
+    return names
+
+def needed_fragments(names):
+    return sorted({fragment for name in names for fragment in LAYERS[name].fragments})
+
+def ordered_layers(names):
+    # Deciding layers cheapest first, then the detail layers; ties keep the given order
+    layers = [LAYERS[name] for name in dict.fromkeys(names)]
+    return sorted(layers, key=lambda layer: (not layer.decides, layer.cost))
+
+def run_layers(data, names=None, combine="first", timings=None, details="always"):
+    # Returns {"found", "details", "layer_results", "offers", "layers", "decided_by", "skipped"}.
+    # combine: "first" = the first layer that can tell decides; "any" = tickets if any layer
+    # finds them; "all" = tickets only if no layer rules them out. details="found" runs the
+    # detail layers only for a positive answer. Layers that didn't run are listed in "skipped";
+    # with no answer from any deciding layer "found" is False.
+    found = None
+    decided_by = None
+    settled = False
+    result = {"details": [], "layer_results": [], "offers": [], "layers": {}, "skipped": []}
+    for layer in ordered_layers(names or DEFAULT_LAYERS):
+        if (layer.decides and settled) or (not layer.decides and details == "found" and not found):
+            result["skipped"].append(layer.label)
+            continue
+        started = time.perf_counter()
+        try:
+            layer_outcome = layer.detect(data)
+        except Exception as e:
+            layer_outcome = outcome(None, [f"[{layer.label}] ERROR: {e}"])
+        if timings is not None:
+            timings[f"layer_{layer.name}"] = time.perf_counter() - started
+        result["layers"][layer.label] = layer_outcome["found"]
+        result["layer_results"].extend(layer_outcome["lines"])
+        result["details"].extend(layer_outcome["details"])
+        result["offers"].extend(layer_outcome["offers"])
+        verdict = layer_outcome["found"]
+        if not layer.decides or verdict is None:
+            continue
+        if found is None:
+            found = verdict
+            decided_by = layer.label
+        if combine == "any" and verdict:
+            found, decided_by, settled = True, layer.label, True
+        elif combine == "all" and not verdict:
+            found, decided_by, settled = False, layer.label, True
+        elif combine not in ("any", "all"):
+            settled = True
+    result["found"] = bool(found)
+    result["decided_by"] = decided_by
+    return result
@@ -0,0 +1,100 @@
+import os
+
+# ---- Config File ----
+# Optional settings and event list in a TOML file (or YAML, with PyYAML installed) named by
+# CONFIG_FILE. Settings use the environment variable names and take precedence over the
+# environment. The monitor polls the file and applies changes to intervals, timeouts,
+# selectors and the event list while it runs, without restarting the browser.
+#
+#   [settings]
+#   CHECK_INTERVAL_MIN = 2
+#   CHECK_INTERVAL_MAX = 5
+#   PAGE_TIMEOUT = 45
+#   STATUS_CLASS = "VisuallyHidden"
+#
+#   [[events]]
+#   url = "https://www.ticketmaster.co.uk/.../event/360062289EF011A5"
+#   max_interval = 60
+#   window = ["09:55-10:30"]
+#
+# An event can also be given as an events-file line: events = ["URL max_interval=60"].
+
+def load_document(path):
+    if path.endswith((".yaml", ".yml")):
+        try:
+            import yaml
+        except ImportError:
+            raise ValueError(f"{path} needs PyYAML (pip install pyyaml); or use TOML")
+        with open(path, encoding="utf-8") as f:
+            return yaml.safe_load(f) or {}
+    try:
+        import tomllib
+    except ImportError:
+        import tomli as tomllib  # Python < 3.11
+    with open(path, "rb") as f:
+        return tomllib.load(f)
+
+def event_spec(entry):
+    # An events-file line ("URL key=value ...") for a string or table entry
+    if isinstance(entry, str):
+        return entry.strip()
+    if not isinstance(entry, dict) or not entry.get("url"):
+        raise ValueError(f"Event entries need a url: {entry!r}")
+    parts = [entry["url"]]
+    for key, value in entry.items():
+        if key == "url":
+            continue
+        for item in value if isinstance(value, list) else [value]:
+            parts.append(f"{key}={item}")
+    return " ".join(parts)
+
+def read_config(path):
+    # Returns ({setting name: value}, event lines or None when the file has no event list)
+    document = load_document(path)
+    if not isinstance(document, dict):
+        raise ValueError(f"{path} should hold a table of settings and events")
+    settings = document.get("settings") or {}
+    if not isinstance(settings, dict):
+        raise ValueError(f"'settings' in {path} should be a table")
+    events = document.get("events")
+    if events is not None:
+        events = [spec for spec in (event_spec(entry) for entry in events) if spec and not spec.startswith("#")]
+    return {name.upper(): value for name, value in settings.items()}, events
+
+def coerce(value, default):
+    # Converts a file value to the type the environment setting has
+    if isinstance(default, bool):
+        return value in ("1", "true", "True") if isinstance(value, str) else bool(value)
+    if isinstance(default, list):
+        items = value if isinstance(value, list) else str(value).split(",")
+        return [str(item).strip() for item in items if str(item).strip()]
+    if isinstance(default, (int, float)):
+        return type(default)(value)
+    if isinstance(value, list):
+        return ",".join(str(item) for item in value)  # e.g. DROP_WINDOWS or BLOCK_DOMAINS as a list
+    return None if value is None else str(value)
+
+class FileWatcher:
+    # Polled rather than notified, so it needs no extra dependency and works on any filesystem.
+    # A file is treated as changed when its modification time or size differs from the last poll.
+    def __init__(self, paths):
+        self.watch(paths)
+
+    def stamp(self, path):
+        try:
+            info = os.stat(path)
+        except OSError:
+            return None
+        return info.st_mtime_ns, info.st_size
+
+    def watch(self, paths):
+        self.stamps = {path: self.stamp(path) for path in paths if path}
+
+    def changed(self):
+        changed = False
+        for path, stamp in self.stamps.items():
+            current = self.stamp(path)
+            if current != stamp:
+                self.stamps[path] = current
+                changed = True
+        return changed
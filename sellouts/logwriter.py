@@ -0,0 +1,145 @@
+import glob
+import gzip
+import json
+import os
+import queue
+import shutil
+import threading
+import time
+from datetime import datetime
+
+# ---- Structured Log Writer ----
+# One JSON record per line, written by a background thread in batches so a slow disk
+# never holds up a page check. The file is rotated by size and/or age and old segments
+# are gzip-compressed; only the newest `backups` segments are kept.
+
+class LogWriter:
+    def __init__(self, path, max_bytes=10 * 1024 * 1024, rotate_seconds=0, backups=10,
+                 compress=True, flush_interval=1.0, batch_size=200):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.rotate_seconds = rotate_seconds
+        self.backups = backups
+        self.compress = compress
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._queue = queue.Queue()
+        self._file = None
+        self._opened_at = None
+        self._thread = threading.Thread(target=self._run, name=f"log-writer:{os.path.basename(path)}", daemon=True)
+        self._thread.start()
+
+    def write(self, record):
+        # Non-blocking; safe to call from any thread
+        record.setdefault("ts", datetime.now().isoformat(timespec="milliseconds"))
+        self._queue.put(record)
+
+    def close(self, timeout=10):
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def _open(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(self.path, "a", encoding="utf-8")
+        # Age is measured from the file's first record so restarts don't postpone time-based
+        # rotation (the ctime changes on every write, so it can't be used)
+        self._opened_at = self._first_record_time() if self._file.tell() else time.time()
+
+    def _first_record_time(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return datetime.fromisoformat(json.loads(f.readline())["ts"]).timestamp()
+        except (OSError, ValueError, KeyError, TypeError):
+            return time.time()
+
+    def _should_rotate(self):
+        if self.max_bytes and self._file.tell() >= self.max_bytes:
+            return True
+        return bool(self.rotate_seconds) and time.time() - self._opened_at >= self.rotate_seconds
+
+    def _rotate(self):
+        self._file.close()
+        self._file = None
+        segment = f"{self.path}.{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}"
+        os.replace(self.path, segment)
+        if self.compress:
+            with open(segment, "rb") as src, gzip.open(segment + ".gz", "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            os.remove(segment)
+        segments = sorted(glob.glob(glob.escape(self.path) + ".*"))
+        for old in segments[:-self.backups] if self.backups else []:
+            os.remove(old)
+
+    def _write_batch(self, batch):
+        if self._file is None:
+            self._open()
+        self._file.write("".join(json.dumps(record, default=str) + "\n" for record in batch))
+        self._file.flush()
+        if self._should_rotate():
+            self._rotate()
+
+    def _run(self):
+        batch = []
+        deadline = None
+        while True:
+            timeout = self.flush_interval if not batch else max(0, deadline - time.monotonic())
+            try:
+                record = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                record = False
+            if record is None:
+                break
+            if record:
+                if not batch:
+                    deadline = time.monotonic() + self.flush_interval
+                batch.append(record)
+                if len(batch) < self.batch_size and time.monotonic() < deadline:
+                    continue
+            if batch:
+                try:
+                    self._write_batch(batch)
+                except Exception as e:
+                    print("Failed to write log records:", e)
+                batch = []
+        try:
+            if batch:
+                self._write_batch(batch)
+        except Exception as e:
+            print("Failed to write log records:", e)
+        if self._file:
+            self._file.close()
+            self._file = None
+
+
+# ---- Shared writers ----
+# Callers pass the log file path around as before; each path gets one writer. The rotation
+# settings are set by monitor.configure() before the first record is written.
+LOG_MAX_BYTES = 10 * 1024 * 1024
+LOG_ROTATE_SECONDS = 0  # 0 = size-based rotation only
+LOG_BACKUPS = 10
+
+_writers = {}
+_writers_lock = threading.Lock()
+
+def set_rotation(max_bytes, rotate_seconds, backups):
+    global LOG_MAX_BYTES, LOG_ROTATE_SECONDS, LOG_BACKUPS
+    LOG_MAX_BYTES, LOG_ROTATE_SECONDS, LOG_BACKUPS = max_bytes, rotate_seconds, backups
+
+def get_log_writer(path):
+    with _writers_lock:
+        if path not in _writers:
+            _writers[path] = LogWriter(path, max_bytes=LOG_MAX_BYTES, rotate_seconds=LOG_ROTATE_SECONDS,
+                                       backups=LOG_BACKUPS)
+        return _writers[path]
+
+def log_record(path, record):
+    get_log_writer(path).write(record)
+
+def close_log_writers():
+    with _writers_lock:
+        writers = list(_writers.values())
+        _writers.clear()
+    for writer in writers:
+        writer.close()
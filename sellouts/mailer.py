@@ -0,0 +1,120 @@
+import queue
+import smtplib
+import threading
+import time
+from sellouts.logwriter import log_record
+from sellouts.metrics import metrics
+
+# ---- Email Dispatcher ----
+# Sends alerts from a background thread over one authenticated SMTP connection that is
+# kept alive with NOOPs and re-opened when the server drops it, so the event loop never
+# waits on a TLS handshake or login while pages are being checked.
+
+# Rejections that retrying won't fix. These are SMTPExceptions, and so OSErrors too, so
+# they have to be caught before the connection errors that are retried.
+PERMANENT_ERRORS = (smtplib.SMTPAuthenticationError, smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused,
+                    smtplib.SMTPDataError, smtplib.SMTPNotSupportedError)
+
+class EmailDispatcher:
+    def __init__(self, host, port, use_ssl, username, password, keepalive=60, retries=3):
+        self.host = host
+        self.port = port
+        self.use_ssl = use_ssl
+        self.username = username
+        self.password = password
+        self.keepalive = keepalive
+        self.retries = retries
+        self._queue = queue.Queue()
+        self._server = None
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="email-dispatcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, msg, log_file, on_result=None):
+        # Queue a message; returns immediately. on_result(success, error) runs on the worker thread
+        self._queue.put((msg, log_file, on_result))
+
+    def close(self, timeout=30):
+        # Deliver whatever is still queued, then disconnect
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            print(f"Email dispatcher still busy after {timeout}s; {self._queue.qsize()} alert(s) not sent.")
+        self._thread = None
+
+    def _connect(self):
+        if self.use_ssl:
+            server = smtplib.SMTP_SSL(self.host, self.port, timeout=30)
+        else:
+            server = smtplib.SMTP(self.host, self.port, timeout=30)
+            server.ehlo()
+            if server.has_extn("starttls"):
+                server.starttls()
+                server.ehlo()
+        if self.username and self.password and server.has_extn("auth"):
+            server.login(self.username, self.password)
+        self._server = server
+
+    def _disconnect(self):
+        if self._server is None:
+            return
+        try:
+            self._server.quit()
+        except Exception:
+            self._server.close()  # quit() leaves the socket open when the connection is already broken
+        self._server = None
+
+    def _keepalive(self):
+        if self._server is None:
+            return
+        try:
+            self._server.noop()
+        except Exception:
+            # Reconnect lazily when the next alert arrives
+            self._disconnect()
+
+    def _send(self, msg):
+        last_error = None
+        for attempt in range(self.retries):
+            try:
+                if self._server is None:
+                    self._connect()
+                self._server.send_message(msg)
+                return None
+            except PERMANENT_ERRORS as e:
+                self._disconnect()
+                return e
+            except OSError as e:
+                # Dropped connections, timeouts and other SMTP errors
+                last_error = e
+                self._disconnect()
+                if attempt + 1 < self.retries:
+                    time.sleep(min(2 ** attempt, 10))
+        return last_error
+
+    def _run(self):
+        while True:
+            try:
+                item = self._queue.get(timeout=self.keepalive)
+            except queue.Empty:
+                self._keepalive()
+                continue
+            if item is None:
+                self._disconnect()
+                return
+            msg, log_file, on_result = item
+            with metrics.timer("sellouts_stage_seconds", stage="email_send"):
+                error = self._send(msg)
+            metrics.inc("sellouts_emails_total", status="sent" if error is None else "failed")
+            if error is None:
+                print("Email sent!")
+                log_record(log_file, {"type": "email", "status": "sent", "to": msg["To"], "body": msg.get_payload()})
+            else:
+                print("Failed to send email:", error)
+                log_record(log_file, {"type": "email", "status": "failed", "to": msg["To"], "error": str(error)})
+            if on_result:
+                on_result(error is None, error)
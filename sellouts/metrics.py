@@ -0,0 +1,167 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# ---- Metrics ----
+# Counters and latency histograms for the check loop. Histograms keep Prometheus-style
+# cumulative buckets for scraping plus a window of recent samples for p50/p95/p99 in the
+# periodic log summary. Observations may come from worker threads (email, logging).
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+RECENT_SAMPLES = 2048
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class Histogram:
+    def __init__(self):
+        self.bucket_counts = [0] * len(BUCKETS)
+        self.count = 0
+        self.total = 0.0
+        self.recent = deque(maxlen=RECENT_SAMPLES)
+
+    def observe(self, value):
+        self.count += 1
+        self.total += value
+        self.recent.append(value)
+        for idx, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.bucket_counts[idx] += 1
+
+    def percentiles(self):
+        values = sorted(self.recent)
+        return {"p50": percentile(values, 0.5), "p95": percentile(values, 0.95), "p99": percentile(values, 0.99)}
+
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels) + "}"
+
+
+class Metrics:
+    def __init__(self):
+        self.counters = {}    # (name, labels) -> value
+        self.histograms = {}  # (name, labels) -> Histogram
+        self.gauges = {}      # (name, labels) -> value
+        self.started = time.time()
+        self._lock = threading.Lock()
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def set(self, name, value, **labels):
+        with self._lock:
+            self.gauges[(name, tuple(sorted(labels.items())))] = value
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            if key not in self.histograms:
+                self.histograms[key] = Histogram()
+            self.histograms[key].observe(value)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def counter_value(self, name, **labels):
+        with self._lock:
+            return self.counters.get((name, tuple(sorted(labels.items()))), 0)
+
+    def render_prometheus(self):
+        lines = []
+        with self._lock:
+            for (name, labels), value in sorted(self.counters.items()):
+                lines.append(f"{name}{format_labels(labels)} {value}")
+            for (name, labels), value in sorted(self.gauges.items()):
+                lines.append(f"{name}{format_labels(labels)} {value}")
+            for (name, labels), hist in sorted(self.histograms.items()):
+                for bound, count in zip(BUCKETS, hist.bucket_counts):
+                    lines.append(f"{name}_bucket{format_labels(labels + (('le', bound),))} {count}")
+                lines.append(f"{name}_bucket{format_labels(labels + (('le', '+Inf'),))} {hist.count}")
+                lines.append(f"{name}_sum{format_labels(labels)} {hist.total}")
+                lines.append(f"{name}_count{format_labels(labels)} {hist.count}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self):
+        # Snapshot for the periodic log record
+        with self._lock:
+            return {
+                "uptime": time.time() - self.started,
+                "counters": {name + format_labels(labels): value for (name, labels), value in self.counters.items()},
+                "gauges": {name + format_labels(labels): value for (name, labels), value in self.gauges.items()},
+                "histograms": {
+                    name + format_labels(labels): {"count": hist.count, **hist.percentiles()}
+                    for (name, labels), hist in self.histograms.items()
+                },
+            }
+
+
+metrics = Metrics()
+
+
+# ---- Metrics endpoint ----
+async def start_metrics_server(host, port):
+    # Minimal HTTP server answering GET /metrics in the Prometheus text format
+    async def handle(reader, writer):
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), timeout=5)
+            while (await asyncio.wait_for(reader.readline(), timeout=5)) not in (b"\r\n", b"\n", b""):
+                pass
+            parts = request_line.decode("latin-1").split()
+            if len(parts) >= 2 and parts[0] == "GET" and parts[1].split("?")[0] == "/metrics":
+                status, body = "200 OK", metrics.render_prometheus()
+            else:
+                status, body = "404 Not Found", "not found\n"
+            payload = body.encode()
+            writer.write(f"HTTP/1.1 {status}\r\nContent-Type: text/plain; version=0.0.4\r\n"
+                         f"Content-Length: {len(payload)}\r\nConnection: close\r\n\r\n".encode() + payload)
+            await writer.drain()
+        except Exception:
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, host, port)
+    print(f"Metrics available at http://{host}:{port}/metrics")
+    return server
+
+
+async def monitor_loop_lag(interval, shutdown_event):
+    # How late the loop wakes a sleeping task, i.e. how long something held the loop
+    loop = asyncio.get_running_loop()
+    while not shutdown_event.is_set():
+        started = loop.time()
+        await asyncio.sleep(interval)
+        metrics.observe("sellouts_loop_lag_seconds", max(0.0, loop.time() - started - interval))
+
+
+async def summarize_metrics(interval, shutdown_event, write_summary):
+    # Calls write_summary(snapshot) every `interval` seconds with checks/sec since the last one
+    last_checks = metrics.counter_value("sellouts_checks_total")
+    last_time = time.monotonic()
+    while not shutdown_event.is_set():
+        try:
+            await asyncio.wait_for(shutdown_event.wait(), timeout=interval)
+        except asyncio.TimeoutError:
+            pass
+        now = time.monotonic()
+        checks = metrics.counter_value("sellouts_checks_total")
+        snapshot = metrics.summary()
+        snapshot["checks_per_sec"] = (checks - last_checks) / max(now - last_time, 1e-9)
+        last_checks, last_time = checks, now
+        write_summary(snapshot)
@@ -1,162 +1,542 @@
 import os
-import json
 import asyncio
-import smtplib
 import shutil
 import random
-from datetime import datetime
-from email.mime.text import MIMEText
-from bs4 import BeautifulSoup
-from dotenv import load_dotenv
+import time
 import warnings
-import pyppeteer
-from pyppeteer import launch
-from pyppeteer_stealth import stealth
 import signal
+from sellouts import layers, liveconfig, parsing
+from sellouts.parsing import empty_result, evaluate_layers
+from sellouts.network import NetworkWatcher, evaluate_offer_payloads, refetch_offer_payloads, same_site
+from sellouts.alerts import AlertTracker
+from sellouts.logwriter import close_log_writers, log_record, set_rotation
+from sellouts.notify import (EmailChannel, FileChannel, Notifier, SlackChannel, TelegramChannel,
+                             WebhookChannel)
+from sellouts.metrics import metrics, monitor_loop_lag, start_metrics_server, summarize_metrics
+from sellouts.scheduler import AdaptiveScheduler, FixedScheduler, parse_windows
+from sellouts.supervisor import BrowserSupervisor, close_quietly
+from sellouts.recycling import RecyclePolicy
+from sellouts.fingerprint import extracted_fingerprint, html_fingerprint
+from sellouts.blocking import DEFAULT_BLOCK_DOMAINS, DEFAULT_BLOCK_TYPES, ResourceFilter, describe_stats
 
+# Browser, SMTP, HTTP client and SQLite modules are imported where they are first used, so
+# importing this module (e.g. for the parser or the benchmarks) stays quick; see
+# benchmarks/bench_import.py.
 
-# Suppress Pyppeteer shutdown coroutine warning
-pyppeteer.__pyppeteer_await_shutdown__ = False
-warnings.filterwarnings("ignore", category=RuntimeWarning, message="coroutine 'Launcher.killChrome' was never awaited")
+# Event monitored when no EVENTS_FILE is given
+TICKET_URL = "https://www.ticketmaster.co.uk/back-to-the-beginning-birmingham-05-07-2025/event/360062289EF011A5"
 
-# Load environment variables from .env file
-load_dotenv()
-EMAIL_ADDRESS = os.getenv("EMAIL_ADDRESS")
-EMAIL_PASSWORD = os.getenv("EMAIL_PASSWORD")
-RECIPIENT_EMAIL = os.getenv("RECIPIENT_EMAIL")
+# ---- Configuration ----
+# Settings come from the environment (and .env, which configure() loads at startup), with
+# CONFIG_FILE's on top, so importing this module reads no files and needs no credentials.
+def read_settings():
+    EMAIL_ADDRESS = os.getenv("EMAIL_ADDRESS")
+    EMAIL_PASSWORD = os.getenv("EMAIL_PASSWORD")
+    RECIPIENT_EMAIL = os.getenv("RECIPIENT_EMAIL")
+    SMTP_HOST = os.getenv("SMTP_HOST", "smtp.gmail.com")
+    SMTP_PORT = int(os.getenv("SMTP_PORT", "465"))
+    SMTP_SSL = os.getenv("SMTP_SSL", "1") == "1"
+    SMTP_KEEPALIVE = float(os.getenv("SMTP_KEEPALIVE", "60"))  # seconds between NOOPs on an idle connection
+    # Alert channels, comma-separated: email, webhook, telegram, slack, file. All of them are sent
+    # at once, each with NOTIFY_TIMEOUT seconds per attempt and up to NOTIFY_RETRIES retries
+    NOTIFY_CHANNELS = [name.strip() for name in os.getenv("NOTIFY_CHANNELS", "email").split(",") if name.strip()]
+    NOTIFY_TIMEOUT = float(os.getenv("NOTIFY_TIMEOUT", "10"))
+    NOTIFY_RETRIES = int(os.getenv("NOTIFY_RETRIES", "2"))
+    WEBHOOK_URL = os.getenv("WEBHOOK_URL")  # receives the alert as JSON
+    SLACK_WEBHOOK_URL = os.getenv("SLACK_WEBHOOK_URL")
+    TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
+    TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
+    TELEGRAM_API = os.getenv("TELEGRAM_API", "https://api.telegram.org")
+    NOTIFY_FILE = os.getenv("NOTIFY_FILE", "-")  # JSON lines; "-" = stdout
+    # Alerts are sent on availability changes only; changes are batched for ALERT_DIGEST_WINDOW seconds
+    # and an event gets at most one email per ALERT_COOLDOWN seconds
+    ALERT_COOLDOWN = float(os.getenv("ALERT_COOLDOWN", "60"))
+    ALERT_DIGEST_WINDOW = float(os.getenv("ALERT_DIGEST_WINDOW", "0"))
+    # Prometheus-style /metrics endpoint on METRICS_HOST:METRICS_PORT (0 = disabled) and a metrics
+    # summary record in the log every METRICS_SUMMARY_INTERVAL seconds
+    METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+    METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+    METRICS_SUMMARY_INTERVAL = float(os.getenv("METRICS_SUMMARY_INTERVAL", "300"))
+    # JSON-lines log, one record per check/alert; rotated at LOG_MAX_BYTES and/or every LOG_ROTATE_SECONDS
+    # (0 = size only), keeping LOG_BACKUPS compressed segments
+    LOG_FILE = os.getenv("LOG_FILE", "sellouts_log.jsonl")
+    LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+    LOG_ROTATE_SECONDS = float(os.getenv("LOG_ROTATE_SECONDS", "0"))
+    LOG_BACKUPS = int(os.getenv("LOG_BACKUPS", "10"))
+    # SQLite database with every check, offer and alert for `python -m sellouts.history` (empty = off)
+    HISTORY_DB = os.getenv("HISTORY_DB", "sellouts_history.db")
+    # Optional TOML/YAML file with settings and events (see sellouts/liveconfig.py). It is polled every
+    # CONFIG_POLL_INTERVAL seconds and changes to the LIVE_SETTINGS and the event list apply while running
+    CONFIG_FILE = os.getenv("CONFIG_FILE")
+    CONFIG_POLL_INTERVAL = float(os.getenv("CONFIG_POLL_INTERVAL", "2"))
+    # Optional file with one event URL per line; when unset (and CONFIG_FILE has no events) only
+    # TICKET_URL is monitored
+    EVENTS_FILE = os.getenv("EVENTS_FILE")
+    # Discovery API feeder (DISCOVERY=1): sold-out events it finds are added to the monitored events
+    DISCOVERY = os.getenv("DISCOVERY", "0") == "1"
+    TM_API_KEY = os.getenv("TM_API_KEY")
+    DISCOVERY_URL = os.getenv("DISCOVERY_URL")  # default: the Ticketmaster API
+    DISCOVERY_COUNTRY = os.getenv("DISCOVERY_COUNTRY", "GB")
+    DISCOVERY_CLASSIFICATION = os.getenv("DISCOVERY_CLASSIFICATION", "music")
+    DISCOVERY_PAGES = int(os.getenv("DISCOVERY_PAGES", "10"))
+    DISCOVERY_PAGE_SIZE = int(os.getenv("DISCOVERY_PAGE_SIZE", "100"))
+    DISCOVERY_INTERVAL = float(os.getenv("DISCOVERY_INTERVAL", "300"))  # seconds between refreshes
+    DISCOVERY_CACHE_TTL = float(os.getenv("DISCOVERY_CACHE_TTL", "600"))  # seconds before a result page is re-requested
+    DISCOVERY_RATE = float(os.getenv("DISCOVERY_RATE", "4"))  # requests/sec; the API allows 5
+    DISCOVERY_MAX_EVENTS = int(os.getenv("DISCOVERY_MAX_EVENTS", "200"))
+    DISCOVERY_URL_FILTER = os.getenv("DISCOVERY_URL_FILTER", "ticketmaster")
+    DISCOVERY_EVENT_OPTIONS = os.getenv("DISCOVERY_EVENT_OPTIONS", "")  # events-file options for discovered events
+    # Run Chromium without a window (HEADLESS=1), e.g. on servers or for load tests
+    HEADLESS = os.getenv("HEADLESS", "0") == "1"
+    # Attach to a running Chromium instead of launching one, e.g. http://127.0.0.1:9222 from
+    # `python -m sellouts.browserd` (or a ws:// endpoint); its warm tabs are reused
+    BROWSER_ENDPOINT = os.getenv("BROWSER_ENDPOINT", "")
+    # Number of browser pages shared by all monitored events
+    PAGE_POOL_SIZE = int(os.getenv("PAGE_POOL_SIZE", "3"))
+    # Browser supervision: health checks every WATCHDOG_INTERVAL seconds, a page held by one check for
+    # longer than STALL_TIMEOUT seconds is replaced, and pings that take over HEALTH_TIMEOUT count as hung.
+    # A prepared standby page is kept warm for swaps; STANDBY_BROWSER=1 also keeps a second Chromium
+    # running (on its own profile, user_data_standby) so a crash doesn't wait for a cold launch. The
+    # profiles swap on each browser restart; only planned recycles carry the session cookies over.
+    WATCHDOG_INTERVAL = float(os.getenv("WATCHDOG_INTERVAL", "10"))
+    STALL_TIMEOUT = float(os.getenv("STALL_TIMEOUT", "150"))
+    HEALTH_TIMEOUT = float(os.getenv("HEALTH_TIMEOUT", "10"))
+    STANDBY_PAGE = os.getenv("STANDBY_PAGE", "1") == "1"
+    STANDBY_BROWSER = os.getenv("STANDBY_BROWSER", "0") == "1"
+    # Recycling bounds Chromium's memory growth: a page is replaced after RECYCLE_AFTER_CHECKS checks or
+    # RECYCLE_INTERVAL seconds, and the browser when its processes use more than RECYCLE_MAX_RSS_MB (0 = off)
+    RECYCLE_AFTER_CHECKS = int(os.getenv("RECYCLE_AFTER_CHECKS", "1000"))
+    RECYCLE_INTERVAL = float(os.getenv("RECYCLE_INTERVAL", "0"))
+    RECYCLE_MAX_RSS_MB = float(os.getenv("RECYCLE_MAX_RSS_MB", "0"))
+    # HTML extraction engine: "bs4" (BeautifulSoup) or "fast" (streaming parser, falls back to bs4 when unsure)
+    PARSER_ENGINE = os.getenv("PARSER_ENGINE", "bs4")
+    # Seconds to wait for a page load and for WAIT_SELECTOR, the element a page is read after.
+    # Layer 1 reads the role="status" spans whose class contains STATUS_CLASS.
+    PAGE_TIMEOUT = float(os.getenv("PAGE_TIMEOUT", "45"))
+    WAIT_SELECTOR = os.getenv("WAIT_SELECTOR", "script[type='application/ld+json']")
+    STATUS_CLASS = os.getenv("STATUS_CLASS", "VisuallyHidden")
+    # Detection layers run on each page (see sellouts/layers.py; events can override them with
+    # layers=...), how their answers combine ("first", "any" or "all") and whether the detail
+    # layers (JSON-LD offers) run on every check ("always") or only when tickets were found ("found")
+    DETECTION_LAYERS = [name.strip() for name in os.getenv("DETECTION_LAYERS", ",".join(layers.DEFAULT_LAYERS)).split(",")
+                        if name.strip()]
+    DETECTION_COMBINE = os.getenv("DETECTION_COMBINE", "first")
+    DETECTION_DETAILS = os.getenv("DETECTION_DETAILS", "always")
+    # HTML parsing runs in PARSE_WORKERS pre-warmed processes so big pages don't block the event loop
+    # (0 = parse on the loop). Loop lag is sampled every LOOP_LAG_INTERVAL seconds.
+    PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", "2"))
+    LOOP_LAG_INTERVAL = float(os.getenv("LOOP_LAG_INTERVAL", "0.25"))
+    # How page data reaches Python: "content" (full page.content() HTML), "evaluate" (in-page extraction)
+    # or "network" (offer API responses, refetched without reloading the page)
+    EXTRACTION_MODE = os.getenv("EXTRACTION_MODE", "content")
+    # Offer/availability API responses read in network mode
+    OFFER_API_PATTERN = os.getenv("OFFER_API_PATTERN", r"/api/(ismds/event/[^/]+/(facets|offers)|quickpicks/)")
+    # Fetch tier: "browser" renders every check; "http" first fetches the page with a pooled HTTP client
+    # (HTTP/2 when h2 is installed) and only uses a browser page when that is blocked or inconclusive.
+    # After HTTP_MAX_MISSES escalations in a row an event skips the HTTP tier for HTTP_RETRY_AFTER checks.
+    FETCH_TIER = os.getenv("FETCH_TIER", "browser")
+    HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "15"))
+    HTTP2 = os.getenv("HTTP2", "1") == "1"
+    HTTP_MAX_MISSES = int(os.getenv("HTTP_MAX_MISSES", "3"))
+    HTTP_RETRY_AFTER = int(os.getenv("HTTP_RETRY_AFTER", "20"))
+    # Skip parsing and evaluation when the status spans and JSON-LD are unchanged since the last check
+    # (an "unchanged" check record is still written); set FINGERPRINT=0 to evaluate every page in full
+    FINGERPRINT = os.getenv("FINGERPRINT", "1") == "1"
+    # Block images, fonts, media and tracker domains on the monitoring pages (set RESOURCE_FILTER=1)
+    RESOURCE_FILTER = os.getenv("RESOURCE_FILTER", "0") == "1"
+    BLOCK_RESOURCE_TYPES = os.getenv("BLOCK_RESOURCE_TYPES", DEFAULT_BLOCK_TYPES)
+    BLOCK_DOMAINS = os.getenv("BLOCK_DOMAINS", DEFAULT_BLOCK_DOMAINS)
+    ALLOW_DOMAINS = os.getenv("ALLOW_DOMAINS", "")  # always let these through, even if a block rule matches
+    # Polling: "fixed" waits CHECK_INTERVAL_MIN-MAX seconds between checks; "adaptive" also speeds up
+    # inside DROP_WINDOWS, backs off after errors and slows down for unchanged events (MIN/MAX_INTERVAL bounds)
+    SCHEDULER = os.getenv("SCHEDULER", "fixed")
+    CHECK_INTERVAL_MIN = float(os.getenv("CHECK_INTERVAL_MIN", "2"))
+    CHECK_INTERVAL_MAX = float(os.getenv("CHECK_INTERVAL_MAX", "5"))
+    MIN_INTERVAL = float(os.getenv("MIN_INTERVAL", "1"))
+    MAX_INTERVAL = float(os.getenv("MAX_INTERVAL", "120"))
+    STALE_AFTER_HOURS = float(os.getenv("STALE_AFTER_HOURS", "2"))
+    DROP_WINDOWS = os.getenv("DROP_WINDOWS", "")  # e.g. "09:55-10:30,2025-07-05T09:00/2025-07-05T11:00"
+    return {name: value for name, value in locals().items() if name.isupper()}
 
-TICKET_URL = "https://www.ticketmaster.co.uk/back-to-the-beginning-birmingham-05-07-2025/event/360062289EF011A5"
+# Settings a CONFIG_FILE change applies on the next check; others are only read at startup
+LIVE_SETTINGS = {
+    "CHECK_INTERVAL_MIN", "CHECK_INTERVAL_MAX", "MIN_INTERVAL", "MAX_INTERVAL", "STALE_AFTER_HOURS",
+    "DROP_WINDOWS", "PAGE_TIMEOUT", "WAIT_SELECTOR", "STATUS_CLASS", "PARSER_ENGINE", "FINGERPRINT",
+    "ALERT_COOLDOWN", "ALERT_DIGEST_WINDOW", "HTTP_MAX_MISSES", "HTTP_RETRY_AFTER", "EVENTS_FILE",
+    "PAGE_POOL_SIZE", "CONFIG_POLL_INTERVAL", "DETECTION_LAYERS", "DETECTION_COMBINE", "DETECTION_DETAILS",
+}
+
+EXTRACTION_MODES = ("content", "evaluate", "network")
+
+config_events = None  # event lines from CONFIG_FILE, or None when it has no event list
+
+def load_config():
+    # (read_settings() with CONFIG_FILE's settings on top, CONFIG_FILE's event lines or None);
+    # validated, but nothing is applied
+    settings = read_settings()
+    events = None
+    if settings["CONFIG_FILE"]:
+        file_settings, events = liveconfig.read_config(settings["CONFIG_FILE"])
+        for name, value in file_settings.items():
+            if name not in settings or name == "CONFIG_FILE":
+                raise ValueError(f"Unknown setting '{name}' in {settings['CONFIG_FILE']}")
+            settings[name] = liveconfig.coerce(value, settings[name])
+    validate_settings(settings)
+    return settings, events
 
-# Check for required environment variables
-required_env_vars = [EMAIL_ADDRESS, EMAIL_PASSWORD, RECIPIENT_EMAIL]
-if not all(required_env_vars):
-    raise EnvironmentError("One or more required environment variables (EMAIL_ADDRESS, EMAIL_PASSWORD, RECIPIENT_EMAIL) are missing.")
+def config_settings():
+    # load_config()'s settings; also sets config_events
+    global config_events
+    settings, config_events = load_config()
+    return settings
+
+def validate_settings(settings):
+    if settings["EXTRACTION_MODE"] not in EXTRACTION_MODES:
+        raise ValueError(f"EXTRACTION_MODE must be one of {', '.join(EXTRACTION_MODES)}")
+    parse_windows(settings["DROP_WINDOWS"])
+    layers.parse_layer_names(settings["DETECTION_LAYERS"])
+    if settings["DETECTION_COMBINE"] not in layers.COMBINE_RULES:
+        raise ValueError(f"DETECTION_COMBINE must be one of {', '.join(layers.COMBINE_RULES)}")
+    if settings["DETECTION_DETAILS"] not in layers.DETAIL_RULES:
+        raise ValueError(f"DETECTION_DETAILS must be one of {', '.join(layers.DETAIL_RULES)}")
+
+# Defaults from the process environment until configure() runs
+globals().update(read_settings())
 
 user_data_dir = os.path.join(os.getcwd(), 'user_data')  # Persistent user-data directory for cookies/session
-os.makedirs(user_data_dir, exist_ok=True)
+standby_user_data_dir = os.path.join(os.getcwd(), 'user_data_standby')  # Standby browser and browser recycles
+
+network_watcher = None
+resource_filter = None
+
+def configure(check_email=True):
+    # Called once at startup by main() and the cluster and browser-host entry points
+    global network_watcher, resource_filter
+    from dotenv import load_dotenv
+    # Load environment variables from .env file
+    load_dotenv()
+    globals().update(config_settings())
+    # Check for required environment variables
+    required_env_vars = [EMAIL_ADDRESS, EMAIL_PASSWORD, RECIPIENT_EMAIL]
+    if check_email and "email" in NOTIFY_CHANNELS and not all(required_env_vars):
+        raise EnvironmentError("One or more required environment variables (EMAIL_ADDRESS, EMAIL_PASSWORD, RECIPIENT_EMAIL) are missing.")
+    set_rotation(LOG_MAX_BYTES, LOG_ROTATE_SECONDS, LOG_BACKUPS)
+    network_watcher = NetworkWatcher(OFFER_API_PATTERN) if EXTRACTION_MODE == "network" else None
+    resource_filter = ResourceFilter(BLOCK_RESOURCE_TYPES, BLOCK_DOMAINS, ALLOW_DOMAINS) if RESOURCE_FILTER else None
+
+def reload_config():
+    # Re-reads CONFIG_FILE and applies the live settings; returns (names of the settings that
+    # changed, the new event list). The settings and the event list are both loaded before
+    # anything is applied, so a file with an error in either leaves everything as it was.
+    global config_events
+    settings, lines = load_config()
+    live = {name: value for name, value in settings.items() if name in LIVE_SETTINGS}
+    events = read_events(lines, live["EVENTS_FILE"])
+    for name, value in settings.items():
+        if name not in LIVE_SETTINGS and value != globals()[name]:
+            print(f"{name} changed in {CONFIG_FILE}; restart to apply it.")
+    changed = {name for name, value in live.items() if value != globals()[name]}
+    globals().update(live)
+    config_events = lines
+    return changed, events
+
+async def watch_config(shutdown_event, on_reload):
+    # Polls CONFIG_FILE (and EVENTS_FILE) and awaits on_reload(changed setting names, events)
+    # after each change. A file that fails to load (e.g. caught mid-save) leaves everything as it was.
+    watcher = liveconfig.FileWatcher([CONFIG_FILE, EVENTS_FILE])
+    while not shutdown_event.is_set():
+        try:
+            await asyncio.wait_for(shutdown_event.wait(), timeout=CONFIG_POLL_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+        if shutdown_event.is_set() or not watcher.changed():
+            continue
+        try:
+            changed, events = reload_config()
+            if "EVENTS_FILE" in changed:
+                watcher.watch([CONFIG_FILE, EVENTS_FILE])
+            await on_reload(changed, events)
+        except Exception as e:
+            print(f"Could not apply {CONFIG_FILE}:", e)
+            continue
+        print(f"Reloaded {CONFIG_FILE}" + (f" ({', '.join(sorted(changed))} changed)." if changed else "."))
+        metrics.inc("sellouts_config_reloads_total")
+        log_record(LOG_FILE, {"type": "config", "file": CONFIG_FILE, "changed": sorted(changed)})
+
+def import_httpx():
+    from sellouts.httpfetch import httpx
+    return httpx
 
-# ---- Email Alert ----
-async def send_email_alert(details, log_file):
-    subject = "Tickets Available!"
-    body = f"Tickets have been found!\n{TICKET_URL}\n\nDetails:\n"
+# ---- Alerts ----
+notifier = None
+
+def start_notifier(log_file=None):
+    global notifier
+    log_file = log_file or LOG_FILE
+    channels = []
+    client = None
+    if any(name in NOTIFY_CHANNELS for name in ("webhook", "slack", "telegram")):
+        httpx = import_httpx()
+        if httpx is None:
+            raise ValueError("Webhook, Slack and Telegram alerts need httpx (pip install httpx)")
+        client = httpx.AsyncClient(timeout=NOTIFY_TIMEOUT)
+    for name in NOTIFY_CHANNELS:
+        if name == "email":
+            from sellouts.mailer import EmailDispatcher
+            dispatcher = EmailDispatcher(SMTP_HOST, SMTP_PORT, SMTP_SSL, EMAIL_ADDRESS, EMAIL_PASSWORD,
+                                         keepalive=SMTP_KEEPALIVE)
+            dispatcher.start()
+            channels.append(EmailChannel(dispatcher, EMAIL_ADDRESS, RECIPIENT_EMAIL, log_file))
+        elif name == "webhook" and WEBHOOK_URL:
+            channels.append(WebhookChannel(WEBHOOK_URL, client))
+        elif name == "slack" and SLACK_WEBHOOK_URL:
+            channels.append(SlackChannel(SLACK_WEBHOOK_URL, client))
+        elif name == "telegram" and TELEGRAM_BOT_TOKEN and TELEGRAM_CHAT_ID:
+            channels.append(TelegramChannel(TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID, client, TELEGRAM_API))
+        elif name == "file":
+            channels.append(FileChannel(NOTIFY_FILE))
+        else:
+            raise ValueError(f"Alert channel '{name}' is unknown or not configured")
+    notifier = Notifier(channels, log_file, NOTIFY_TIMEOUT, NOTIFY_RETRIES, client)
+    print("Alert channels: " + ", ".join(channel.name for channel in channels))
+
+async def close_notifier():
+    global notifier
+    if notifier:
+        await notifier.close()
+        notifier = None
+
+# ---- History Store ----
+history_store = None
+
+def start_history_store():
+    global history_store
+    if HISTORY_DB:
+        from sellouts.history import HistoryStore
+        history_store = HistoryStore(HISTORY_DB)
+
+def close_history_store():
+    global history_store
+    if history_store:
+        history_store.close()
+        history_store = None
+
+# ---- HTTP Fetch Tier ----
+http_fetcher = None
+
+def start_http_fetcher(max_connections):
+    global http_fetcher
+    if FETCH_TIER != "http":
+        return
+    if import_httpx() is None:
+        print("FETCH_TIER=http needs httpx (pip install 'httpx[http2]'); checking with the browser only.")
+        return
+    from sellouts.httpfetch import HttpFetcher
+    http_fetcher = HttpFetcher(USER_AGENT, HTTP_TIMEOUT, HTTP2, max_connections, conditional=FINGERPRINT)
+
+async def send_alert(details, log_file, event_url=TICKET_URL, changes=None):
+    # Hands the alert to the notifier; the channels are sent in the background
+    body = f"Tickets have been found!\n{event_url}\n\n"
+    if changes:
+        body += "Changes:\n" + "\n".join(changes) + "\n\n"
+    body += "Details:\n"
     body += "\n".join(details) if details else "(No extra details found)"
-    msg = MIMEText(body)
-    msg["Subject"] = subject
-    msg["From"] = EMAIL_ADDRESS
-    msg["To"] = RECIPIENT_EMAIL
-    try:
-        with smtplib.SMTP_SSL("smtp.gmail.com", 465) as server:
-            server.login(EMAIL_ADDRESS, EMAIL_PASSWORD)
-            server.sendmail(EMAIL_ADDRESS, RECIPIENT_EMAIL, msg.as_string())
-        print("Email sent!")
-        with open(log_file, "a") as f:
-            f.write(f"[{datetime.now()}] EMAIL SENT \n{body}\n\n")
-    except Exception as e:
-        print("Failed to send email:", e)
-        import traceback
-        traceback.print_exc()
-        with open(log_file, "a") as f:
-            f.write(f"[{datetime.now()}] EMAIL FAILED TO SEND: {e}\n\n")
+    if notifier is None:
+        start_notifier(log_file)
+    notifier.notify({"event": event_url, "subject": "Tickets Available!", "text": body, "changes": changes or [],
+                     "details": details or [], "ts": time.time()})
+    metrics.inc("sellouts_alerts_total")
+    if history_store:
+        history_store.record_alert(event_url, changes)
 
 # ---- Ticket availability check logic ----
-async def check_ticket_availability(html_content, log_file):
+def extract_availability_data(html_content, engine=None):
+    return parsing.extract_availability_data(html_content, engine or PARSER_ENGINE, STATUS_CLASS)
+
+parse_executor = None
+parse_rebuild = None  # task replacing a broken pool
+
+async def start_parse_executor():
+    # Also used to replace a broken pool; checks parse on the loop until the new one is warm
+    global parse_executor
+    if PARSE_WORKERS <= 0:
+        return
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    # Not forked: by now the log, mail and history threads are running, and a forked child
+    # could inherit one of their locks held
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    executor = ProcessPoolExecutor(PARSE_WORKERS, mp_context=multiprocessing.get_context(method),
+                                   initializer=parsing.warm_up)
+    # Workers start lazily; make them all start now rather than during the first checks
+    loop = asyncio.get_running_loop()
     try:
-        soup = BeautifulSoup(html_content, "html.parser")
-        match_layers = []
-        layer_results = []
-        jsonld_details = []
+        await asyncio.gather(*(loop.run_in_executor(executor, time.sleep, 0.1) for _ in range(PARSE_WORKERS)))
+    except BaseException:
+        executor.shutdown(wait=False, cancel_futures=True)
+        raise
+    parse_executor = executor
+    print(f"Parse pool ready with {PARSE_WORKERS} worker(s).")
 
-        # --- Layer 1: VisuallyHidden result span (multiple occurrences) ---
-        try:
-            vh_spans = soup.find_all('span', {'role': 'status', 'class': lambda c: c and 'VisuallyHidden' in c})
-            if vh_spans:
-                vh_found = False
-                for idx, vh_span in enumerate(vh_spans):
-                    vh_text = vh_span.get_text(strip=True)
-                    if vh_text.lower().startswith("0 no results"):
-                        layer_results.append(f"[Layer 1: VisuallyHidden] NO TICKETS (span #{idx+1}, text: '{vh_text}')")
-                    else:
-                        layer_results.append(f"[Layer 1: VisuallyHidden] TICKETS POSSIBLY AVAILABLE (span #{idx+1}, text: '{vh_text}')")
-                        vh_found = True
-                if vh_found:
-                    match_layers.append("Layer 1: VisuallyHidden")
-            else:
-                layer_results.append("[Layer 1: VisuallyHidden] No VisuallyHidden span found")
-        except Exception as e:
-            layer_results.append(f"[Layer 1: VisuallyHidden] ERROR: {e}")
+def rebuild_parse_executor():
+    # Keeps a reference to the task, so it isn't garbage-collected mid-run, and starts one at a time
+    global parse_rebuild
+    if parse_rebuild is None or parse_rebuild.done():
+        parse_rebuild = asyncio.ensure_future(start_parse_executor())
+        parse_rebuild.add_done_callback(report_parse_rebuild)
+
+def report_parse_rebuild(task):
+    if not task.cancelled() and task.exception() is not None:
+        print("Could not restart the parse pool; parsing on the event loop:", task.exception())
 
-        # --- Layer 2: JSON-LD ticket offer ---
+def close_parse_executor():
+    global parse_executor
+    if parse_rebuild is not None:
+        parse_rebuild.cancel()
+    if parse_executor:
+        parse_executor.shutdown(wait=False, cancel_futures=True)
+        parse_executor = None
+
+def event_layers(event):
+    return (event.layers if event is not None else None) or DETECTION_LAYERS
+
+async def parse_html(html_content, engine=None, layer_names=None):
+    # Returns (result, timings); uses the parse pool when there is one
+    global parse_executor
+    engine = engine or PARSER_ENGINE
+    layer_names = layer_names or DETECTION_LAYERS
+    executor = parse_executor
+    if executor:
+        from concurrent.futures.process import BrokenProcessPool
+        started = time.perf_counter()
         try:
-            scripts = soup.find_all("script", type="application/ld+json")
-            found_in_json = False
-            for script in scripts:
-                try:
-                    if not script.string:
-                        continue
-                    data = json.loads(script.string.strip())
-                    entries = data if isinstance(data, list) else [data]
-                    for entry in entries:
-                        if entry.get("@type") != "MusicEvent":
-                            continue
-                        # Extract event info
-                        event_name = entry.get("name")
-                        event_date = entry.get("startDate")
-                        venue = entry.get("location", {}).get("name")
-                        address = entry.get("location", {}).get("address", {}).get("streetAddress")
-                        city = entry.get("location", {}).get("address", {}).get("addressLocality")
-                        offers = entry.get("offers")
-                        if not offers:
-                            continue
-                        offers = offers if isinstance(offers, list) else [offers]
-                        for offer in offers:
-                            if not isinstance(offer, dict):
-                                continue
-                            availability = offer.get("availability")
-                            url = offer.get("url")
-                            price = offer.get("price")
-                            currency = offer.get("priceCurrency")
-                            description = offer.get("description")
-                            # Compose details string
-                            details_str = f"Event: {event_name} | Date: {event_date} | Venue: {venue}, {address}, {city} | "
-                            details_str += f"Availability: {availability} | URL: {url} | Price: {price or 'N/A'} {currency or ''} | Description: {description or 'N/A'}"
-                            jsonld_details.append(details_str)
-                            if availability == "http://schema.org/InStock":
-                                found_in_json = True
-                except Exception:
-                    continue
-            if found_in_json:
-                layer_results.append("[Layer 2: JSON-LD] TICKETS POSSIBLY AVAILABLE (InStock offer found)")
-                match_layers.append("Layer 2: JSON-LD")
-                if jsonld_details:
-                    layer_results.extend([f"[Layer 2: JSON-LD] {d}" for d in jsonld_details])
-            else:
-                layer_results.append("[Layer 2: JSON-LD] NO TICKETS (no matching offers)")
-        except Exception as e:
-            layer_results.append(f"[Layer 2: JSON-LD] ERROR: {e}")
+            result, timings = await asyncio.get_running_loop().run_in_executor(
+                executor, parsing.parse_html, html_content, engine, STATUS_CLASS, layer_names,
+                DETECTION_COMBINE, DETECTION_DETAILS)
+            timings["parse_queue"] = time.perf_counter() - started - timings["parse"] - timings["evaluate"]
+            return result, timings
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for memory); parse here until a fresh pool is warmed up
+            if parse_executor is executor:
+                print("Parse pool broke; restarting it.")
+                executor.shutdown(wait=False)
+                parse_executor = None
+                rebuild_parse_executor()
+    return parsing.parse_html(html_content, engine, STATUS_CLASS, layer_names, DETECTION_COMBINE, DETECTION_DETAILS)
+
+def write_check_log(result, log_file, event_url=None, timings=None):
+    timings = timings or {}
+    result["timings"] = timings  # cluster workers send them on with the result
+    for stage, seconds in timings.items():
+        metrics.observe("sellouts_stage_seconds", seconds, stage=stage)
+    started = time.perf_counter()
+    log_record(log_file, {
+        "type": "check",
+        "event": event_url,
+        "tier": result.get("tier", "browser"),
+        "found": result["found"],
+        "layers": result.get("layers", {}),
+        "decided_by": result.get("decided_by"),
+        "skipped": result.get("skipped", []),
+        "layer_results": result["layer_results"],
+        "offers": result["offers"],
+        "timings": timings,
+    })
+    if history_store:
+        history_store.record_check(event_url, result, timings)
+    record_layer_metrics(result)
+    metrics.observe("sellouts_stage_seconds", time.perf_counter() - started, stage="log")
+    print("Check result logged.")
 
-        # Only consider tickets found if Layer 1 (VisuallyHidden) passes (confirmed for Ozzy and Lzzy)
-        found = "Layer 1: VisuallyHidden" in match_layers
+def record_layer_metrics(result):
+    # Hit rate per layer = found + none over runs; layer cost is the "layer_<name>" stage
+    verdicts = {True: "found", False: "none", None: "undecided"}
+    for label, verdict in result.get("layers", {}).items():
+        metrics.inc("sellouts_layer_checks_total", layer=label, verdict=verdicts[verdict])
+    for label in result.get("skipped", []):
+        metrics.inc("sellouts_layer_checks_total", layer=label, verdict="skipped")
+    if result.get("decided_by"):
+        metrics.inc("sellouts_layer_decisions_total", layer=result["decided_by"])
 
-        with open(log_file, "a") as f:
-            f.write(f"[{datetime.now()}] CHECK RESULT: {'FOUND' if found else 'NONE'}\n")
-            for line in layer_results:
-                f.write(line + "\n")
-            if jsonld_details:
-                f.write("Details:\n" + "\n".join(jsonld_details) + "\n")
-            f.write("-" * 60 + "\n")
-        print("Results written to log file.")
+def unchanged_result(event, fingerprint, log_file, timings, tier="browser"):
+    # The previous result when the fingerprint matches it, else None
+    if not FINGERPRINT or fingerprint is None or fingerprint != event.fingerprint or event.last_result is None:
+        return None
+    for stage, seconds in timings.items():
+        metrics.observe("sellouts_stage_seconds", seconds, stage=stage)
+    metrics.inc("sellouts_unchanged_total", tier=tier)
+    result = dict(event.last_result, tier=tier, unchanged=True, timings=timings)
+    log_record(log_file, {"type": "check", "event": event.url, "tier": tier, "unchanged": True,
+                          "found": result["found"], "timings": timings})
+    if history_store:
+        history_store.record_check(event.url, result, timings, unchanged=True)
+    print("Check result unchanged.")
+    return result
 
-        return found, jsonld_details
+def remember_result(event, fingerprint, result):
+    if result["layers"]:
+        event.fingerprint = fingerprint
+        event.last_result = result
+
+def write_metrics_summary(snapshot, log_file):
+    parts = [f"{snapshot['checks_per_sec']:.2f} checks/s"]
+    for name, hist in sorted(snapshot["histograms"].items()):
+        if hist["count"]:
+            parts.append(f"{name} p50={hist['p50']:.3f}s p95={hist['p95']:.3f}s p99={hist['p99']:.3f}s")
+    print("Metrics: " + "; ".join(parts))
+    log_record(log_file, {"type": "metrics", **snapshot})
+
+def write_filter_log(stats, log_file, event_url):
+    print(f"Request filter: {describe_stats(stats)}")
+    log_record(log_file, {"type": "request_filter", "event": event_url, **stats})
+
+async def check_result_from_extracted(status_texts, jsonld_blobs, log_file, event_url=None, timings=None,
+                                      layer_names=None, extra=None):
+    # Shared by every extraction mode: runs the detection layers on already-extracted data
+    timings = timings if timings is not None else {}
+    try:
+        started = time.perf_counter()
+        result = evaluate_layers(status_texts, jsonld_blobs, layer_names or DETECTION_LAYERS, DETECTION_COMBINE,
+                                 timings, extra, DETECTION_DETAILS)
+        timings["evaluate"] = time.perf_counter() - started
+        write_check_log(result, log_file, event_url, timings)
+        return result
     except Exception as e:
         print("Error in check_ticket_availability:", e)
         import traceback
         traceback.print_exc()
-        return False, []
+        return empty_result()
+
+async def check_result_from_html(html_content, log_file, event_url=None, engine=None, timings=None,
+                                 layer_names=None):
+    timings = timings if timings is not None else {}
+    try:
+        result, parse_timings = await parse_html(html_content, engine, layer_names)
+        timings.update(parse_timings)
+        write_check_log(result, log_file, event_url, timings)
+        return result
+    except Exception as e:
+        print("Error in check_ticket_availability:", e)
+        import traceback
+        traceback.print_exc()
+        return empty_result()
+
+async def check_extracted_availability(status_texts, jsonld_blobs, log_file, event_url=None):
+    result = await check_result_from_extracted(status_texts, jsonld_blobs, log_file, event_url)
+    return result["found"], result["details"]
+
+async def check_ticket_availability(html_content, log_file, event_url=None, engine=None):
+    result = await check_result_from_html(html_content, log_file, event_url, engine)
+    return result["found"], result["details"]
 
 # ---- Shutdown and Cleanup ----
 async def shutdown(browser):
     try:
-        if browser:
+        if browser and BROWSER_ENDPOINT:
+            # Leave the shared browser and its warm tabs running for the next start
+            await browser.disconnect()
+            print("Detached from the browser.")
+        elif browser:
             await browser.close()
     except Exception as e:
         print("Error during browser shutdown:", e)
@@ -171,10 +551,446 @@ def get_chrome_path():
             return path
     return None
 
+# ---- Event List ----
+class MonitoredEvent:
+    def __init__(self, url, min_interval=None, max_interval=None, windows=None, spec=None, layers=None):
+        self.url = url
+        self.spec = spec or url  # the events-file line, so the event can be sent to a cluster worker
+        self.check_count = 0
+        self.offer_payloads = {}  # offer API endpoint -> last payload (network mode)
+        self.http_misses = 0  # consecutive HTTP tier escalations
+        self.http_skip = 0  # checks left before the HTTP tier is tried again
+        self.fingerprint = None  # fingerprint of the fragments behind last_result
+        self.last_result = None
+        # Per-event overrides for the adaptive scheduler
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.windows = windows or []
+        self.layers = layers  # detection layer names; None = DETECTION_LAYERS
+
+def parse_event_line(line):
+    # "URL [min_interval=1] [max_interval=60] [window=09:55-10:30] [layers=sold_out_banner,visually_hidden] ..."
+    url, *options = line.split()
+    settings = {}
+    windows = []
+    for option in options:
+        key, _, value = option.partition("=")
+        if key == "window":
+            windows.extend(parse_windows(value))
+        elif key in ("min_interval", "max_interval"):
+            settings[key] = float(value)
+        elif key == "layers":
+            settings.setdefault("layers", []).extend(layers.parse_layer_names(value))
+        else:
+            raise ValueError(f"Unknown event option '{key}' for {url}")
+    return MonitoredEvent(url, windows=windows, spec=line, **settings)
+
+def update_event(event, new):
+    # Applies changed options from a reloaded event list, keeping the event's check state
+    event.spec = new.spec
+    event.min_interval = new.min_interval
+    event.max_interval = new.max_interval
+    event.windows = new.windows
+    if new.layers != event.layers:
+        event.layers = new.layers
+        event.fingerprint = None
+        event.last_result = None
+
+def parse_event_lines(lines):
+    # One event URL per line, optionally followed by key=value options;
+    # blank lines and '#' comments are ignored
+    events = {}
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        event = parse_event_line(line)
+        if event.url not in events:
+            events[event.url] = event
+    return list(events.values())
+
+def load_events(path):
+    with open(path) as f:
+        return parse_event_lines(f)
+
+def read_events(config_lines, events_file):
+    if config_lines is not None:
+        return parse_event_lines(config_lines)
+    if events_file:
+        return load_events(events_file)
+    return [MonitoredEvent(TICKET_URL)]
+
+def get_events():
+    return read_events(config_events, EVENTS_FILE)
+
+def start_discovery():
+    if not DISCOVERY:
+        return None
+    if import_httpx() is None:
+        print("DISCOVERY=1 needs httpx (pip install httpx); not discovering events.")
+        return None
+    if not TM_API_KEY and not DISCOVERY_URL:
+        print("DISCOVERY=1 needs TM_API_KEY; not discovering events.")
+        return None
+    from sellouts import discovery
+    return discovery.DiscoveryFeeder(TM_API_KEY, DISCOVERY_URL or discovery.DISCOVERY_URL, DISCOVERY_COUNTRY, DISCOVERY_CLASSIFICATION,
+                                     DISCOVERY_PAGES, DISCOVERY_PAGE_SIZE, DISCOVERY_CACHE_TTL, DISCOVERY_RATE,
+                                     url_contains=DISCOVERY_URL_FILTER, max_events=DISCOVERY_MAX_EVENTS)
+
+def discovered_events(urls):
+    return [parse_event_line(f"{url} {DISCOVERY_EVENT_OPTIONS}".strip()) for url in urls]
+
+def create_scheduler():
+    if SCHEDULER == "adaptive":
+        return AdaptiveScheduler(CHECK_INTERVAL_MIN, CHECK_INTERVAL_MAX, MIN_INTERVAL, MAX_INTERVAL,
+                                 STALE_AFTER_HOURS, parse_windows(DROP_WINDOWS))
+    if SCHEDULER != "fixed":
+        print(f"Unknown scheduler '{SCHEDULER}', using fixed intervals.")
+    return FixedScheduler(CHECK_INTERVAL_MIN, CHECK_INTERVAL_MAX)
+
+def update_scheduler(scheduler):
+    # Applies reloaded interval settings in place, so the adaptive scheduler keeps its per-event state
+    scheduler.check_min = CHECK_INTERVAL_MIN
+    scheduler.check_max = CHECK_INTERVAL_MAX
+    if isinstance(scheduler, AdaptiveScheduler):
+        scheduler.min_interval = MIN_INTERVAL
+        scheduler.max_interval = MAX_INTERVAL
+        scheduler.stale_after = STALE_AFTER_HOURS * 3600
+        scheduler.windows = parse_windows(DROP_WINDOWS)
+
+def apply_live_settings(changed, events, scheduler, alert_tracker=None):
+    # Pushes reloaded settings into the running objects; everything else reads them per check
+    if scheduler and changed & {"CHECK_INTERVAL_MIN", "CHECK_INTERVAL_MAX", "MIN_INTERVAL", "MAX_INTERVAL",
+                                 "STALE_AFTER_HOURS", "DROP_WINDOWS"}:
+        update_scheduler(scheduler)
+    if alert_tracker:
+        alert_tracker.cooldown = ALERT_COOLDOWN
+        alert_tracker.digest_window = ALERT_DIGEST_WINDOW
+    if changed & {"STATUS_CLASS", "PARSER_ENGINE", "FINGERPRINT", "DETECTION_LAYERS", "DETECTION_COMBINE",
+                   "DETECTION_DETAILS"}:
+        # A page that hasn't changed can still give a different result now; evaluate it in full
+        # (without a last result, a 304 from the HTTP tier is refetched in full too)
+        for event in events:
+            event.fingerprint = None
+            event.last_result = None
+
+def pool_size_for(event_count, discovering=False):
+    # Pages to open: one per event up to PAGE_POOL_SIZE, or all of them when events can be discovered
+    return PAGE_POOL_SIZE if discovering else max(1, min(PAGE_POOL_SIZE, event_count))
+
+# ---- Page Setup ----
+STEALTH_SCRIPT = """
+        (() => {
+        // 1. Hide the `navigator.webdriver` property to avoid Selenium/Pyppeteer detection
+        Object.defineProperty(navigator, 'webdriver', {
+            get: () => undefined,
+            configurable: true
+        });
+        // 2. Spoof `navigator.languages` to a typical user-preferred languages array
+        Object.defineProperty(navigator, 'languages', {
+            get: () => ['en-US', 'en']
+        });
+        // 3. Spoof `navigator.platform` to a common platform value
+        Object.defineProperty(navigator, 'platform', {
+            get: () => 'Win32'
+        });
+        // 4. Spoof `navigator.deviceMemory` to a typical memory size in GB
+        Object.defineProperty(navigator, 'deviceMemory', {
+            get: () => 8
+        });
+        // 5. Spoof `navigator.hardwareConcurrency` to a typical number of CPU cores
+        Object.defineProperty(navigator, 'hardwareConcurrency', {
+            get: () => 4
+        });
+        // 6. Spoof `navigator.plugins` to simulate installed plugins (avoid empty plugins list)
+        if (navigator.plugins && navigator.plugins.length === 0) {
+            Object.defineProperty(navigator, 'plugins', {
+                get: () => [1, 2, 3]
+            });
+        }
+        // 7. Canvas fingerprint spoofing: override toDataURL to return a fake image in certain cases
+        const originalToDataURL = HTMLCanvasElement.prototype.toDataURL;
+        Object.defineProperty(HTMLCanvasElement.prototype, 'toDataURL', {
+            value: function(...args) {
+                const [type, ...rest] = args;
+                if (type === 'image/png' && this.width === 220 && this.height === 30) {
+                    return 'data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAANwAAAAeCAIAAADIGOdpAAAAbElEQVR4nO3SMQEAIAzAMMC/5/FjgB6Jgh7dM7Og5PwOgJcpyTElOaYkx5TkmJIcU5JjSnJMSY4pyTElOaYkx5TkmJIcU5JjSnJMSY4pyTElOaYkx5TkmJIcU5JjSnJMSY4pyTElOaYkx5TkXOL+AznTluWxAAAAAElFTkSuQmCC';
+                }
+                return originalToDataURL.apply(this, args);
+            }
+        });
+        // 8. Audio fingerprint spoofing: override AudioBuffer.getChannelData to return altered data
+        const originalGetChannelData = AudioBuffer.prototype.getChannelData;
+        Object.defineProperty(AudioBuffer.prototype, 'getChannelData', {
+            value: function(...args) {
+                const originalBuffer = originalGetChannelData.apply(this, args);
+                const newBuffer = new Float32Array(originalBuffer);
+                if (newBuffer.length > 0) {
+                    newBuffer[0] += 0.0001;
+                }
+                return newBuffer;
+            }
+        });
+    })();
+    """
+
+# ---- In-page Extraction ----
+# Collects only what the detection layers need, mirroring extract_availability_data(), so the
+# whole DOM never has to be serialized over the DevTools websocket. Called with STATUS_CLASS.
+EXTRACT_SCRIPT = """
+(statusClass) => {
+    const textOf = (el) => {
+        // Same as BeautifulSoup's get_text(strip=True): trimmed text nodes joined with no separator
+        const walker = document.createTreeWalker(el, NodeFilter.SHOW_TEXT);
+        const parts = [];
+        let node;
+        while ((node = walker.nextNode())) {
+            const parent = node.parentNode && node.parentNode.nodeName;
+            if (parent === 'SCRIPT' || parent === 'STYLE') {
+                continue;
+            }
+            const text = node.nodeValue.trim();
+            if (text) {
+                parts.push(text);
+            }
+        }
+        return parts.join('');
+    };
+    const spans = Array.from(document.querySelectorAll('span[role="status"]'))
+        .filter((el) => (el.getAttribute('class') || '').includes(statusClass));
+    const scripts = Array.from(document.querySelectorAll('script[type="application/ld+json"]'));
+    // For the resultCount, sold-out banner and ticket-list layers
+    const resultCount = document.querySelector('span[class*="resultCount"]');
+    const banner = document.querySelector('span[data-testid="message-bar-text"]');
+    return {
+        status_texts: spans.map(textOf),
+        jsonld_blobs: scripts.map((el) => el.textContent || null),
+        extra: {
+            result_count: resultCount ? textOf(resultCount) : null,
+            banner: banner ? textOf(banner) : null,
+            ticket_list: document.querySelector('[data-testid="ticket-list"]') !== null,
+        },
+    };
+}
+"""
+
+USER_AGENT = (
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) '
+    'AppleWebKit/537.36 (KHTML, like Gecko) '
+    'Chrome/114.0.5735.110 Safari/537.36'
+)
+
+async def prepare_page(page):
+    from pyppeteer_stealth import stealth
+    await page.setUserAgent(USER_AGENT)
+    await stealth(page)
+    await page.evaluateOnNewDocument(STEALTH_SCRIPT)
+    if network_watcher:
+        network_watcher.attach(page)
+    if resource_filter:
+        await resource_filter.attach(page)
+
+def import_pyppeteer():
+    import pyppeteer
+    # Suppress Pyppeteer shutdown coroutine warning
+    pyppeteer.__pyppeteer_await_shutdown__ = False
+    warnings.filterwarnings("ignore", category=RuntimeWarning, message="coroutine 'Launcher.killChrome' was never awaited")
+    return pyppeteer
+
+CHROME_ARGS = [
+    "--start-maximized",
+    "--no-sandbox",
+    "--disable-setuid-sandbox",
+    "--disable-dev-shm-usage",
+    "--disable-blink-features=AutomationControlled",
+    "--disable-infobars"
+]
+
+async def launch_browser(profile_dir):
+    if BROWSER_ENDPOINT:
+        return await connect_browser(BROWSER_ENDPOINT)
+    os.makedirs(profile_dir, exist_ok=True)
+    return await import_pyppeteer().launch({
+        "headless": HEADLESS,
+        "userDataDir": profile_dir,  # Store cookies/session info
+        "executablePath": get_chrome_path(),
+        "args": CHROME_ARGS,
+        "ignoreDefaultArgs": ["--enable-automation"],
+    })
+
+async def connect_browser(endpoint, timeout=60):
+    # Waits (up to `timeout` seconds) for the browser host to have Chromium up, e.g. while it
+    # relaunches one the supervisor closed
+    from sellouts.browserd import read_endpoint
+    pyppeteer = import_pyppeteer()
+    deadline = time.monotonic() + timeout
+    while True:
+        ws_endpoint = endpoint if endpoint.startswith("ws") else await asyncio.to_thread(read_endpoint, endpoint)
+        if ws_endpoint:
+            try:
+                browser = await pyppeteer.connect({"browserWSEndpoint": ws_endpoint})
+                print(f"Attached to the browser at {endpoint}.")
+                return browser
+            except Exception as e:
+                print(f"Could not attach to {endpoint}:", e)
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"No browser answering at {endpoint}")
+        await asyncio.sleep(1)
+
+# ---- Page Pool ----
+# A fixed number of prepared pages shared by all events, so browser memory and CPU
+# scale with the pool size rather than with the number of monitored events.
+# Pages that are replaced (see sellouts/supervisor.py) are dropped when they come back.
+class PagePool:
+    def __init__(self, browser, size, standby=True):
+        self.browser = browser
+        self.size = size
+        self.use_standby = standby
+        self.pages = []
+        self.busy = {}  # page -> (event url, time.monotonic() when acquired)
+        self.uses = {}  # page -> checks run on it
+        self.opened = {}  # page -> time.monotonic() when it joined the pool
+        self.standby = None
+        self.supervisor = None
+        self.retired = set()  # pages dropped by resize() while a check was using them
+        self.probing = {}  # idle page -> True if acquire() passed it over during a health probe
+        self._idle = asyncio.Queue()
+
+    async def start(self):
+        await self.rebind(self.browser, await self.open_pages(self.browser))
+        print(f"Page pool ready with {self.size} page(s).")
+
+    async def new_page(self, browser=None):
+        page = await (browser or self.browser).newPage()
+        await prepare_page(page)
+        return page
+
+    async def open_pages(self, browser):
+        # Prepared pages for the pool (plus the standby page) on a freshly launched browser.
+        # Tabs that are already open are reused; on an attached browser they are still on the
+        # event pages from the last run, so the first checks reload rather than navigate.
+        existing = await browser.pages()
+        pages = []
+        for idx in range(self.size + (1 if self.use_standby else 0)):
+            if idx < len(existing):
+                await prepare_page(existing[idx])
+                pages.append(existing[idx])
+            else:
+                pages.append(await self.new_page(browser))
+        return pages
+
+    async def rebind(self, browser, pages):
+        # Switch the pool to `pages` on `browser`; pages from the previous browser are dropped
+        self.browser = browser
+        self.pages = pages[:self.size]
+        self.standby = pages[self.size] if len(pages) > self.size else None
+        self.busy.clear()
+        self.uses.clear()
+        self.opened.clear()
+        self.retired.clear()
+        for page in self.pages:
+            self._add(page)
+
+    def _add(self, page):
+        self.uses[page] = 0
+        self.opened[page] = time.monotonic()
+        self._idle.put_nowait(page)
+
+    async def replace(self, page):
+        # Swap in the warm standby page (or a new one), close the old page, then warm the next standby
+        new_page = self.standby or await self.new_page()
+        self.standby = None
+        if page in self.pages:
+            self.pages[self.pages.index(page)] = new_page
+            self._add(new_page)
+        self.busy.pop(page, None)
+        self.uses.pop(page, None)
+        self.opened.pop(page, None)
+        await close_quietly(page)
+        if self.use_standby:
+            self.standby = await self.new_page()
+
+    async def resize(self, size):
+        # Opens prepared pages to grow; shrinking closes idle pages first and busy ones once released
+        self.size = size
+        while len(self.pages) < size:
+            page = await self.new_page()
+            self.pages.append(page)
+            self._add(page)
+        while len(self.pages) > size:
+            idle = [page for page in self.pages if page not in self.busy]
+            page = idle[-1] if idle else self.pages[-1]
+            self.pages.remove(page)
+            self.uses.pop(page, None)
+            self.opened.pop(page, None)
+            if page in self.busy:
+                self.retired.add(page)
+            else:
+                await close_quietly(page)
+
+    async def acquire(self, event_url=None):
+        while True:
+            page = await self._idle.get()
+            if page in self.probing:
+                self.probing[page] = True
+                continue
+            if page in self.pages:
+                self.busy[page] = (event_url, time.monotonic())
+                self.uses[page] += 1
+                return page
+
+    async def probe(self, page, check):
+        # Awaits check(page) on an idle page with no check handed the page meanwhile;
+        # None when a check already has it
+        if page in self.busy or page not in self.pages:
+            return None
+        self.probing[page] = False
+        try:
+            return await check(page)
+        finally:
+            if self.probing.pop(page) and page in self.pages:
+                self._idle.put_nowait(page)
+
+    def release(self, page, failed=False):
+        event_url, _ = self.busy.pop(page, (None, None))
+        if page in self.retired:
+            self.retired.discard(page)
+            asyncio.ensure_future(close_quietly(page))
+        if page not in self.pages:
+            return
+        recycle_reason = self.supervisor.recycle_reason(page) if self.supervisor else None
+        if failed and self.supervisor:
+            asyncio.ensure_future(self.supervisor.recheck_page(page, event_url))
+        elif recycle_reason:
+            asyncio.ensure_future(self.supervisor.replace_page(page, recycle_reason, event_url, recycle=True))
+        else:
+            self._idle.put_nowait(page)
+
 # ---- Entry Point ----
+async def start_pool(pool_size, profile_dirs=None, log_file=None):
+    # Launches the browser and returns (pool, supervisor); the browser is closed if setup fails
+    profile_dirs = profile_dirs or [user_data_dir, standby_user_data_dir]
+    browser = await launch_browser(profile_dirs[0])
+    try:
+        pool = PagePool(browser, pool_size, STANDBY_PAGE)
+        await pool.start()
+        # An attached browser is restarted by its host, so there is no standby browser to keep
+        supervisor = BrowserSupervisor(pool, launch_browser, profile_dirs, log_file or LOG_FILE,
+                                       WATCHDOG_INTERVAL, STALL_TIMEOUT, HEALTH_TIMEOUT,
+                                       STANDBY_BROWSER and not BROWSER_ENDPOINT,
+                                       RecyclePolicy(RECYCLE_AFTER_CHECKS, RECYCLE_INTERVAL, RECYCLE_MAX_RSS_MB))
+        await supervisor.start()
+    except Exception:
+        await shutdown(browser)
+        raise
+    return pool, supervisor
+
 async def main():
-    chrome_path = get_chrome_path()
-    browser = None
+    configure()
+    pool = None
+    supervisor = None
+    metrics_server = None
+    feeder = None
     shutdown_event = asyncio.Event()
 
     def handle_signal(signum, frame):
@@ -187,127 +1003,321 @@ async def main():
         signal.signal(signal.SIGTERM, handle_signal)  # taskkill or kill
 
     try:
-        browser = await launch({
-            "headless": False,
-            "userDataDir": user_data_dir,  # Store cookies/session info
-            "executablePath": chrome_path,
-            "args": [
-                "--start-maximized",
-                "--no-sandbox",
-                "--disable-setuid-sandbox",
-                "--disable-dev-shm-usage",
-                "--disable-blink-features=AutomationControlled",
-                "--disable-infobars"
-            ],
-            "ignoreDefaultArgs": ["--enable-automation"],
-        })
-        page = (await browser.pages())[0]
-        await page.setUserAgent(
-            'Mozilla/5.0 (Windows NT 10.0; Win64; x64) '
-            'AppleWebKit/537.36 (KHTML, like Gecko) '
-            'Chrome/114.0.5735.110 Safari/537.36'
-        )
-        await stealth(page)
-        await page.evaluateOnNewDocument("""
-            (() => {
-            // 1. Hide the `navigator.webdriver` property to avoid Selenium/Pyppeteer detection
-            Object.defineProperty(navigator, 'webdriver', {
-                get: () => undefined,
-                configurable: true
-            });
-            // 2. Spoof `navigator.languages` to a typical user-preferred languages array
-            Object.defineProperty(navigator, 'languages', {
-                get: () => ['en-US', 'en']
-            });
-            // 3. Spoof `navigator.platform` to a common platform value
-            Object.defineProperty(navigator, 'platform', {
-                get: () => 'Win32'
-            });
-            // 4. Spoof `navigator.deviceMemory` to a typical memory size in GB
-            Object.defineProperty(navigator, 'deviceMemory', {
-                get: () => 8
-            });
-            // 5. Spoof `navigator.hardwareConcurrency` to a typical number of CPU cores
-            Object.defineProperty(navigator, 'hardwareConcurrency', {
-                get: () => 4
-            });
-            // 6. Spoof `navigator.plugins` to simulate installed plugins (avoid empty plugins list)
-            if (navigator.plugins && navigator.plugins.length === 0) {
-                Object.defineProperty(navigator, 'plugins', {
-                    get: () => [1, 2, 3]
-                });
-            }
-            // 7. Canvas fingerprint spoofing: override toDataURL to return a fake image in certain cases
-            const originalToDataURL = HTMLCanvasElement.prototype.toDataURL;
-            Object.defineProperty(HTMLCanvasElement.prototype, 'toDataURL', {
-                value: function(...args) {
-                    const [type, ...rest] = args;
-                    if (type === 'image/png' && this.width === 220 && this.height === 30) {
-                        return 'data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAANwAAAAeCAIAAADIGOdpAAAAbElEQVR4nO3SMQEAIAzAMMC/5/FjgB6Jgh7dM7Og5PwOgJcpyTElOaYkx5TkmJIcU5JjSnJMSY4pyTElOaYkx5TkmJIcU5JjSnJMSY4pyTElOaYkx5TkmJIcU5JjSnJMSY4pyTElOaYkx5TkXOL+AznTluWxAAAAAElFTkSuQmCC';
-                    }
-                    return originalToDataURL.apply(this, args);
-                }
-            });
-            // 8. Audio fingerprint spoofing: override AudioBuffer.getChannelData to return altered data
-            const originalGetChannelData = AudioBuffer.prototype.getChannelData;
-            Object.defineProperty(AudioBuffer.prototype, 'getChannelData', {
-                value: function(...args) {
-                    const originalBuffer = originalGetChannelData.apply(this, args);
-                    const newBuffer = new Float32Array(originalBuffer);
-                    if (newBuffer.length > 0) {
-                        newBuffer[0] += 0.0001;
-                    }
-                    return newBuffer;
-                }
-            });
-        })();
-        """)
-        await page.goto(TICKET_URL, {
-            'waitUntil': 'networkidle2',
-            'timeout': 45000
-        })
-        await page.waitForSelector("script[type='application/ld+json']")
-        await check_tickets_loop(page, shutdown_event)
+        start_notifier()
+        start_history_store()
+        events = get_events()
+        feeder = start_discovery()
+        if not events and not feeder and not CONFIG_FILE:
+            raise ValueError(f"No event URLs found in {EVENTS_FILE}")
+        print(f"Monitoring {len(events)} event(s).")
+        start_http_fetcher(max(PAGE_POOL_SIZE, min(len(events), 20)))
+        await start_parse_executor()
+        if METRICS_PORT:
+            try:
+                metrics_server = await start_metrics_server(METRICS_HOST, METRICS_PORT)
+            except OSError as e:
+                print("Could not start metrics server:", e)
+        pool, supervisor = await start_pool(pool_size_for(len(events), feeder is not None))
+        alert_tracker = AlertTracker(ALERT_COOLDOWN, ALERT_DIGEST_WINDOW)
+        await check_tickets_loop(pool, events, shutdown_event, create_scheduler(), alert_tracker, supervisor,
+                                 feeder)
     except Exception as e:
         print("Fatal error in main():", e)
         import traceback
         traceback.print_exc()
     finally:
-        await shutdown(browser)
+        if supervisor:
+            await supervisor.close()
+        # The supervisor may have swapped in a new browser since launch
+        if pool:
+            await shutdown(pool.browser)
+        if metrics_server:
+            metrics_server.close()
+        await close_notifier()
+        if http_fetcher:
+            await http_fetcher.close()
+        if feeder:
+            await feeder.close()
+        close_parse_executor()
+        close_history_store()
+        close_log_writers()
 
 # ---- Check Tickets Loop ----
-async def check_tickets_loop(page, shutdown_event):
-    log_file = "sellouts_log.txt"
-    check_count = 0
+async def load_event_page(page, event, timings):
+    started = time.perf_counter()
+    if page.url == event.url:
+        await asyncio.wait_for(page.reload({'waitUntil': 'networkidle2'}), timeout=PAGE_TIMEOUT)
+    else:
+        await page.goto(event.url, {
+            'waitUntil': 'networkidle2',
+            'timeout': PAGE_TIMEOUT * 1000
+        })
+    timings["reload"] = time.perf_counter() - started
+    started = time.perf_counter()
+    await asyncio.wait_for(page.waitForSelector(WAIT_SELECTOR), timeout=PAGE_TIMEOUT)
+    timings["wait_selector"] = time.perf_counter() - started
+
+async def load_offer_payloads(page, event, timings):
+    # Returns (payloads, reloaded). Refetches the offer endpoints seen on the last full load
+    # when possible, and only falls back to a full page load when there are none or they fail.
+    if event.offer_payloads and same_site(page.url, event.url):
+        started = time.perf_counter()
+        payloads = await asyncio.wait_for(refetch_offer_payloads(page, list(event.offer_payloads)), timeout=PAGE_TIMEOUT)
+        timings["refetch"] = time.perf_counter() - started
+        if payloads is not None:
+            event.offer_payloads = payloads
+            return payloads, False
+        print(f"Offer API refetch failed for {event.url}, falling back to a full page load.")
+    network_watcher.capture(page, event)
+    try:
+        await load_event_page(page, event, timings)
+    finally:
+        await network_watcher.finish_capture(page)
+    return event.offer_payloads, True
+
+async def check_event_http(event, log_file):
+    # Returns the result when the server-rendered HTML decides the check, else None to escalate
+    timings = {}
+    started = time.perf_counter()
+    try:
+        html, reason = await http_fetcher.fetch(event.url)
+        if html is None and reason is None and (event.last_result or {}).get("tier") != "http":
+            # 304 for a body this event never evaluated itself: fetch it in full
+            http_fetcher.forget(event.url)
+            html, reason = await http_fetcher.fetch(event.url)
+    except Exception as e:
+        html, reason = None, f"error: {type(e).__name__}"
+    timings["http_fetch"] = time.perf_counter() - started
+    if html is None and reason is None:
+        # 304 Not Modified: the last result came from this same body
+        return unchanged_result(event, event.fingerprint, log_file, timings, "http")
+    if reason is None:
+        started = time.perf_counter()
+        fingerprint = html_fingerprint(html, layers.needed_fragments(event_layers(event)))
+        timings["fingerprint"] = time.perf_counter() - started
+        result = unchanged_result(event, fingerprint, log_file, timings, "http")
+        if result is not None:
+            return result
+        result, parse_timings = await parse_html(html, layer_names=event_layers(event))
+        timings.update(parse_timings)
+        # Without an answer from a deciding layer (e.g. no status span) the browser has to look
+        if result["decided_by"] is not None:
+            event.http_misses = 0
+            result["tier"] = "http"
+            write_check_log(result, log_file, event.url, timings)
+            remember_result(event, fingerprint, result)
+            return result
+        reason = "inconclusive"
+    http_fetcher.forget(event.url)
+    metrics.inc("sellouts_http_escalations_total", reason=reason.split(" ")[0].rstrip(":"))
+    print(f"HTTP check for {event.url} escalated to the browser ({reason}).")
+    event.http_misses += 1
+    if event.http_misses >= HTTP_MAX_MISSES:
+        print(f"Skipping the HTTP tier for {event.url} for the next {HTTP_RETRY_AFTER} checks.")
+        event.http_misses = 0
+        event.http_skip = HTTP_RETRY_AFTER
+    return None
+
+async def check_event_once(event, pool, log_file):
+    if http_fetcher:
+        if event.http_skip > 0:
+            event.http_skip -= 1
+        else:
+            result = await check_event_http(event, log_file)
+            if result is not None:
+                return result
+    timings = {}
+    started = time.perf_counter()
+    page = await pool.acquire(event.url)
+    timings["page_wait"] = time.perf_counter() - started
+    failed = True
+    try:
+        if EXTRACTION_MODE == "network":
+            payloads, reloaded = await load_offer_payloads(page, event, timings)
+            result = evaluate_offer_payloads(payloads)
+            if result["conclusive"]:
+                failed = False
+                write_check_log(result, log_file, event.url, timings)
+                return result
+            # Nothing usable in the API responses; read the DOM instead and reload next time
+            event.offer_payloads = {}
+            if not reloaded:
+                await load_event_page(page, event, timings)
+            started = time.perf_counter()
+            extracted = await page.evaluate(EXTRACT_SCRIPT, STATUS_CLASS)
+        elif EXTRACTION_MODE == "evaluate":
+            await load_event_page(page, event, timings)
+            started = time.perf_counter()
+            extracted = await page.evaluate(EXTRACT_SCRIPT, STATUS_CLASS)
+        else:
+            await load_event_page(page, event, timings)
+            started = time.perf_counter()
+            html = await page.content()
+        timings["extract"] = time.perf_counter() - started
+        failed = False
+        if http_fetcher:
+            http_fetcher.share_cookies(await page.cookies())
+    finally:
+        if resource_filter:
+            write_filter_log(resource_filter.take_stats(page), log_file, event.url)
+        # A page that raised is health-checked (and replaced if dead) before it is reused
+        pool.release(page, failed)
+    if EXTRACTION_MODE == "content":
+        started = time.perf_counter()
+        fingerprint = html_fingerprint(html, layers.needed_fragments(event_layers(event)))
+        timings["fingerprint"] = time.perf_counter() - started
+        result = unchanged_result(event, fingerprint, log_file, timings)
+        if result is None:
+            result = await check_result_from_html(html, log_file, event.url, timings=timings,
+                                                  layer_names=event_layers(event))
+            remember_result(event, fingerprint, result)
+        return result
+    fingerprint = extracted_fingerprint(extracted["status_texts"], extracted["jsonld_blobs"], extracted.get("extra"))
+    result = unchanged_result(event, fingerprint, log_file, timings)
+    if result is None:
+        result = await check_result_from_extracted(
+            extracted["status_texts"], extracted["jsonld_blobs"], log_file, event.url, timings,
+            event_layers(event), extracted.get("extra"))
+        remember_result(event, fingerprint, result)
+    return result
+
+async def check_tickets_loop(pool, events, shutdown_event, scheduler, alert_tracker, supervisor=None,
+                             feeder=None):
+    log_file = LOG_FILE
+    # Each event runs on its own schedule; the pool bounds how many are checked at once
+    event_tasks = {}
+    monitored = {}  # event url -> MonitoredEvent
+    discovered = set()  # urls added by the feeder, kept when the config's event list changes
+    configured = {event.url for event in events}  # urls from CONFIG_FILE, EVENTS_FILE or TICKET_URL
+
+    def start_events(new_events, stagger):
+        for event in new_events:
+            if event.url not in event_tasks:
+                monitored[event.url] = event
+                event_tasks[event.url] = asyncio.ensure_future(check_event_loop(
+                    event, pool, shutdown_event, scheduler, alert_tracker, log_file, stagger))
+
+    async def add_discovered(urls):
+        before = len(event_tasks)
+        discovered.update(urls)
+        start_events(discovered_events(urls), True)
+        print(f"Monitoring {len(event_tasks)} event(s) ({len(event_tasks) - before} discovered).")
+
+    def stop_event(url):
+        event_tasks.pop(url).cancel()
+        monitored.pop(url)
+        scheduler.forget(url)
+        if alert_tracker:
+            alert_tracker.forget(url)
+        print(f"Stopped checking {url}.")
+
+    async def drop_discovered(urls):
+        # Events the feeder expired; ones that are also configured keep being checked
+        for url in urls:
+            discovered.discard(url)
+            if url in event_tasks and url not in configured:
+                stop_event(url)
+
+    async def apply_config(changed, events):
+        nonlocal configured
+        # Settings first, then the event list: removed events stop (mid-check if need be), new ones
+        # start staggered, and the pool opens or closes pages to match
+        apply_live_settings(changed, monitored.values(), scheduler, alert_tracker)
+        events_by_url = {event.url: event for event in events}
+        configured = set(events_by_url)
+        for url in list(event_tasks):
+            if url not in configured and url not in discovered:
+                stop_event(url)
+        for url, event in events_by_url.items():
+            if url in monitored and monitored[url].spec != event.spec:
+                update_event(monitored[url], event)
+                print(f"Updated options for {url}.")
+        start_events([event for url, event in events_by_url.items() if url not in event_tasks], True)
+        size = pool_size_for(len(event_tasks), feeder is not None)
+        if size != pool.size:
+            await pool.resize(size)
+            print(f"Page pool resized to {size} page(s).")
+        print(f"Monitoring {len(event_tasks)} event(s).")
+
+    start_events(events, len(events) > 1 or feeder is not None)
+    tasks = []
+    if feeder:
+        tasks.append(asyncio.ensure_future(
+            feeder.run(add_discovered, shutdown_event, DISCOVERY_INTERVAL, drop_discovered)))
+    if CONFIG_FILE:
+        tasks.append(asyncio.ensure_future(watch_config(shutdown_event, apply_config)))
+    tasks.append(asyncio.ensure_future(summarize_metrics(
+        METRICS_SUMMARY_INTERVAL, shutdown_event, lambda snapshot: write_metrics_summary(snapshot, log_file))))
+    tasks.append(asyncio.ensure_future(monitor_loop_lag(LOOP_LAG_INTERVAL, shutdown_event)))
+    if supervisor:
+        tasks.append(asyncio.ensure_future(supervisor.run(shutdown_event)))
+    try:
+        await asyncio.gather(*tasks)
+        await shutdown_event.wait()
+        # Let the event loops finish their current check
+        await asyncio.gather(*event_tasks.values())
+    finally:
+        for task in tasks + list(event_tasks.values()):
+            task.cancel()
+
+async def handle_alerts(alert_tracker, event_url, result, log_file):
+    alert_tracker.observe(event_url, result["found"], result["offers"])
+    changes = alert_tracker.take_due(event_url)
+    if changes:
+        print(f"Tickets found for {event_url}! Sending alert...")
+        await send_alert(result["details"], log_file, event_url, changes)
+    elif result["found"]:
+        print(f"Tickets still available for {event_url}; no new changes to alert.")
+    else:
+        print(f"No tickets found for {event_url}.")
+
+async def check_event_loop(event, pool, shutdown_event, scheduler, alert_tracker, log_file, stagger,
+                           on_result=None):
+    # alert_tracker may be None when results are reported elsewhere through on_result(event, outcome, result)
+    if stagger:
+        # Spread the first checks out so the events don't all queue for a page at once
+        try:
+            await asyncio.wait_for(shutdown_event.wait(), timeout=random.uniform(0, 5))
+        except asyncio.TimeoutError:
+            pass
     while not shutdown_event.is_set():
+        outcome = "ok"
+        details = None
+        result = None
         try:
-            print(f"Checking tickets... (check count: {check_count})")
-            await asyncio.wait_for(page.reload({'waitUntil': 'networkidle2'}), timeout=45)
-            await asyncio.wait_for(page.waitForSelector("script[type='application/ld+json']"), timeout=45)
-            html = await page.content()
-            found, details = await check_ticket_availability(html, log_file)
-            check_count += 1
-            if found:
-                print("Tickets found! Sending email alert...")
-                await send_email_alert(details, log_file)
-            else:
-                print("No tickets found.")
-            check_interval = random.uniform(2, 5)
-            print(f"Waiting {check_interval:.1f} seconds...\n")
-            try:
-                await asyncio.wait_for(shutdown_event.wait(), timeout=check_interval)
-            except asyncio.TimeoutError:
-                pass
+            print(f"Checking tickets for {event.url}... (check count: {event.check_count})")
+            with metrics.timer("sellouts_check_seconds"):
+                result = await check_event_once(event, pool, log_file)
+            details = result["details"]
+            event.check_count += 1
+            metrics.inc("sellouts_checks_total")
+            metrics.inc("sellouts_tier_checks_total", tier=result.get("tier", "browser"))
+            if result["found"]:
+                metrics.inc("sellouts_found_total")
+            if alert_tracker:
+                await handle_alerts(alert_tracker, event.url, result, log_file)
         except asyncio.TimeoutError:
-            print("Timeout occurred while waiting for page reload, selector, or interval.")
+            outcome = "timeout"
+            metrics.inc("sellouts_timeouts_total")
+            print(f"Timeout occurred while waiting for page reload or selector ({event.url}).")
             import traceback
             traceback.print_exc()
-            continue
         except Exception as e:
-            print("Unexpected error in check_tickets_loop:", e)
+            outcome = "error"
+            metrics.inc("sellouts_errors_total")
+            print(f"Unexpected error in check_tickets_loop ({event.url}):", e)
             import traceback
             traceback.print_exc()
+        if on_result:
+            on_result(event, outcome, result)
+        check_interval = scheduler.next_interval(event, outcome, details)
+        if check_interval <= 0:
             continue
+        print(f"Waiting {check_interval:.1f} seconds...\n")
+        try:
+            await asyncio.wait_for(shutdown_event.wait(), timeout=check_interval)
+        except asyncio.TimeoutError:
+            pass
 
 if __name__ == "__main__":
     try:
@@ -0,0 +1,173 @@
+import asyncio
+import json
+import re
+from urllib.parse import urlparse
+
+# ---- Offer API payloads ----
+# The event page fetches its availability from JSON endpoints (ISMDS facets/offers,
+# quickpicks). Reading those payloads directly avoids a full page reload per check.
+
+def describe_endpoint(url):
+    parsed = urlparse(url)
+    return f"{parsed.netloc}{parsed.path}"
+
+def walk_jsonld_offers(data):
+    # schema.org style offers anywhere in the payload
+    if isinstance(data, dict):
+        if "availability" in data and ("price" in data or "url" in data):
+            yield data
+        for value in data.values():
+            yield from walk_jsonld_offers(value)
+    elif isinstance(data, list):
+        for item in data:
+            yield from walk_jsonld_offers(item)
+
+def evaluate_offer_payload(payload):
+    # Returns (found, details, offers), or (None, [], []) when the payload has no recognised offer data
+    if not isinstance(payload, dict) and not isinstance(payload, list):
+        return None, [], []
+    details = []
+    offers_found = []
+    found = None
+    if isinstance(payload, dict) and isinstance(payload.get("facets"), list):
+        # ISMDS facets: each facet is a group of seats with a count and its offer ids
+        found = False
+        for facet in payload["facets"]:
+            if not isinstance(facet, dict):
+                continue
+            count = facet.get("count") or 0
+            if count > 0 and facet.get("available", True):
+                found = True
+        offers = payload.get("_embedded", {}).get("offer", [])
+        for offer in offers if isinstance(offers, list) else []:
+            if not isinstance(offer, dict):
+                continue
+            price = offer.get("listPrice") or offer.get("totalPrice") or offer.get("faceValue")
+            details.append(f"Offer: {offer.get('name') or offer.get('offerId')} | "
+                           f"Price: {price or 'N/A'} {offer.get('currency') or ''} | "
+                           f"Description: {offer.get('description') or 'N/A'}")
+            offers_found.append({"url": offer.get("offerId"), "description": offer.get("name") or offer.get("description"),
+                                 "price": price, "currency": offer.get("currency"), "availability": None})
+        return found, details, offers_found
+    if isinstance(payload, dict) and ("picks" in payload or "total" in payload):
+        # Quickpicks: best available seats right now
+        picks = payload.get("picks") or []
+        found = bool(picks) or (payload.get("total") or 0) > 0
+        for pick in picks if isinstance(picks, list) else []:
+            if isinstance(pick, dict):
+                details.append(f"Pick: section {pick.get('section')} row {pick.get('row')} | "
+                               f"Offers: {', '.join(str(o) for o in pick.get('offerIds', [])) or 'N/A'}")
+        return found, details, offers_found
+    for offer in walk_jsonld_offers(payload):
+        if found is None:
+            found = False
+        availability = offer.get("availability")
+        details.append(f"Availability: {availability} | URL: {offer.get('url')} | "
+                       f"Price: {offer.get('price') or 'N/A'} {offer.get('priceCurrency') or ''}")
+        offers_found.append({"url": offer.get("url"), "description": offer.get("description"),
+                             "price": offer.get("price"), "currency": offer.get("priceCurrency"),
+                             "availability": availability})
+        if availability == "http://schema.org/InStock":
+            found = True
+    return found, details, offers_found
+
+def evaluate_offer_payloads(payloads):
+    # payloads: endpoint URL -> decoded JSON. Returns the same result dict as the page checks,
+    # plus "conclusive" (whether any payload had recognisable offer data)
+    found = False
+    conclusive = False
+    details = []
+    offers = []
+    layer_results = []
+    for url, payload in payloads.items():
+        try:
+            endpoint_found, endpoint_details, endpoint_offers = evaluate_offer_payload(payload)
+        except Exception as e:
+            layer_results.append(f"[Layer 3: Network] ERROR ({describe_endpoint(url)}): {e}")
+            continue
+        if endpoint_found is None:
+            layer_results.append(f"[Layer 3: Network] No recognised offer data ({describe_endpoint(url)})")
+            continue
+        conclusive = True
+        details.extend(endpoint_details)
+        offers.extend(endpoint_offers)
+        if endpoint_found:
+            found = True
+            layer_results.append(f"[Layer 3: Network] TICKETS POSSIBLY AVAILABLE ({describe_endpoint(url)})")
+        else:
+            layer_results.append(f"[Layer 3: Network] NO TICKETS ({describe_endpoint(url)})")
+    if not payloads:
+        layer_results.append("[Layer 3: Network] No offer API responses captured")
+    return {"found": found, "details": details, "layer_results": layer_results, "offers": offers,
+            "conclusive": conclusive, "layers": {"Layer 3: Network": found if conclusive else None},
+            "decided_by": "Layer 3: Network" if conclusive else None}
+
+# ---- Response capture ----
+class NetworkWatcher:
+    def __init__(self, pattern):
+        self.pattern = re.compile(pattern)
+        self._capturing = {}  # page -> event currently being loaded on it
+        self._pending = {}    # page -> response-reading tasks
+
+    def attach(self, page):
+        page.on('response', lambda response: self._on_response(page, response))
+
+    def capture(self, page, event):
+        # Record offer API responses seen while `page` loads `event`
+        event.offer_payloads = {}
+        self._capturing[page] = event
+        self._pending[page] = []
+
+    async def finish_capture(self, page, timeout=5):
+        # Give in-flight response bodies a moment to arrive, then stop recording
+        tasks = self._pending.pop(page, [])
+        if tasks:
+            await asyncio.wait(tasks, timeout=timeout)
+        self._capturing.pop(page, None)
+
+    def _on_response(self, page, response):
+        event = self._capturing.get(page)
+        if event is None or not self.pattern.search(response.url):
+            return
+        task = asyncio.ensure_future(self._read_response(event, response))
+        self._pending.setdefault(page, []).append(task)
+
+    async def _read_response(self, event, response):
+        if response.status != 200:
+            return
+        try:
+            payload = json.loads(await response.text())
+        except Exception:
+            return
+        event.offer_payloads[response.url] = payload
+
+# ---- Lightweight refetch ----
+# Re-requests the captured endpoints from inside the page, so the site's cookies and
+# headers apply, at the cost of one API round trip instead of a page load.
+REFETCH_SCRIPT = """
+async (urls) => Promise.all(urls.map(async (url) => {
+    try {
+        const response = await fetch(url, {credentials: 'include', headers: {accept: 'application/json'}});
+        return {url: url, status: response.status, body: await response.text()};
+    } catch (e) {
+        return {url: url, status: 0, body: String(e)};
+    }
+}))
+"""
+
+def same_site(page_url, event_url):
+    return urlparse(page_url).netloc == urlparse(event_url).netloc
+
+async def refetch_offer_payloads(page, urls):
+    # Returns endpoint URL -> payload, or None if any endpoint was blocked or failed
+    payloads = {}
+    for result in await page.evaluate(REFETCH_SCRIPT, urls):
+        if result["status"] != 200:
+            print(f"Offer API refetch returned {result['status']} for {describe_endpoint(result['url'])}")
+            return None
+        try:
+            payloads[result["url"]] = json.loads(result["body"])
+        except ValueError:
+            print(f"Offer API refetch returned non-JSON for {describe_endpoint(result['url'])}")
+            return None
+    return payloads
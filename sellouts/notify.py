@@ -0,0 +1,182 @@
+import asyncio
+import json
+import sys
+import time
+from sellouts.logwriter import log_record
+from sellouts.metrics import metrics
+
+# ---- Notifications ----
+# Fans each alert out to every configured channel at once: email (through the background
+# SMTP dispatcher), a generic JSON webhook, a Telegram bot, a Slack incoming webhook and a
+# local file or stdout. Every channel gets its own timeout and retries, so a slow or broken
+# one never holds up the others or the checks, and delivery time is recorded per channel.
+# An alert is a dict with "event", "subject", "text", "changes", "details" and "ts" (when
+# the change was seen).
+
+class ChannelError(Exception):
+    def __init__(self, message, retry=True, retry_after=None):
+        super().__init__(message)
+        self.retry = retry
+        self.retry_after = retry_after
+
+class Channel:
+    name = "channel"
+    timeout = None  # None = the notifier's default
+    retries = None
+
+    async def send(self, alert):
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+class HttpChannel(Channel):
+    def __init__(self, url, client):
+        self.url = url
+        self.client = client
+
+    def payload(self, alert):
+        return alert
+
+    async def send(self, alert):
+        response = await self.client.post(self.url, json=self.payload(alert))
+        if response.status_code >= 400:
+            retry_after = response.headers.get("retry-after")
+            raise ChannelError(f"HTTP {response.status_code}: {response.text[:200]}",
+                               retry=response.status_code == 429 or response.status_code >= 500,
+                               retry_after=float(retry_after) if retry_after and retry_after.isdigit() else None)
+
+class WebhookChannel(HttpChannel):
+    name = "webhook"
+
+class SlackChannel(HttpChannel):
+    name = "slack"
+
+    def payload(self, alert):
+        return {"text": f"*{alert['subject']}*\n{alert['text']}"}
+
+class TelegramChannel(HttpChannel):
+    name = "telegram"
+
+    def __init__(self, token, chat_id, client, api="https://api.telegram.org"):
+        super().__init__(f"{api.rstrip('/')}/bot{token}/sendMessage", client)
+        self.chat_id = chat_id
+
+    def payload(self, alert):
+        # Telegram caps messages at 4096 characters
+        return {"chat_id": self.chat_id, "text": f"{alert['subject']}\n{alert['text']}"[:4096],
+                "disable_web_page_preview": True}
+
+class FileChannel(Channel):
+    name = "file"
+
+    def __init__(self, path):
+        # "-" writes to stdout
+        self.path = path
+
+    async def send(self, alert):
+        line = json.dumps(alert) + "\n"
+        if self.path == "-":
+            sys.stdout.write(line)
+            sys.stdout.flush()
+            return
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(line)
+
+class EmailChannel(Channel):
+    name = "email"
+    timeout = 120
+    retries = 0  # the dispatcher already retries and reconnects
+
+    def __init__(self, dispatcher, sender, recipient, log_file):
+        self.dispatcher = dispatcher
+        self.sender = sender
+        self.recipient = recipient
+        self.log_file = log_file
+
+    async def send(self, alert):
+        from email.mime.text import MIMEText
+        msg = MIMEText(alert["text"])
+        msg["Subject"] = alert["subject"]
+        msg["From"] = self.sender
+        msg["To"] = self.recipient
+        loop = asyncio.get_running_loop()
+        done = loop.create_future()
+
+        def finish(success, error):
+            if not done.done():
+                done.set_result(error)
+
+        # Resolved from the dispatcher thread once the server accepted (or refused) the message
+        self.dispatcher.submit(msg, self.log_file, lambda success, error: loop.call_soon_threadsafe(finish, success,
+                                                                                                   error))
+        error = await done
+        if error is not None:
+            raise ChannelError(str(error), retry=False)
+
+    async def close(self):
+        # Blocking join is fine here: the monitor is stopping and queued alerts still matter
+        self.dispatcher.close()
+
+class Notifier:
+    def __init__(self, channels, log_file, timeout=10, retries=2, client=None):
+        self.channels = channels
+        self.log_file = log_file
+        self.timeout = timeout
+        self.retries = retries
+        self.client = client  # shared by the HTTP channels; closed with the notifier
+        self._pending = set()
+
+    def notify(self, alert):
+        # Returns at once; the channels are sent in the background
+        task = asyncio.ensure_future(self.deliver(alert))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+        return task
+
+    async def deliver(self, alert):
+        return await asyncio.gather(*(self.send(channel, alert) for channel in self.channels))
+
+    async def send(self, channel, alert):
+        timeout = channel.timeout if channel.timeout is not None else self.timeout
+        retries = channel.retries if channel.retries is not None else self.retries
+        started = time.perf_counter()
+        error = None
+        attempt = 0
+        for attempt in range(1, retries + 2):
+            try:
+                await asyncio.wait_for(channel.send(alert), timeout=timeout)
+                error = None
+                break
+            except asyncio.TimeoutError:
+                error = ChannelError(f"timed out after {timeout:g}s")
+            except ChannelError as e:
+                error = e
+            except Exception as e:
+                error = ChannelError(repr(e))
+            if not error.retry or attempt > retries:
+                break
+            await asyncio.sleep(error.retry_after or min(0.5 * 2 ** (attempt - 1), 5))
+        seconds = time.perf_counter() - started
+        status = "sent" if error is None else "failed"
+        metrics.inc("sellouts_notifications_total", channel=channel.name, status=status)
+        metrics.observe("sellouts_notify_seconds", seconds, channel=channel.name)
+        record = {"type": "notification", "channel": channel.name, "event": alert["event"], "status": status,
+                  "attempts": attempt, "seconds": seconds}
+        if error is None:
+            # Time from the change being seen to this channel accepting the alert
+            record["since_detection"] = time.time() - alert["ts"]
+            print(f"Alert sent via {channel.name} in {seconds:.2f}s.")
+        else:
+            record["error"] = str(error)
+            print(f"Alert via {channel.name} failed after {attempt} attempt(s):", error)
+        log_record(self.log_file, record)
+        return error is None
+
+    async def close(self, timeout=30):
+        if self._pending:
+            await asyncio.wait(list(self._pending), timeout=timeout)
+        for channel in self.channels:
+            await channel.close()
+        if self.client is not None:
+            await self.client.aclose()
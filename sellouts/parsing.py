@@ -0,0 +1,61 @@
+import time
+from sellouts.fastparse import extract_fast
+from sellouts.layers import PageData, run_layers
+
+# ---- Ticket availability check logic ----
+# Extraction and the detection layers with no browser, email or config imports, so
+# parse workers (and anything else that only needs to read a page) start quickly.
+# BeautifulSoup is imported on first use; the fast engine usually never needs it.
+
+def extract_with_bs4(html_content, status_class="VisuallyHidden"):
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html_content, "html.parser")
+    vh_spans = soup.find_all('span', {'role': 'status', 'class': lambda c: c and status_class in c})
+    status_texts = [vh_span.get_text(strip=True) for vh_span in vh_spans]
+    scripts = soup.find_all("script", type="application/ld+json")
+    jsonld_blobs = [str(script.string) if script.string is not None else None for script in scripts]
+    return status_texts, jsonld_blobs
+
+def extract_availability_data(html_content, engine="bs4", status_class="VisuallyHidden"):
+    # Returns (status_texts, jsonld_blobs): the texts of the role="status" spans whose class contains
+    # status_class (VisuallyHidden on Ticketmaster) and the raw JSON-LD script bodies
+    if engine == "fast":
+        extracted = extract_fast(html_content, status_class)
+        if extracted is not None:
+            return extracted
+    elif engine != "bs4":
+        print(f"Unknown parser engine '{engine}', using BeautifulSoup.")
+    return extract_with_bs4(html_content, status_class)
+
+def empty_result():
+    return {"found": False, "details": [], "layer_results": [], "offers": [], "layers": {}, "decided_by": None,
+            "skipped": []}
+
+def evaluate_layers(status_texts, jsonld_blobs, layer_names=None, combine="first", timings=None, extra=None,
+                    details="always"):
+    # Runs the detection layers (sellouts/layers.py) on already-extracted fragments; extra holds
+    # the in-page result_count, banner and ticket_list. Returns {"found", "details",
+    # "layer_results", "offers", "layers", "decided_by", "skipped"}; offers are the JSON-LD offers as dicts
+    fragments = dict(extra or {}, status_texts=status_texts, jsonld_blobs=jsonld_blobs)
+    return run_layers(PageData(fragments=fragments), layer_names, combine, timings, details)
+
+# ---- Parse workers ----
+# Run in a ProcessPoolExecutor so multi-MB pages never block the event loop. Only the
+# result dict (strings, numbers and small dicts) and the stage timings travel back.
+
+def warm_up():
+    # Executor initializer: loads BeautifulSoup and primes the parser code paths before the first page
+    evaluate_layers(*extract_availability_data('<span role="status" class="VisuallyHidden">0 No results</span>'))
+
+def parse_html(html_content, engine="bs4", status_class="VisuallyHidden", layer_names=None, combine="first",
+               details="always"):
+    # Returns (result, timings) with timings for the "parse" (fragment extraction) and "evaluate"
+    # stages and each layer that ran. The page is only parsed if a layer needs the status spans
+    # or JSON-LD.
+    started = time.perf_counter()
+    timings = {}
+    data = PageData(html_content, lambda html: extract_availability_data(html, engine, status_class))
+    result = run_layers(data, layer_names, combine, timings, details)
+    timings["parse"] = data.extract_seconds
+    timings["evaluate"] = time.perf_counter() - started - data.extract_seconds
+    return result, timings
@@ -0,0 +1,87 @@
+import os
+import time
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# ---- Browser Recycling ----
+# Chromium's memory grows over tens of thousands of reloads. Pages are recycled after a
+# number of checks or a maximum age, and the whole browser when its process tree passes a
+# memory limit. The supervisor swaps in the prepared standby first, so no check waits.
+
+def process_tree_rss_mb(pid):
+    # Resident memory of a process and all its descendants in MB, or None if unavailable.
+    # Uses psutil when installed, otherwise /proc (Linux).
+    if pid is None:
+        return None
+    if psutil is not None:
+        try:
+            root = psutil.Process(pid)
+            procs = [root] + root.children(recursive=True)
+            total = 0
+            for proc in procs:
+                try:
+                    total += proc.memory_info().rss
+                except psutil.Error:
+                    pass
+            return total / (1024 * 1024)
+        except psutil.Error:
+            return None
+    if not os.path.isdir("/proc"):
+        return None
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    children = {}
+    rss = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # Fields after "(comm)": state, ppid, ..., rss (in pages) is the 22nd
+                fields = f.read().rsplit(")", 1)[1].split()
+            children.setdefault(int(fields[1]), []).append(int(entry))
+            rss[int(entry)] = int(fields[21]) * page_size
+        except (OSError, ValueError, IndexError):
+            continue
+    if pid not in rss:
+        return None
+    total = 0
+    stack = [pid]
+    while stack:
+        current = stack.pop()
+        total += rss.get(current, 0)
+        stack.extend(children.get(current, []))
+    return total / (1024 * 1024)
+
+def browser_rss_mb(browser):
+    process = getattr(browser, "process", None)
+    return process_tree_rss_mb(process.pid if process is not None else None)
+
+class RecyclePolicy:
+    def __init__(self, after_checks=0, max_age=0, max_rss_mb=0, min_gap=300):
+        # after_checks: checks per page; max_age: seconds per page; max_rss_mb: whole browser.
+        # 0 disables each. min_gap keeps a browser whose baseline is above the limit from
+        # being recycled in a loop.
+        self.after_checks = after_checks
+        self.max_age = max_age
+        self.max_rss_mb = max_rss_mb
+        self.min_gap = min_gap
+        self.last_browser_recycle = time.monotonic()
+
+    def page_due(self, uses, opened_at, now=None):
+        if now is None:
+            now = time.monotonic()
+        if self.after_checks and uses >= self.after_checks:
+            return "checks"
+        if self.max_age and now - opened_at >= self.max_age:
+            return "age"
+        return None
+
+    def browser_due(self, rss_mb, now=None):
+        if now is None:
+            now = time.monotonic()
+        if not self.max_rss_mb or rss_mb is None or rss_mb < self.max_rss_mb:
+            return False
+        return now - self.last_browser_recycle >= self.min_gap
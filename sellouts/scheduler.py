@@ -0,0 +1,97 @@
+import hashlib
+import random
+import time
+from datetime import datetime, time as dtime
+
+# ---- Polling Schedulers ----
+# next_interval(event, outcome, details) is called after every check with outcome
+# "ok", "timeout" or "error" and returns how many seconds to wait before the next one.
+
+class FixedScheduler:
+    # The original behaviour: a random 2-5 s wait, retrying straight away after errors
+    def __init__(self, check_min, check_max):
+        self.check_min = check_min
+        self.check_max = check_max
+
+    def forget(self, event_url):
+        pass
+
+    def next_interval(self, event, outcome, details=None):
+        if outcome != "ok":
+            return 0
+        return random.uniform(self.check_min, self.check_max)
+
+
+class AdaptiveScheduler:
+    # Polls at the per-event minimum inside drop windows, backs off exponentially after
+    # consecutive timeouts/errors and slows down while an event's offers stay unchanged.
+    def __init__(self, check_min, check_max, min_interval, max_interval, stale_after_hours, windows=None):
+        self.check_min = check_min
+        self.check_max = check_max
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.stale_after = stale_after_hours * 3600
+        self.windows = windows or []
+        self._state = {}  # event url -> {"errors", "fingerprint", "changed_at"}
+
+    def _event_state(self, event):
+        if event.url not in self._state:
+            self._state[event.url] = {"errors": 0, "fingerprint": None, "changed_at": time.monotonic()}
+        return self._state[event.url]
+
+    def forget(self, event_url):
+        # The event is no longer monitored
+        self._state.pop(event_url, None)
+
+    def in_window(self, event, now=None):
+        now = now or datetime.now()
+        return any(window_contains(window, now) for window in self.windows + event.windows)
+
+    def next_interval(self, event, outcome, details=None):
+        state = self._event_state(event)
+        min_interval = event.min_interval if event.min_interval is not None else self.min_interval
+        max_interval = event.max_interval if event.max_interval is not None else self.max_interval
+        interval = random.uniform(self.check_min, self.check_max)
+
+        if outcome == "ok":
+            state["errors"] = 0
+            fingerprint = hashlib.sha1("\n".join(details or []).encode()).hexdigest()
+            if fingerprint != state["fingerprint"]:
+                state["fingerprint"] = fingerprint
+                state["changed_at"] = time.monotonic()
+            if self.in_window(event):
+                interval = min_interval
+            else:
+                unchanged_for = time.monotonic() - state["changed_at"]
+                if self.stale_after and unchanged_for > self.stale_after:
+                    # Double once stale, then one more multiple of the base interval per extra hour
+                    interval *= 2 + (unchanged_for - self.stale_after) / 3600
+        else:
+            state["errors"] += 1
+            interval *= 2 ** min(state["errors"], 16)
+
+        return max(min_interval, min(max_interval, interval))
+
+
+# ---- Drop Windows ----
+# "HH:MM-HH:MM" repeats daily (local time); "YYYY-MM-DDTHH:MM/YYYY-MM-DDTHH:MM" is a one-off window.
+
+def parse_window(spec):
+    spec = spec.strip()
+    if "/" in spec:
+        start, end = spec.split("/", 1)
+        return ("once", datetime.fromisoformat(start), datetime.fromisoformat(end))
+    start, end = spec.split("-", 1)
+    return ("daily", dtime.fromisoformat(start), dtime.fromisoformat(end))
+
+def parse_windows(value):
+    return [parse_window(spec) for spec in (value or "").split(",") if spec.strip()]
+
+def window_contains(window, now):
+    kind, start, end = window
+    if kind == "once":
+        return start <= now <= end
+    current = now.time()
+    if start <= end:
+        return start <= current <= end
+    return current >= start or current <= end  # window crosses midnight
@@ -0,0 +1,274 @@
+import asyncio
+import time
+from sellouts.logwriter import log_record
+from sellouts.metrics import metrics
+from sellouts.recycling import browser_rss_mb
+
+# ---- Browser Supervisor ----
+# Keeps the page pool usable without restarting the process. It pings the browser and
+# idle pages, replaces pages whose check has stalled or that fail a health probe after an
+# error, and relaunches Chromium when it crashes or stops answering. A prepared standby
+# page (and optionally a standby browser) is kept warm so a swap takes seconds instead of
+# a cold launch plus stealth setup. Planned recycling (sellouts/recycling.py) goes through
+# the same swaps.
+
+async def close_quietly(target, timeout=10):
+    try:
+        await asyncio.wait_for(target.close(), timeout=timeout)
+    except Exception:
+        pass
+
+async def kill_browser(browser, timeout=10):
+    # A hung Chromium may never answer Browser.close, so make sure the process goes away
+    await close_quietly(browser, timeout)
+    process = getattr(browser, "process", None)
+    if process is not None and process.poll() is None:
+        process.kill()
+
+async def copy_cookies(cookies, pages):
+    if not cookies or not pages:
+        return
+    try:
+        await pages[0].setCookie(*cookies)  # the cookie store is shared by the browser's pages
+    except Exception as e:
+        print("Could not copy cookies to the new browser:", e)
+
+def format_mb(value):
+    return "unknown" if value is None else f"{value:.0f} MB"
+
+class BrowserSupervisor:
+    def __init__(self, pool, launch_browser, profile_dirs, log_file, interval=10, stall_timeout=150,
+                 health_timeout=10, standby_browser=False, recycler=None):
+        # launch_browser(profile_dir) -> browser. With a standby browser the two profile dirs
+        # alternate, since Chromium locks a profile while it is running.
+        self.pool = pool
+        self.launch_browser = launch_browser
+        self.profile_dirs = profile_dirs
+        self.profile_dir = profile_dirs[0]
+        self.log_file = log_file
+        self.interval = interval
+        self.stall_timeout = stall_timeout
+        self.health_timeout = health_timeout
+        self.use_standby_browser = standby_browser
+        self.recycler = recycler
+        self.memory_recycle_pending = set()  # pages to recycle on release because the browser is too big
+        self._memory_pages_tried = False
+        self.standby = None  # (browser, prepared pages, profile dir)
+        self._standby_task = None
+        self._browser_lost = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._closing = False
+
+    async def start(self):
+        self.pool.supervisor = self
+        self.watch(self.pool.browser)
+        if self.use_standby_browser:
+            self._standby_task = asyncio.ensure_future(self._warm_standby_browser())
+
+    def watch(self, browser):
+        browser.on("disconnected", lambda: self._on_disconnected(browser))
+
+    def _on_disconnected(self, browser):
+        if browser is self.pool.browser and not self._closing:
+            print("Browser disconnected.")
+            self._browser_lost.set()
+
+    def _record(self, target, reason, started, event_url=None, recycle=False, rss_before=None):
+        seconds = time.perf_counter() - started
+        record = {"type": "recovery", "target": target, "reason": reason, "event": event_url, "seconds": seconds}
+        if not recycle:
+            metrics.inc("sellouts_recoveries_total", target=target, reason=reason)
+            metrics.observe("sellouts_recovery_seconds", seconds, target=target)
+            print(f"Replaced {target} ({reason}) in {seconds:.1f}s.")
+        else:
+            rss_after = browser_rss_mb(self.pool.browser)
+            metrics.inc("sellouts_recycles_total", target=target, reason=reason)
+            print(f"Recycled {target} ({reason}) in {seconds:.1f}s; browser memory "
+                  f"{format_mb(rss_before)} -> {format_mb(rss_after)}.")
+            record.update(type="recycle", rss_before_mb=rss_before, rss_after_mb=rss_after)
+        log_record(self.log_file, record)
+
+    # ---- Health checks ----
+    async def browser_alive(self):
+        try:
+            await asyncio.wait_for(self.pool.browser.version(), timeout=self.health_timeout)
+            return True
+        except Exception:
+            return False
+
+    async def page_alive(self, page):
+        if page.isClosed():
+            return False
+        try:
+            return await asyncio.wait_for(page.evaluate("1 + 1"), timeout=self.health_timeout) == 2
+        except Exception:
+            return False
+
+    async def run(self, shutdown_event):
+        stop = asyncio.ensure_future(shutdown_event.wait())
+        try:
+            while not shutdown_event.is_set():
+                lost = asyncio.ensure_future(self._browser_lost.wait())
+                await asyncio.wait([stop, lost], timeout=self.interval, return_when=asyncio.FIRST_COMPLETED)
+                lost.cancel()
+                if shutdown_event.is_set():
+                    break
+                try:
+                    await self.check()
+                except Exception as e:
+                    print("Browser supervisor error:", e)
+        finally:
+            stop.cancel()
+
+    async def check(self):
+        if self._browser_lost.is_set():
+            await self.restart_browser("crashed")
+            return
+        if not await self.browser_alive():
+            await self.restart_browser("unresponsive")
+            return
+        if self.recycler:
+            await self.check_memory()
+        now = time.monotonic()
+        for page, (event_url, since) in list(self.pool.busy.items()):
+            if now - since > self.stall_timeout:
+                await self.replace_page(page, "stalled", event_url)
+        for page in list(self.pool.pages):
+            # The pool keeps the page out of rotation while it is probed, so a check
+            # can't start navigating it and fail the probe
+            if await self.pool.probe(page, self.page_alive) is False:
+                await self.replace_page(page, "unhealthy")
+
+    async def recheck_page(self, page, event_url=None):
+        # Called by the pool when a check on this page raised; the page stays out of
+        # rotation until it answers a probe
+        if await self.page_alive(page):
+            self.pool.release(page)
+        else:
+            await self.replace_page(page, "failed", event_url)
+
+    # ---- Recycling ----
+    def recycle_reason(self, page):
+        # Checked by the pool when a page comes back from a check
+        if page in self.memory_recycle_pending:
+            return "memory"
+        if self.recycler is None:
+            return None
+        return self.recycler.page_due(self.pool.uses.get(page, 0), self.pool.opened.get(page, time.monotonic()))
+
+    async def check_memory(self):
+        rss = browser_rss_mb(self.pool.browser)
+        if rss is None:
+            return
+        metrics.set("sellouts_browser_rss_mb", rss)
+        if not self.recycler.browser_due(rss):
+            return
+        self.recycler.last_browser_recycle = time.monotonic()
+        if self.standby is not None or self._memory_pages_tried:
+            # A warm standby browser makes this seamless; without one a restart is the last resort
+            self._memory_pages_tried = False
+            await self.restart_browser("memory", recycle=True)
+        else:
+            # Renderers hold most of the growth: recycle every page first, keeping the browser
+            print(f"Browser memory {rss:.0f} MB is over {self.recycler.max_rss_mb:.0f} MB; recycling pages.")
+            self._memory_pages_tried = True
+            self.memory_recycle_pending = set(self.pool.pages)
+
+    # ---- Recovery ----
+    async def replace_page(self, page, reason, event_url=None, recycle=False):
+        async with self._lock:
+            self.memory_recycle_pending.discard(page)
+            if page not in self.pool.pages:
+                return  # already replaced, e.g. by a browser restart
+            rss_before = browser_rss_mb(self.pool.browser) if recycle else None
+            started = time.perf_counter()
+            try:
+                await asyncio.wait_for(self.pool.replace(page), timeout=30)
+            except Exception as e:
+                print(f"Could not replace page ({reason}): {e}")
+                self._browser_lost.set()
+                return
+            self._record("page", reason, started, event_url, recycle, rss_before)
+
+    async def restart_browser(self, reason, recycle=False):
+        # A crashed or hung browser is killed first, freeing its profile for the relaunch. A recycle
+        # isn't urgent: the replacement starts on the other profile with its pages prepared while
+        # the old browser keeps checking, gets the old browser's cookies, and only then takes over.
+        async with self._lock:
+            rss_before = browser_rss_mb(self.pool.browser) if recycle else None
+            started = time.perf_counter()
+            old = self.pool.browser
+            cookies = await self.session_cookies() if recycle else []
+            old_running = True
+            if self.standby is not None:
+                browser, pages, profile_dir = self.standby
+                self.standby = None
+            else:
+                await self.cancel_standby_task()
+                profile_dir = self.other_profile_dir()
+                if not recycle or profile_dir == self.profile_dir:
+                    await kill_browser(old)
+                    old_running = False
+                    profile_dir = self.profile_dir
+                browser = await self.launch_browser(profile_dir)
+                pages = await self.pool.open_pages(browser)
+            await copy_cookies(cookies, pages)
+            self.profile_dir = profile_dir
+            self.watch(browser)
+            await self.pool.rebind(browser, pages)
+            if old_running:
+                await kill_browser(old)
+            self._browser_lost.clear()
+            self.memory_recycle_pending.clear()
+            self._record("browser", reason, started, recycle=recycle, rss_before=rss_before)
+            if self.use_standby_browser:
+                self._standby_task = asyncio.ensure_future(self._warm_standby_browser())
+
+    def other_profile_dir(self):
+        return next((d for d in self.profile_dirs if d != self.profile_dir), self.profile_dir)
+
+    async def cancel_standby_task(self):
+        # Waits for it to let go of the other profile
+        if self._standby_task is not None:
+            self._standby_task.cancel()
+            await asyncio.gather(self._standby_task, return_exceptions=True)
+            self._standby_task = None
+
+    async def session_cookies(self):
+        # The cookies of the sites the pool pages are on; each profile has its own cookie store,
+        # so they are carried over to the replacement browser
+        cookies = {}
+        for page in self.pool.pages:
+            try:
+                for cookie in await asyncio.wait_for(page.cookies(), timeout=self.health_timeout):
+                    cookies[(cookie["name"], cookie["domain"], cookie["path"])] = cookie
+            except Exception:
+                continue
+        return list(cookies.values())
+
+    async def _warm_standby_browser(self):
+        # Launch a second browser on the other profile with the pool's pages already prepared
+        profile_dir = self.other_profile_dir()
+        browser = None
+        try:
+            browser = await self.launch_browser(profile_dir)
+            pages = await self.pool.open_pages(browser)
+        except asyncio.CancelledError:
+            if browser is not None:
+                await kill_browser(browser)
+            raise
+        except Exception as e:
+            print("Could not start standby browser:", e)
+            if browser is not None:
+                await kill_browser(browser)
+            return
+        self.standby = (browser, pages, profile_dir)
+        print(f"Standby browser ready ({profile_dir}).")
+
+    async def close(self):
+        self._closing = True
+        if self._standby_task is not None:
+            self._standby_task.cancel()
+        if self.standby is not None:
+            await kill_browser(self.standby[0])
+            self.standby = None